@@ -0,0 +1,126 @@
+"""Benchmark the Livedata JobResult index on a large synthetic JobResult table.
+
+Run it in the development environment:
+
+    BENCHMARK_ROWS=1000000 invoke nbshell --file development/benchmark_jobresult_index.py
+
+The script inserts BENCHMARK_ROWS synthetic job results, spread over several jobs,
+statuses and BENCHMARK_DAYS days, and prints the query plans and timings of the cleanup and
+"latest result" queries of the app without and with the index of the migration
+`0002_jobresult_livedata_index`. The synthetic job results are deleted at the end
+and the index is restored.
+"""
+
+from datetime import timedelta
+from importlib import import_module
+from os import getenv
+import random
+import statistics
+import time
+import uuid
+
+from django.db import connection
+from django.utils import timezone
+from nautobot.extras.models import Job, JobResult
+
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+
+index_migration = import_module("nautobot_app_livedata.migrations.0002_jobresult_livedata_index")
+
+BENCHMARK_NAME = "livedata-index-benchmark"
+ROWS = int(getenv("BENCHMARK_ROWS", "200000"))
+REPEAT = int(getenv("BENCHMARK_REPEAT", "5"))
+# With a daily cleanup that keeps 30 days, the table holds about 31 days of job results
+DAYS = int(getenv("BENCHMARK_DAYS", "31"))
+BATCH_SIZE = 5000
+# Share of the synthetic job results that belong to the Livedata query job
+LIVEDATA_SHARE = 0.3
+STATUSES = ["SUCCESS"] * 8 + ["FAILURE", "PENDING"]
+
+
+def _create_job_results(livedata_job, other_jobs):
+    now = timezone.now()
+    created = 0
+    while created < ROWS:
+        batch = []
+        for _ in range(min(BATCH_SIZE, ROWS - created)):
+            job_model = livedata_job if random.random() < LIVEDATA_SHARE else random.choice(other_jobs)  # noqa: S311
+            status = random.choice(STATUSES)  # noqa: S311
+            date_created = now - timedelta(minutes=random.randint(0, DAYS * 24 * 60))  # noqa: S311
+            batch.append(
+                JobResult(
+                    id=uuid.uuid4(),
+                    name=BENCHMARK_NAME,
+                    job_model=job_model,
+                    status=status,
+                    date_done=None if status == "PENDING" else date_created + timedelta(seconds=5),
+                    task_kwargs={"device_id": str(uuid.uuid4())},
+                )
+            )
+        JobResult.objects.bulk_create(batch)
+        created += len(batch)
+    print(f"Created {created} synthetic job results")
+
+
+def _execute(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+
+
+def _analyze(table):
+    _execute(f"ANALYZE {table}" if connection.vendor == "postgresql" else f"ANALYZE TABLE {table}")
+
+
+def _queries(livedata_job):
+    cutoff = timezone.now() - timedelta(days=30)
+    job_results = JobResult.objects.filter(job_model_id__in=[livedata_job.pk])
+    return {
+        "cleanup batch": job_results.filter(status="SUCCESS", date_done__lt=cutoff)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:1000],
+        "cleanup dry-run count": job_results.filter(status="SUCCESS", date_done__lt=cutoff).order_by().values("pk"),
+        "latest result": job_results.filter(status="SUCCESS").order_by("-date_done")[:1],
+    }
+
+
+def _benchmark(label, livedata_job):
+    print(f"\n==================\n{label}\n==================")
+    for name, queryset in _queries(livedata_job).items():
+        count = name.endswith("count")
+        timings = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            if count:
+                queryset.count()
+            else:
+                # all() returns a new queryset, the result of the previous run is not reused
+                list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"\n--- {name}: median {statistics.median(timings):.2f} ms, min {min(timings):.2f} ms ---")
+        print(queryset.explain(analyze=True) if connection.vendor in ("postgresql", "mysql") else queryset.explain())
+
+
+def _main():
+    table = JobResult._meta.db_table
+    livedata_job = Job.objects.get(name=PLUGIN_SETTINGS["query_job_name"])
+    other_jobs = list(Job.objects.exclude(pk=livedata_job.pk)[:10]) or [livedata_job]
+    vendor = connection.vendor
+    try:
+        _create_job_results(livedata_job, other_jobs)
+        _execute(index_migration.get_drop_index_sql(vendor, table))
+        _analyze(table)
+        _benchmark("Without the Livedata index", livedata_job)
+        _execute(index_migration.get_create_index_sql(vendor, table))
+        _analyze(table)
+        _benchmark("With the Livedata index", livedata_job)
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE name = %s", [BENCHMARK_NAME])  # noqa: S608
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        if index_migration.INDEX_NAME not in constraints:
+            _execute(index_migration.get_create_index_sql(vendor, table))
+        print(f"\nDeleted the synthetic job results from {table}")
+
+
+_main()
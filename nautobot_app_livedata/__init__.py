@@ -3,9 +3,11 @@
 # Metadata is inherited from Nautobot. If not including Nautobot in the environment, this should be added
 from importlib import metadata
 
+from django.core import checks
 from nautobot.apps import nautobot_database_ready, NautobotAppConfig
 
 from .signals import nautobot_database_ready_callback  # pylint: disable=unused-import, wrong-import-position
+from .utilities.queuerouting import check_queue_workers
 
 __version__ = metadata.version(__name__)
 
@@ -25,6 +27,31 @@ class LivedataConfig(NautobotAppConfig):
     max_version = "3.9999"
     default_settings = {
         "query_job_task_queue": "default",
+        "query_job_queue_routing": {
+            "interactive": None,
+            "bulk": None,
+            "maintenance": None,
+        },
+        "query_job_queue_affinity": {
+            "locations": {},
+            "tenants": {},
+        },
+        "primary_device_cache_timeout": 300,
+        "primary_device_map_enabled": False,
+        "query_job_sync_max_workers": 2,
+        "query_job_sync_timeout": 10,
+        "query_rate_limits": {
+            "user": None,
+            "device": None,
+            "global": None,
+        },
+        "query_job_max_queue_depth": None,
+        "query_job_queue_depth_retry_after": 10,
+        "cleanup_archive_dir": None,
+        "query_poll_max_wait": 300,
+        "query_last_result_max_age": 86400,
+        "tracing_exporter": None,
+        "tracing_file": None,
     }
     caching_config = {}
     docs_view_name = "plugins:nautobot_app_livedata:docs"
@@ -36,6 +63,9 @@ class LivedataConfig(NautobotAppConfig):
         # This is by no means a requirement for all Apps, but is a useful way for an App to perform
         # database operations such as defining CustomFields, Relationships, etc. at the appropriate time.
         nautobot_database_ready.connect(nautobot_database_ready_callback, sender=self)
+        # Warn about routed job queues that no Celery worker listens on. The check inspects the
+        # workers over the broker, so it only runs with `nautobot-server check --deploy`.
+        checks.register(check_queue_workers, deploy=True)
 
 
 config = LivedataConfig  # pylint:disable=invalid-name
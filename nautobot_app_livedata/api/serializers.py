@@ -5,7 +5,10 @@
 from nautobot.dcim.models import Interface
 from rest_framework import serializers
 
-from nautobot_app_livedata.utilities.primarydevice import PrimaryDeviceUtils
+from nautobot_app_livedata.utilities.primarydevicecache import primary_device_cache
+
+# Maximum number of objects resolved by one bulk primary device request
+PRIMARY_DEVICE_BULK_MAX_OBJECTS = 10000
 
 
 class LivedataSerializer(serializers.Serializer):
@@ -44,7 +47,7 @@ class LivedataSerializer(serializers.Serializer):
         if "pk" not in attrs:
             raise serializers.ValidationError("The object ID is not defined", code="invalid")
         try:
-            result = PrimaryDeviceUtils(object_type=attrs["object_type"], pk=attrs["pk"]).to_dict()
+            result = primary_device_cache.resolve(attrs["object_type"], attrs["pk"])
             attrs.update(result)
         except ValueError as err:
             raise serializers.ValidationError(str(err), code="invalid") from err
@@ -59,6 +62,28 @@ class LivedataSerializer(serializers.Serializer):
         raise NotImplementedError
 
 
+class LivedataPrimaryDeviceBulkSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """Serializer for the bulk request of the Nautobot App Livedata primary device API.
+
+    Properties:
+
+    - object_type (str): The object type of all objects, 'dcim.interface', 'dcim.device'
+      or 'dcim.virtualchassis'.
+    - pks (list[UUID]): The primary keys of the objects.
+
+    Raises:
+    - ValidationError: If the object type is not valid.
+    - ValidationError: If no or more than PRIMARY_DEVICE_BULK_MAX_OBJECTS primary keys are given.
+    """
+
+    object_type = serializers.ChoiceField(choices=["dcim.interface", "dcim.device", "dcim.virtualchassis"])
+    pks = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=PRIMARY_DEVICE_BULK_MAX_OBJECTS,
+    )
+
+
 class LivedataJobResultSerializer(serializers.Serializer):
     """Serializer for the Nautobot App Livedata API to return the Job Result.
 
@@ -0,0 +1,216 @@
+"""Admission control for the Livedata query API."""
+
+# filepath: nautobot_app_livedata/api/throttling.py
+
+from datetime import timedelta
+import logging
+import time
+from typing import Any, Optional
+
+from django.core.cache import cache
+from django.utils import timezone
+from nautobot.dcim.models import Interface
+from nautobot.extras.models import JobResult
+from rest_framework.throttling import BaseThrottle
+
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities.queuerouting import get_query_task_queue
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+CACHE_KEY_PREFIX = "nautobot_app_livedata.throttle"
+# JobResults that are still PENDING after this time are ignored for the queue depth,
+# they belong to workers that died or to queues nobody listens on.
+QUEUE_DEPTH_WINDOW = timedelta(hours=1)
+# Seconds the counted queue depth is reused before JobResult is queried again.
+QUEUE_DEPTH_CACHE_TIMEOUT = 5
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: Optional[str]) -> Optional[tuple[int, int]]:
+    """Parse a rate string into the number of requests and the length of the window.
+
+    Args:
+        rate (str): A rate in the format '<requests>/<period>', e.g. '30/min' or '5/s'.
+            Only the first letter of the period is used (s, m, h, d).
+
+    Returns:
+        tuple: The number of requests allowed per window and the window in seconds,
+            or None if no rate is given.
+
+    Raises:
+        ValueError: If the rate is not in the format '<requests>/<period>'.
+    """
+    if not rate:
+        return None
+    try:
+        num, period = rate.split("/")
+        limit = int(num)
+        seconds = PERIODS[period.strip()[0].lower()]
+    except (ValueError, KeyError, IndexError) as err:
+        raise ValueError(f"Invalid rate '{rate}', expected '<requests>/<s|min|hour|day>'") from err
+    if limit <= 0:
+        raise ValueError(f"Invalid rate '{rate}', the number of requests must be positive")
+    return limit, seconds
+
+
+class RateWindow:
+    """Fixed-window request counter kept in the Django cache.
+
+    The requests of a scope are counted per window of `period` seconds. The
+    windows are aligned to the epoch, so all processes count into the same key.
+    The counter is only changed with `cache.incr()` and `cache.decr()`, which are
+    atomic in the shared cache backends (Redis, Memcached), no lock is needed.
+    """
+
+    def __init__(self, key: str, limit: int, period: int, now: float) -> None:
+        """Initialize the counter of the window that contains `now`.
+
+        Args:
+            key (str): The cache key prefix of the scope.
+            limit (int): The number of requests allowed per window.
+            period (int): The length of the window in seconds.
+            now (float): The current time in seconds since the epoch.
+        """
+        window = int(now // period)
+        self.key = f"{key}.{window}"
+        self.limit = limit
+        self.period = period
+        self.window_end = (window + 1) * period
+
+    def hit(self) -> bool:
+        """Count a request, return True if it is within the limit of the window."""
+        # The key expires shortly after the end of its window.
+        cache.add(self.key, 0, timeout=self.period + 1)
+        try:
+            count = cache.incr(self.key)
+        except ValueError:
+            # The key expired between add() and incr()
+            cache.add(self.key, 1, timeout=self.period + 1)
+            count = 1
+        return count <= self.limit
+
+    def undo(self) -> None:
+        """Take back a request counted by hit()."""
+        try:
+            cache.decr(self.key)
+        except ValueError:
+            pass
+
+    def wait(self, now: float) -> float:
+        """Return the seconds until the next window starts."""
+        return max(self.window_end - now, 0)
+
+
+def get_queue_depth(task_queue: str) -> int:
+    """Return the number of livedata jobs waiting in the given queue.
+
+    The depth is the number of recent PENDING JobResults sent to the queue. The
+    value is cached for a few seconds to keep the check cheap under load.
+
+    Args:
+        task_queue (str): The name of the job queue.
+
+    Returns:
+        int: The number of jobs that have not been picked up by a worker.
+    """
+    key = f"{CACHE_KEY_PREFIX}.queue_depth.{task_queue}"
+    depth = cache.get(key)
+    if depth is None:
+        depth = JobResult.objects.filter(
+            status="PENDING",
+            date_created__gte=timezone.now() - QUEUE_DEPTH_WINDOW,
+            celery_kwargs__queue=task_queue,
+        ).count()
+        cache.set(key, depth, timeout=QUEUE_DEPTH_CACHE_TIMEOUT)
+    return depth
+
+
+class LivedataAdmissionThrottle(BaseThrottle):
+    """Limit the number of live-data queries per user, per device and globally.
+
+    Every configured scope in `query_rate_limits` has its own request counter,
+    see `RateWindow`. A request is counted in all of them and is only admitted
+    if it is within all limits, otherwise it is taken back from all counters.
+    Additionally, requests are shed while the backlog of the routed job queue
+    exceeds `query_job_max_queue_depth`. Rejected requests are answered by DRF
+    with 429 and a `Retry-After` header.
+
+    The query API checks the throttle only once the query is valid and the user
+    may run it, so rejected or invalid queries are not counted.
+    """
+
+    scopes = ("user", "device", "global")
+
+    def __init__(self) -> None:
+        """Initialize the throttle."""
+        self._wait = None
+
+    def allow_request(self, request: Any, view: Any) -> bool:
+        """Return True if the request is admitted."""
+        if self._queue_is_full(request, view):
+            self._wait = PLUGIN_SETTINGS["query_job_queue_depth_retry_after"]
+            logger.warning("Livedata query rejected, backlog of the job queue is too large")
+            return False
+
+        now = time.time()
+        windows = []
+        for scope in self.scopes:
+            rate = parse_rate((PLUGIN_SETTINGS["query_rate_limits"] or {}).get(scope))
+            if rate is None:
+                continue
+            ident = self.get_scope_ident(scope, request, view)
+            if ident is None:
+                continue
+            windows.append((scope, RateWindow(f"{CACHE_KEY_PREFIX}.{scope}.{ident}", *rate, now)))
+
+        exceeded = [(scope, window) for scope, window in windows if not window.hit()]
+        if exceeded:
+            # A rejected request does not count against any of the limits.
+            for _, window in windows:
+                window.undo()
+            self._wait = max(window.wait(now) for _, window in exceeded)
+            logger.warning("Livedata query rejected by rate limit %s", ", ".join(scope for scope, _ in exceeded))
+            return False
+        self._wait = 0
+        return True
+
+    def wait(self) -> Optional[float]:
+        """Return the recommended number of seconds to wait before the next request."""
+        return self._wait
+
+    def get_scope_ident(self, scope: str, request: Any, view: Any) -> Optional[str]:
+        """Return the identifier of the bucket for the given scope.
+
+        Args:
+            scope (str): One of 'user', 'device' or 'global'.
+            request (Request): The request object.
+            view (LivedataQueryApiView): The view that handles the request.
+
+        Returns:
+            str: The bucket identifier, or None if the scope does not apply to the request.
+        """
+        if scope == "global":
+            return "all"
+        if scope == "user":
+            if request.user and request.user.is_authenticated:
+                return str(request.user.pk)
+            return self.get_ident(request)
+        pk = view.kwargs.get("pk")
+        if pk is not None and view.get_object_type() == "dcim.interface":
+            pk = Interface.objects.filter(pk=pk).values_list("device_id", flat=True).first()
+        return str(pk) if pk is not None else None
+
+    @staticmethod
+    def _queue_is_full(request: Any, view: Any) -> bool:
+        """Check the backlog of the job queue the query is sent to.
+
+        The view resolves the queue, including the affinity queue of the device,
+        before it is admitted, see `get_query_job_queue()`.
+        """
+        max_depth = PLUGIN_SETTINGS["query_job_max_queue_depth"]
+        task_queue = getattr(view, "task_queue", None) or get_query_task_queue(request)
+        if not max_depth or not task_queue:
+            return False
+        return get_queue_depth(task_queue) >= max_depth
@@ -7,7 +7,9 @@ import logging
 from django.urls import path
 
 from .views import (
+    LivedataJobResultOutputApiView,
     LivedataPrimaryDeviceApiView,
+    LivedataPrimaryDeviceBulkApiView,
     LivedataQueryDeviceApiView,
     LivedataQueryInterfaceApiView,
 )
@@ -65,4 +67,19 @@ urlpatterns = [
         LivedataPrimaryDeviceApiView.as_view(),
         name="livedata-primary-device-api",
     ),
+    path(
+        "primary-device/",
+        LivedataPrimaryDeviceBulkApiView.as_view(),
+        name="livedata-primary-device-bulk-api",
+    ),
+    path(
+        "jobresult/<uuid:pk>/output/",  # jobresult_id
+        LivedataJobResultOutputApiView.as_view(),
+        name="livedata-jobresult-output-api",
+    ),
+    path(
+        "jobresult/<uuid:pk>/output/<int:index>/",  # jobresult_id, position of the command
+        LivedataJobResultOutputApiView.as_view(),
+        name="livedata-jobresult-command-output-api",
+    ),
 ]
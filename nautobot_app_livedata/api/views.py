@@ -3,33 +3,39 @@
 # filepath: livedata/api/views.py
 
 from abc import ABC, abstractmethod
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from http import HTTPStatus
+from importlib.util import find_spec
 import logging
+import time
 from typing import Any, Optional
 
 from django.core.exceptions import ObjectDoesNotExist
+from nautobot.core.settings_funcs import is_truthy
 from nautobot.dcim.models import Device, Interface
 from nautobot.extras.jobs import RunJobTaskFailed
 from nautobot.extras.models import Job, JobResult
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 
-from nautobot_app_livedata.api.serializers import LivedataSerializer
+from nautobot_app_livedata.api.serializers import LivedataPrimaryDeviceBulkSerializer, LivedataSerializer
+from nautobot_app_livedata.api.throttling import LivedataAdmissionThrottle
 from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities import metrics, primarydevicemap, resultoutput, tracing
+from nautobot_app_livedata.utilities.eta import get_query_eta
+from nautobot_app_livedata.utilities.jobcache import livedata_job_cache
 from nautobot_app_livedata.utilities.primarydevice import (
     get_livedata_commands_for_device,
     get_livedata_commands_for_interface,
 )
+from nautobot_app_livedata.utilities.queuerouting import get_query_job_queue
+from nautobot_app_livedata.utilities.syncjob import SyncJobRunner
 
 logger = logging.getLogger("nautobot_app_livedata")
 
-# Check that napalm is installed
-try:
-    import napalm  # pylint: disable=unused-import # noqa: F401
-except ImportError:
-    raise ImportError(  # pylint: disable=raise-missing-from
-        "ERROR NAPALM is not installed. Please see the documentation for instructions."
-    )
+# Check that napalm is installed, without the cost of importing it
+if find_spec("napalm") is None:
+    raise ImportError("ERROR NAPALM is not installed. Please see the documentation for instructions.")
 
 
 # Check that celery worker is installed
@@ -44,6 +50,11 @@ except ImportError as err:
     )
     raise ImportError from err
 
+# Bounded pool for the opt-in `?sync=true` mode of the query API
+sync_job_runner = SyncJobRunner(
+    PLUGIN_SETTINGS["query_job_sync_max_workers"], PLUGIN_SETTINGS["query_job_sync_timeout"]
+)
+
 
 class LivedataQueryApiView(GenericAPIView, ABC):
     """Abstract Livedata Query API view.
@@ -55,6 +66,7 @@ class LivedataQueryApiView(GenericAPIView, ABC):
 
     serializer_class = LivedataSerializer
     permission_classes = []  # Custom permission checking in get() method
+    throttle_classes = [LivedataAdmissionThrottle]
 
     @abstractmethod
     def get_object_type(self) -> str:
@@ -81,6 +93,43 @@ class LivedataQueryApiView(GenericAPIView, ABC):
             list[str]: List of command strings to be executed on the device.
         """
 
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the view, Django creates one instance per request."""
+        super().__init__(**kwargs)
+        # Labels of the request metrics, see dispatch()
+        self.metric_labels = {"platform": None, "queue": None}
+        # The job queue of the query, checked by the admission throttle, see get()
+        self.task_queue = None
+
+    def dispatch(self, request: Any, *args: Any, **kwargs: Any) -> Any:
+        """Count, time and trace the request, also if it is throttled.
+
+        The platform and queue labels are filled in by get() once they are known.
+        The span of the request is the root of the trace of the query, see `tracing`.
+        """
+        start = time.monotonic()
+        with tracing.span(
+            "LivedataQueryApiView.get", object_type=self.get_object_type(), pk=str(kwargs.get("pk"))
+        ) as span:
+            response = super().dispatch(request, *args, **kwargs)
+            span.set_attribute("http.status_code", response.status_code)
+        metrics.query_requests_counter.labels(self.get_object_type(), response.status_code).inc()
+        metrics.api_latency_histogram.labels(
+            self.metric_labels["platform"] or metrics.UNKNOWN, self.metric_labels["queue"] or metrics.UNKNOWN
+        ).observe(time.monotonic() - start)
+        return response
+
+    def check_throttles(self, request: Any) -> None:
+        """Skip the throttles before get(), the query is admitted by get() once it is valid, see `admit()`."""
+
+    def admit(self, request: Any) -> None:
+        """Check the throttles of the view.
+
+        Raises:
+            Throttled: If a rate limit is exceeded or the job queue is full (429 with Retry-After).
+        """
+        super().check_throttles(request)
+
     def get(self, request: Any, *args: Any, pk: Optional[Any] = None, **kwargs: Any) -> Response:  # pylint: disable=R0911
         """Handle GET request for Livedata Query API.
 
@@ -92,6 +141,12 @@ class LivedataQueryApiView(GenericAPIView, ABC):
         For Example:
             GET /api/extras/job-results/{jobresult_id}/
 
+        With the query parameter `?sync=true` the job is run inline in a bounded
+        thread pool of the web process. If it finishes within `query_job_sync_timeout`
+        seconds, the response also contains the `status` and `result` of the JobResult.
+        Otherwise, or if the pool is saturated, the response is the same as for an
+        enqueued job and the JobResult must be polled.
+
         Args:
             request (Request): The request object.
             pk (uuid): The primary key of the model instance.
@@ -100,12 +155,15 @@ class LivedataQueryApiView(GenericAPIView, ABC):
 
         Returns:
             jobresult_id: The job result ID of the job that was enqueued.
+            eta_seconds: The median duration of the recent runs for the device, a hint for
+                polling the JobResult. None if there are no recent runs.
 
         Raises:
             Response: If the user does not have permission to execute 'livedata' on the instance.
             Response: If the serializer is not valid.
             Response: If the job Livedata Api-Job is not found.
             Response: If the job failed to run.
+            Throttled: If a rate limit is exceeded or the job queue is full (429 with Retry-After).
         """
         logger.info(
             "Resolved view=%s queryset_model=%s",
@@ -133,9 +191,11 @@ class LivedataQueryApiView(GenericAPIView, ABC):
         try:
             primary_device_info = serializer.validated_data
             instance = self._resolve_instance(payload["object_type"], pk, primary_device_info)
+            self._set_metric_label("platform", metrics.get_platform_label(getattr(instance, "device", instance)))
             job_kwargs = self._build_job_kwargs(request, primary_device_info, payload["object_type"], instance)
         except ValueError as error:
             logger.error("Error during Livedata Query API: %s", error)
+            metrics.count_failure(error, "api")
             return Response(
                 "An error occurred during the Livedata Query API request.",
                 status=HTTPStatus.BAD_REQUEST,
@@ -159,12 +219,21 @@ class LivedataQueryApiView(GenericAPIView, ABC):
                 status=HTTPStatus.NOT_FOUND,  # 404
             )
 
+        # Only a valid and permitted query takes tokens of the rate limits. The
+        # throttle checks the backlog of the queue the job is sent to.
+        self.task_queue = task_queue = get_query_job_queue(request, job_kwargs.get("primary_device_id"))
+        self.admit(request)
+        self._set_metric_label("queue", task_queue)
         try:
-            jobres = self._enqueue_job(job, request.user, job_kwargs)
+            if is_truthy(request.query_params.get("sync", False)):
+                response = self._run_job_inline(job, request.user, job_kwargs, task_queue)
+                if response is not None:
+                    return response
+            jobres = self._enqueue_job(job, request.user, job_kwargs, task_queue)
             logger.debug("Enqueued %s: %s", PLUGIN_SETTINGS["query_job_name"], jobres.id)
             return Response(
                 content_type="application/json",
-                data={"jobresult_id": jobres.id},
+                data={"jobresult_id": jobres.id, "eta_seconds": self._get_eta(job, job_kwargs)},
                 status=HTTPStatus.OK,  # 200
             )
         except RunJobTaskFailed as error:
@@ -175,6 +244,11 @@ class LivedataQueryApiView(GenericAPIView, ABC):
                 status=HTTPStatus.INTERNAL_SERVER_ERROR,  # 500
             )
 
+    def _set_metric_label(self, name: str, value: Optional[str]) -> None:
+        """Set a label of the request metrics, see dispatch()."""
+
+        self.metric_labels[name] = value
+
     def _build_serializer_payload(self, request: Any, pk: Optional[Any]) -> dict[str, Any]:
         """Return serializer payload populated with object metadata."""
 
@@ -210,9 +284,13 @@ class LivedataQueryApiView(GenericAPIView, ABC):
         return queryset.get(pk=pk)
 
     def _get_livedata_job(self) -> Job | None:
-        """Fetch the configured Livedata job if available."""
+        """Fetch the configured Livedata job if available.
+
+        The Job is served from the process-level job cache, see `livedata_job_cache`.
+        """
 
-        return Job.objects.filter(name=PLUGIN_SETTINGS["query_job_name"]).first()
+        entry = livedata_job_cache.get(PLUGIN_SETTINGS["query_job_name"], PLUGIN_SETTINGS["query_job_task_queue"])
+        return entry.job if entry else None
 
     def _build_job_kwargs(
         self,
@@ -235,14 +313,101 @@ class LivedataQueryApiView(GenericAPIView, ABC):
             "call_object_type": object_type,
         }
 
-    def _enqueue_job(self, job: Job, user: Any, job_kwargs: dict[str, Any]) -> JobResult:
-        """Enqueue the configured job and return the resulting JobResult."""
+    @staticmethod
+    def _get_eta(job: Job, job_kwargs: dict[str, Any]) -> Optional[float]:
+        """Return the expected seconds until the result of the query is ready, see `get_query_eta()`.
+
+        The estimate is only a hint for polling, the job is enqueued already, so an
+        error is logged and no estimate is returned.
+        """
+
+        try:
+            return get_query_eta(job.pk, job_kwargs.get("primary_device_id"))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.warning("Could not estimate the duration of %s: %s", job.name, error)
+            return None
 
-        return JobResult.enqueue_job(
-            job,
-            user=user,
-            task_queue=PLUGIN_SETTINGS["query_job_task_queue"],
-            **job_kwargs,
+    def _get_enqueue_kwargs(self, job: Job, task_queue: Optional[str] = None) -> dict[str, Any]:
+        """Return the queue keyword arguments for JobResult.enqueue_job().
+
+        Args:
+            job (Job): The Livedata query Job.
+            task_queue (str): The job queue the query is routed to, see `get_query_job_queue()`.
+                Defaults to `query_job_task_queue`.
+        """
+
+        task_queue = task_queue or PLUGIN_SETTINGS["query_job_task_queue"]
+        entry = livedata_job_cache.get(PLUGIN_SETTINGS["query_job_name"], task_queue)
+        if entry is not None and entry.job is job:
+            return entry.enqueue_kwargs
+        return {"task_queue": task_queue}
+
+    def _enqueue_job(
+        self, job: Job, user: Any, job_kwargs: dict[str, Any], task_queue: Optional[str] = None
+    ) -> JobResult:
+        """Enqueue the configured job and return the resulting JobResult.
+
+        The `task_queue` is the one resolved by `get_query_job_queue()`, i.e. the queue
+        configured for the location or tenant of the primary device in
+        `query_job_queue_affinity`, so the job runs on a worker close to the device.
+        """
+
+        with tracing.span("LivedataQueryApiView.enqueue", queue=task_queue):
+            jobres = JobResult.enqueue_job(
+                job,
+                user=user,
+                **self._get_enqueue_kwargs(job, task_queue),
+                **tracing.add_trace_context(job_kwargs),
+            )
+        self._count_enqueued(task_queue, "async")
+        return jobres
+
+    def _count_enqueued(self, task_queue: Optional[str], mode: str) -> None:
+        """Count an enqueued or inline job, and use its queue as label of the request metrics."""
+
+        task_queue = task_queue or PLUGIN_SETTINGS["query_job_task_queue"]
+        self._set_metric_label("queue", task_queue)
+        metrics.enqueued_jobs_counter.labels(task_queue, mode).inc()
+
+    def _run_job_inline(
+        self, job: Job, user: Any, job_kwargs: dict[str, Any], task_queue: Optional[str] = None
+    ) -> Optional[Response]:
+        """Run the job in the web process and return its output.
+
+        Returns:
+            Response: The JobResult id, and its status and result if the job finished in time.
+                None if the thread pool is saturated and the job must be enqueued instead.
+        """
+
+        enqueue_kwargs = self._get_enqueue_kwargs(job, task_queue)
+        job_queue = enqueue_kwargs.get("job_queue")
+        task_queue = job_queue.name if job_queue is not None else enqueue_kwargs.get("task_queue")
+        with tracing.span("LivedataQueryApiView.run_inline", queue=task_queue):
+            submitted = sync_job_runner.submit(job, user, task_queue, tracing.add_trace_context(job_kwargs))
+        if submitted is None:
+            logger.info("Inline run of %s not possible, falling back to the job queue", job.name)
+            return None
+        jobres, future = submitted
+        self._count_enqueued(task_queue, "sync")
+        try:
+            jobres = future.result(timeout=PLUGIN_SETTINGS["query_job_sync_timeout"])
+        except FutureTimeoutError:
+            logger.info("Inline run of JobResult %s exceeded the timeout, client has to poll", jobres.id)
+            return Response(
+                content_type="application/json",
+                data={"jobresult_id": jobres.id, "eta_seconds": self._get_eta(job, job_kwargs)},
+                status=HTTPStatus.OK,  # 200
+            )
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error("Inline run of %s failed: %s", job.name, error)
+            return Response(
+                "An internal error has occurred while running the job.",
+                status=HTTPStatus.INTERNAL_SERVER_ERROR,  # 500
+            )
+        return Response(
+            content_type="application/json",
+            data={"jobresult_id": jobres.id, "status": jobres.status, "result": jobres.result},
+            status=HTTPStatus.OK,  # 200
         )
 
 
@@ -393,3 +558,123 @@ class LivedataPrimaryDeviceApiView(GenericAPIView):
                 status=HTTPStatus.BAD_REQUEST,  # 400
             )
         return Response(data=result, status=HTTPStatus.OK)  # 200
+
+
+class LivedataPrimaryDeviceBulkApiView(GenericAPIView):
+    """Nautobot App Livedata API bulk Primary Device view.
+
+    API endpoint for resolving the primary devices of many objects of the same type
+    with one request, e.g. for reports and bulk queries. The objects are read from
+    the primary device map if it is enabled, and otherwise resolved with
+    PrimaryDeviceUtils.resolve_many() using a constant number of queries.
+    """
+
+    serializer_class = LivedataPrimaryDeviceBulkSerializer
+    queryset = Device.objects.all()
+    permission_classes = []  # Custom permission checking in post() method
+
+    def post(self, request: Any, *args: Any, **kwargs: Any) -> Response:
+        """Handle POST request for the bulk Livedata Primary Device API.
+
+        Args:
+            request (Request): The request object with the body
+                {"object_type": "dcim.interface", "pks": ["<uuid>", ...]}.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: The response object. "application/json"
+
+                data = {
+                    "object_type": "The object type of the request",
+                    "primary_devices": {"<pk>": "Same data as the primary-device endpoint returns"},
+                    "errors": {"<pk>": "Reason why the primary device could not be resolved"}
+                }
+
+        Raises:
+            Response: If the user does not have permission to interact with devices (403).
+            Response: If the request body is not valid (400).
+        """
+        if not request.user.has_perm("dcim.can_interact_device"):
+            return Response(
+                {
+                    "error": (
+                        "You do not have the permission 'can_interact' for 'dcim.device'. Contact your administrator."
+                    )
+                },
+                status=HTTPStatus.FORBIDDEN,  # 403
+            )
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {
+                    "error": "Invalid data provided",
+                    "details": serializer.errors,
+                },
+                status=HTTPStatus.BAD_REQUEST,  # 400
+            )
+        object_type = serializer.validated_data["object_type"]
+        primary_devices, errors = primarydevicemap.resolve_many(object_type, serializer.validated_data["pks"])
+        return Response(
+            data={"object_type": object_type, "primary_devices": primary_devices, "errors": errors},
+            status=HTTPStatus.OK,  # 200
+        )
+
+
+class LivedataJobResultOutputApiView(GenericAPIView):
+    """Nautobot App Livedata API JobResult output view.
+
+    API endpoint for the Live Data tabs to poll a query JobResult and to load its
+    output one command at a time. Without an index the response contains the
+    status and, once the job succeeded, the commands with the size of their
+    output. With an index it contains the output of that command.
+    """
+
+    queryset = JobResult.objects.all()
+    permission_classes = []  # Custom permission checking in get() method
+
+    def get(self, request: Any, *args: Any, pk: Optional[Any] = None, index: Optional[int] = None, **kwargs: Any):
+        """Handle GET request for the Livedata JobResult output API.
+
+        Args:
+            request (Request): The request object.
+            pk (uuid): The primary key of the JobResult.
+            index (int): The position of the command in the result, None for the summary.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: The response object. "application/json"
+
+                Summary:
+                data = {
+                    "jobresult_id": "The JobResult ID",
+                    "status": "The status of the JobResult, e.g. 'PENDING' or 'SUCCESS'",
+                    "commands": [{"index": 0, "command": "...", "size": 0, "lines": 0, "stderr_size": 0}]
+                }
+
+                Command:
+                data = {"index": 0, "command": "...", "stdout": "...", "stderr": "..."}
+
+        Raises:
+            Response: If the user does not have permission to interact with devices (403).
+            Response: If the JobResult or the command does not exist or is not visible to the user (404).
+        """
+        if not request.user.has_perm("dcim.can_interact_device"):
+            return Response(
+                {
+                    "error": (
+                        "You do not have the permission 'can_interact' for 'dcim.device'. Contact your administrator."
+                    )
+                },
+                status=HTTPStatus.FORBIDDEN,  # 403
+            )
+        if not JobResult.objects.restrict(request.user, "view").filter(pk=pk).exists():
+            return Response({"error": "Job result not found."}, status=HTTPStatus.NOT_FOUND)  # 404
+        if index is None:
+            data = resultoutput.get_result_summary(pk)
+        else:
+            data = resultoutput.get_command_output(pk, index)
+        if data is None:
+            return Response({"error": "Output not found."}, status=HTTPStatus.NOT_FOUND)  # 404
+        return Response(data=data, status=HTTPStatus.OK)  # 200
@@ -3,16 +3,19 @@
 from nautobot.apps.jobs import register_jobs
 
 from nautobot_app_livedata.jobs.jobs import (
-    EnforceDefaultJobQueueJob,
     LivedataCleanupJobResultsJob,
     LivedataQueryJob,
+    LivedataRebuildPrimaryDeviceMapJob,
 )
+from nautobot_app_livedata.jobs.queues import EnforceDefaultJobQueueJob, LivedataBalanceJobQueuesJob
 
 # Nautobot expects an iterable named `jobs` in the jobs module
 jobs = [
     LivedataQueryJob,
     LivedataCleanupJobResultsJob,
     EnforceDefaultJobQueueJob,
+    LivedataRebuildPrimaryDeviceMapJob,
+    LivedataBalanceJobQueuesJob,
 ]
 
 # Preserve historical job_class_path values so queued jobs keep working.
@@ -23,7 +26,9 @@ register_jobs(*jobs)
 
 __all__ = [
     "EnforceDefaultJobQueueJob",
+    "LivedataBalanceJobQueuesJob",
     "LivedataCleanupJobResultsJob",
     "LivedataQueryJob",
+    "LivedataRebuildPrimaryDeviceMapJob",
     "jobs",
 ]
@@ -1,32 +1,33 @@
 """Jobs for the Nautobot App Livedata API."""
 
 from datetime import datetime
-from typing import Any
-
+from functools import lru_cache
+import os
+import tempfile
+import time
+from typing import Any, Optional, TYPE_CHECKING
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.core.files import File
+from django.db.models import Q
+from django.template.defaultfilters import filesizeformat
 from django.utils import timezone
 from django.utils.timezone import make_aware
-import jinja2
-from nautobot.apps.jobs import DryRunVar, IntegerVar, Job, ObjectVar
+from nautobot.apps.jobs import BooleanVar, DryRunVar, IntegerVar, Job
 from nautobot.dcim.models import Device, Interface, VirtualChassis
-from nautobot.extras.choices import JobQueueTypeChoices
-from nautobot.extras.models import Job as JobModel, JobQueue, JobResult
-from nautobot_plugin_nornir.constants import NORNIR_SETTINGS
-from nautobot_plugin_nornir.plugins.inventory.nautobot_orm import NautobotORMInventory
-from netutils.interface import abbreviated_interface_name, split_interface
-from nornir import InitNornir
-from nornir.core.exceptions import NornirExecutionError
-from nornir.core.plugins.inventory import InventoryPluginRegister
-
-from nautobot_app_livedata.nornir_plays.processor import ProcessLivedata
+from nautobot.extras.models import FileProxy, Job as JobModel, JobResult
+
 from nautobot_app_livedata.urls import APP_NAME, PLUGIN_SETTINGS
-from nautobot_app_livedata.utilities.output_filter import apply_output_filter
-from nautobot_app_livedata.utilities.primarydevice import PrimaryDeviceUtils
+from nautobot_app_livedata.utilities import cleanup, lastresult, metrics, primarydevicemap, syncjob, tracing
+from nautobot_app_livedata.utilities.primarydevicecache import primary_device_cache
+from nautobot_app_livedata.utilities.queuerouting import get_query_job_queues, get_routed_queues, QUEUE_ROLE_MAINTENANCE
+
+if TYPE_CHECKING:
+    import jinja2
 
 # Groupname: Livedata
 name = GROUP_NAME = APP_NAME  # pylint: disable=invalid-name
 
-InventoryPluginRegister.register("nautobot-inventory", NautobotORMInventory)
-
 # Constants for repeated strings
 PRIMARY_DEVICE_ID = "primary_device_id"
 INTERFACE_ID = "interface_id"
@@ -38,6 +39,52 @@ VIRTUAL_CHASSIS_ID = "virtual_chassis_id"
 DEVICE_ID = "device_id"
 JOB_NAME_CLEANUP = "livedata_cleanup_job_results"
 JOB_STATUS_SUCCESS = "SUCCESS"
+JOB_STATUS_FAILURE = "FAILURE"
+
+# jinja2, netutils and nornir are imported where they are used. The module is
+# imported by every web worker when the app is loaded, but only the Celery
+# workers that run the Livedata query job need them.
+
+
+@lru_cache(maxsize=1)
+def get_command_j2_env() -> "jinja2.Environment":
+    """Return the Jinja2 environment for the command templates, created on first use."""
+    import jinja2  # pylint: disable=import-outside-toplevel
+
+    return jinja2.Environment(
+        loader=jinja2.BaseLoader(),
+        autoescape=False,  # No HTML involved # type: ignore  # noqa: S701
+        undefined=jinja2.StrictUndefined,
+    )
+
+
+@lru_cache(maxsize=1)
+def register_nornir_inventory() -> None:
+    """Register the Nautobot ORM inventory plugin of Nornir once per process."""
+    # pylint: disable=import-outside-toplevel
+    from nautobot_plugin_nornir.plugins.inventory.nautobot_orm import NautobotORMInventory
+    from nornir.core.plugins.inventory import InventoryPluginRegister
+
+    InventoryPluginRegister.register("nautobot-inventory", NautobotORMInventory)
+
+
+@lru_cache(maxsize=1024)
+def compile_command_template(command: str) -> "jinja2.Template":
+    """Compile a Jinja2 command template once per process.
+
+    The platform commands are the same for every query of a platform, so the
+    compiled templates are reused. Templates that fail to compile are not cached.
+
+    Args:
+        command (str): The Jinja2 command template.
+
+    Returns:
+        jinja2.Template: The compiled template.
+
+    Raises:
+        jinja2.TemplateSyntaxError: If the command is not a valid template.
+    """
+    return get_command_j2_env().from_string(command)
 
 
 class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
@@ -51,6 +98,7 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
         has_sensitive_variables = False
         hidden = PLUGIN_SETTINGS.get("query_job_hidden")
         soft_time_limit = PLUGIN_SETTINGS.get("query_job_soft_time_limit")
+        task_queues = get_query_job_queues()
         enabled = True
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
@@ -75,6 +123,11 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
         self.execution_timestamp = None
         self.now = None
         self.call_object_type = None
+        # Labels of the metrics of the query, see `utilities.metrics`
+        self.metric_platform = None
+        self.metric_queue = None
+        # Trace context of the query, run() only receives the job variables
+        self.trace_context = None
 
     def parse_commands(self, commands_j2: list[str]) -> list[str]:
         """Render Jinja2 commands with interface/device context.
@@ -91,11 +144,8 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
         Raises:
             ValueError: If Jinja2 rendering fails for any command template.
         """
-        j2env = jinja2.Environment(
-            loader=jinja2.BaseLoader(),
-            autoescape=False,  # No HTML involved # type: ignore  # noqa: S701
-            undefined=jinja2.StrictUndefined,
-        )
+        from jinja2 import TemplateError  # pylint: disable=import-outside-toplevel
+
         context = {
             "intf_name": self.intf_name,
             "intf_name_only": self.intf_name_only,
@@ -112,9 +162,9 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
         parsed_commands = []
         for command in commands_j2:
             try:
-                parsed_command = j2env.from_string(command).render(context)
+                parsed_command = compile_command_template(command).render(context)
                 parsed_commands.append(parsed_command)
-            except jinja2.TemplateError as exc:
+            except TemplateError as exc:
                 raise ValueError(f"Failed to render Jinja2 command template: '{command}'. Error: {exc}") from exc
         return parsed_commands
 
@@ -136,12 +186,34 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
             ValueError: If referenced objects (interface, device) are not found.
         """
         super().before_start(task_id, args, kwargs)
-        self._initialize_variables(kwargs)
-        self._initialize_interface(kwargs)
-        self._initialize_primary_device(kwargs)
-        self._initialize_device(kwargs)
-        self._initialize_virtual_chassis(kwargs)
-        self._initialize_commands(kwargs)
+        job_result = getattr(self, "job_result", None)
+        queue_wait = timezone.now() - job_result.date_created if job_result is not None else None
+        self.metric_queue = job_result.queue if job_result is not None else None
+        self.trace_context = kwargs.get(tracing.TRACE_CONTEXT_KWARG)
+        with tracing.attach(self.trace_context):
+            with tracing.span("LivedataQueryJob.before_start", task_id=task_id, queue=self.metric_queue):
+                for initialize in (
+                    self._initialize_variables,
+                    self._initialize_interface,
+                    self._initialize_primary_device,
+                    self._initialize_device,
+                    self._initialize_virtual_chassis,
+                    self._initialize_commands,
+                ):
+                    with tracing.span(f"LivedataQueryJob.{initialize.__name__}"):
+                        initialize(kwargs)
+        self.metric_platform = metrics.get_platform_label(self.primary_device)
+        if queue_wait is not None:
+            metrics.queue_wait_histogram.labels(self.metric_platform, self.metric_queue or metrics.UNKNOWN).observe(
+                max(queue_wait.total_seconds(), 0)
+            )
+
+    def on_failure(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, exc: Any, task_id: str, args: tuple, kwargs: dict[str, Any], einfo: Any
+    ) -> None:
+        """Count the failed query by its error code, e.g. E3001, see `utilities.metrics`."""
+        super().on_failure(exc, task_id, args, kwargs, einfo)
+        metrics.count_failure(exc, "job")
 
     def _initialize_variables(self, kwargs: dict[str, Any]) -> None:
         """Initialize common context variables.
@@ -197,7 +269,7 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
             ValueError: If the primary device with the specified ID is not found.
         """
         if PRIMARY_DEVICE_ID not in kwargs and self.interface and hasattr(self.interface, "id"):
-            primary_device_id = PrimaryDeviceUtils("dcim.interface", str(self.interface.id)).primary_device.id  # type: ignore
+            primary_device_id = primary_device_cache.resolve("dcim.interface", str(self.interface.id))["primary_device"]
         else:
             primary_device_id = kwargs.get(PRIMARY_DEVICE_ID)
         try:
@@ -241,13 +313,16 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
             raise ValueError(f"{COMMANDS_J2} is required.")
         if self.call_object_type == "dcim.interface" and self.interface and hasattr(self.interface, "name"):
             self.intf_name = self.interface.name
+            # pylint: disable-next=import-outside-toplevel
+            from netutils.interface import abbreviated_interface_name, split_interface
+
             self.intf_name_only, self.intf_number = split_interface(self.intf_name)
             self.intf_abbrev = abbreviated_interface_name(self.interface.name)
         else:
             self.intf_name = self.intf_name_only = self.intf_number = self.intf_abbrev = None
         self.commands = self.parse_commands(kwargs.get(COMMANDS_J2))
 
-    def run(self, *args: Any, **kwargs: Any) -> list[dict[str, str]]:  # pylint: disable=too-many-locals
+    def run(self, *args: Any, **kwargs: Any) -> list[dict[str, str]]:
         """Main job logic: connect to device, execute commands, collect results.
 
         Initializes Nornir with the primary device, establishes a Netmiko connection,
@@ -265,6 +340,63 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
             ValueError: If the device is not found in the Nornir inventory.
             ValueError: If command execution fails with NornirExecutionError.
         """
+        with tracing.attach(self.trace_context):
+            with tracing.span("LivedataQueryJob.run", device=self.device_name, platform=self.metric_platform):
+                return self._run_commands()
+
+    def _run_commands(self) -> list[dict[str, str]]:
+        """Connect to the primary device and run the commands, see run()."""
+        # pylint: disable=import-outside-toplevel
+        from nornir import InitNornir
+
+        from nautobot_app_livedata.nornir_plays.processor import ProcessLivedata
+
+        register_nornir_inventory()
+        results = []
+        with tracing.span("LivedataQueryJob.inventory"):
+            nornir = InitNornir(
+                # runner={"plugin": "threadedrunner", "options": {"num_workers": 1}}
+                runner={"plugin": "serial"},  # Serial runner has no options num_workers
+                logging={"enabled": False},  # Disable logging because we are using our own logger
+                inventory=self._get_inventory(),
+            )
+        with nornir as nornir_obj:
+            nr_with_processors = nornir_obj.with_processors([ProcessLivedata(self.logger)])
+            try:
+                with (
+                    tracing.span("LivedataQueryJob.connect", device=self.primary_device.name),  # type: ignore
+                    metrics.observe_duration(metrics.connect_histogram, self.metric_platform, self.metric_queue),
+                ):
+                    host = nr_with_processors.filter(name=self.primary_device.name).inventory.hosts[  # type: ignore
+                        self.primary_device.name  # type: ignore
+                    ]
+                    connection = self._connect(host, nr_with_processors.config)
+            except KeyError as error:
+                raise ValueError(f"Device {self.primary_device.name} not found in Nornir inventory.") from error
+            with metrics.device_session(self.primary_device.name):  # type: ignore
+                try:
+                    for command in self.commands:
+                        results.append({"command": command, "task_result": self._run_command(connection, command)})
+                finally:
+                    if connection:
+                        connection.disconnect()
+        return_values = []
+        for res in results:
+            result = res["task_result"]
+            value = {
+                "command": res["command"],
+                "stdout": result,
+                "stderr": "",  # Adjust if needed based on actual result structure
+            }
+            return_values.append(value)
+            self.logger.debug("Livedata results for interface: \n```%s\n```", value)
+        self._store_last_result(return_values)
+        return return_values
+
+    def _get_inventory(self) -> dict[str, Any]:
+        """Return the Nornir inventory of the primary device, with the query context as default data."""
+        from nautobot_plugin_nornir.constants import NORNIR_SETTINGS  # pylint: disable=import-outside-toplevel
+
         callername = self.user.username  # type: ignore
         now = make_aware(datetime.now())
         qs = Device.objects.filter(id=self.primary_device.id).distinct()  # type: ignore
@@ -279,7 +411,7 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
             "call_object_type": self.call_object_type,
         }
 
-        inventory = {
+        return {
             "plugin": "nautobot-inventory",
             "options": {
                 "credentials_class": NORNIR_SETTINGS.get("credentials"),
@@ -289,54 +421,82 @@ class LivedataQueryJob(Job):  # pylint: disable=too-many-instance-attributes
             },
         }
 
-        results = []
-        with InitNornir(
-            # runner={"plugin": "threadedrunner", "options": {"num_workers": 1}}
-            runner={"plugin": "serial"},  # Serial runner has no options num_workers
-            logging={"enabled": False},  # Disable logging because we are using our own logger
-            inventory=inventory,
-        ) as nornir_obj:
-            nr_with_processors = nornir_obj.with_processors([ProcessLivedata(self.logger)])
-            try:
-                connection = (
-                    nr_with_processors.filter(name=self.primary_device.name)  # type: ignore
-                    .inventory.hosts[self.primary_device.name]  # type: ignore
-                    .get_connection("netmiko", nr_with_processors.config)
-                )
-            except KeyError as error:
-                raise ValueError(f"Device {self.primary_device.name} not found in Nornir inventory.") from error
-            try:
-                for command in self.commands:
-                    # Support for !! filter syntax (e.g., "show run !! include Gi")
-                    if "!!" in command:
-                        base_command, filter_part = command.split("!!", 1)
-                        filter_instruction = filter_part.strip("!")
-                        command_to_send = base_command.strip()
-                    else:
-                        command_to_send = command
-                        filter_instruction = None
-                    try:
-                        self.logger.debug(f"Executing '{command_to_send}' on device {self.device_name}")
-                        task_result = connection.send_command(command_to_send)
-                        if filter_instruction:
-                            task_result = apply_output_filter(task_result, filter_instruction)
-                        results.append({"command": command, "task_result": task_result})
-                    except NornirExecutionError as error:
-                        raise ValueError(f"`E3001:` {error}") from error
-            finally:
-                if connection:
-                    connection.disconnect()
-        return_values = []
-        for res in results:
-            result = res["task_result"]
-            value = {
-                "command": res["command"],
-                "stdout": result,
-                "stderr": "",  # Adjust if needed based on actual result structure
-            }
-            return_values.append(value)
-            self.logger.debug("Livedata results for interface: \n```%s\n```", value)
-        return return_values
+    def _run_command(self, connection: Any, command: str) -> Any:
+        """Send one command to the device and apply its output filter.
+
+        Raises:
+            ValueError: If command execution fails with NornirExecutionError.
+        """
+        # pylint: disable=import-outside-toplevel
+        from nornir.core.exceptions import NornirExecutionError
+
+        from nautobot_app_livedata.utilities.output_filter import apply_output_filter
+
+        # Support for !! filter syntax (e.g., "show run !! include Gi")
+        if "!!" in command:
+            base_command, filter_part = command.split("!!", 1)
+            filter_instruction = filter_part.strip("!")
+            command_to_send = base_command.strip()
+        else:
+            command_to_send = command
+            filter_instruction = None
+        try:
+            self.logger.debug(f"Executing '{command_to_send}' on device {self.device_name}")
+            with tracing.span("LivedataQueryJob.send_command", command=command_to_send) as command_span:
+                with metrics.observe_duration(metrics.command_histogram, self.metric_platform, self.metric_queue):
+                    task_result = self._send_command(connection, command_to_send)
+                command_span.set_attribute("output_length", len(task_result or ""))
+            metrics.observe_output_size(task_result, self.metric_platform, self.metric_queue)
+            if filter_instruction:
+                with tracing.span("LivedataQueryJob.filter", filter=filter_instruction):
+                    task_result = apply_output_filter(task_result, filter_instruction)
+        except NornirExecutionError as error:
+            raise ValueError(f"`E3001:` {error}") from error
+        return task_result
+
+    @staticmethod
+    def _get_remaining_time() -> Optional[float]:
+        """Return the seconds left of an inline run, see `utilities.syncjob`, None for a queued run.
+
+        Raises:
+            ValueError: If the deadline of the inline run has passed.
+        """
+        remaining = syncjob.get_remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise ValueError(
+                f"`E3003:` The inline run exceeded query_job_sync_timeout "
+                f"({PLUGIN_SETTINGS['query_job_sync_timeout']} seconds)."
+            )
+        return remaining
+
+    def _connect(self, host: Any, config: Any) -> Any:
+        """Open the netmiko connection, an inline run limits the connect timeout to the time left."""
+        remaining = self._get_remaining_time()
+        if remaining is not None:
+            extras = {**host.get_connection_parameters("netmiko").extras, "conn_timeout": remaining}
+            host.open_connection("netmiko", config, extras=extras)
+        return host.get_connection("netmiko", config)
+
+    def _send_command(self, connection: Any, command: str) -> Any:
+        """Send a command, an inline run limits the read timeout to the time left."""
+        remaining = self._get_remaining_time()
+        if remaining is None:
+            return connection.send_command(command)
+        return connection.send_command(command, read_timeout=remaining)
+
+    def _store_last_result(self, return_values: list[dict[str, str]]) -> None:
+        """Keep the output as the last result of the queried object for the Live Data tab.
+
+        The output is returned by the job either way, a failure is only logged.
+        """
+        queried = self.interface if self.call_object_type == "dcim.interface" else self.device
+        job_result = getattr(self, "job_result", None)
+        if queried is None or job_result is None:
+            return
+        try:
+            lastresult.store_last_result(self.call_object_type, queried.pk, job_result.pk, return_values)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            self.logger.warning("Could not store the last result: %s", error)
 
 
 class LivedataCleanupJobResultsJob(Job):
@@ -349,6 +509,7 @@ class LivedataCleanupJobResultsJob(Job):
         has_sensitive_variables = False
         hidden = False
         soft_time_limit = 60
+        task_queues = get_routed_queues((QUEUE_ROLE_MAINTENANCE,))
         enabled = True
 
     days_to_keep = IntegerVar(
@@ -362,16 +523,80 @@ class LivedataCleanupJobResultsJob(Job):
         default=False,
     )
 
-    def run(self, days_to_keep: int, dry_run: bool, *args: Any, **kwargs: Any) -> str:  # pylint: disable=arguments-differ
+    failure_days_to_keep = IntegerVar(
+        description="Number of days to keep failed job results, keep them if empty",
+        required=False,
+        min_value=1,
+    )
+
+    max_results = IntegerVar(
+        description="Maximum number of query job results to keep, the oldest are deleted first",
+        required=False,
+        min_value=1,
+    )
+
+    max_size_mb = IntegerVar(
+        description="Approximate maximum size of the stored query job results in MB, the oldest are deleted first",
+        required=False,
+        min_value=1,
+    )
+
+    batch_size = IntegerVar(
+        description="Number of job results deleted per transaction",
+        default=cleanup.BATCH_SIZE,
+        min_value=1,
+    )
+
+    batch_sleep_ms = IntegerVar(
+        description="Milliseconds to wait between two batches",
+        default=cleanup.BATCH_SLEEP_MS,
+        min_value=0,
+    )
+
+    archive = BooleanVar(
+        description="Archive the job results as compressed JSON lines before deleting them",
+        default=False,
+    )
+
+    def run(  # pylint: disable=arguments-differ,too-many-arguments,too-many-locals
+        self,
+        days_to_keep: int,
+        dry_run: bool,
+        *args: Any,
+        failure_days_to_keep: Optional[int] = None,
+        max_results: Optional[int] = None,
+        max_size_mb: Optional[int] = None,
+        batch_size: int = cleanup.BATCH_SIZE,
+        batch_sleep_ms: int = cleanup.BATCH_SLEEP_MS,
+        archive: bool = False,
+        **kwargs: Any,
+    ) -> str:
         """Delete or count job results older than days_to_keep.
 
         Removes job results for LivedataQueryJob and LivedataCleanupJobResultsJob that are
-        older than the specified number of days and have status SUCCESS.
+        older than the specified number of days and have status SUCCESS. Failed query job
+        results are removed after failure_days_to_keep. Finished query job results beyond
+        max_results or max_size_mb are removed as well, the oldest first.
+
+        The job results are deleted in batches ordered by primary key, each batch in
+        its own transaction. The progress is stored in a checkpoint after every batch.
+        If the run is stopped by the soft time limit, the next run with the same
+        days_to_keep resumes after the last deleted job result.
+
+        With archive, every batch is written to a gzip compressed JSON lines file
+        before it is deleted. The file is stored in `cleanup_archive_dir` if that is
+        configured, otherwise it is attached to the result of this job.
 
         Args:
             days_to_keep (int): Number of days to keep job results. Results older than this will be deleted.
             dry_run (bool): If True, only count results without deleting them.
             *args: Additional positional arguments (unused).
+            failure_days_to_keep (int): Number of days to keep failed job results, None keeps them.
+            max_results (int): Maximum number of finished query job results to keep, None for no limit.
+            max_size_mb (int): Approximate maximum size of the finished query job results in MB, None for no limit.
+            batch_size (int): Number of job results deleted per transaction.
+            batch_sleep_ms (int): Milliseconds to wait between two batches.
+            archive (bool): If True, archive the job results before deleting them.
             **kwargs: Additional keyword arguments (unused).
 
         Returns:
@@ -380,130 +605,155 @@ class LivedataCleanupJobResultsJob(Job):
         if not days_to_keep:
             days_to_keep = 30
         cutoff_date = timezone.now() - timezone.timedelta(days=days_to_keep)
-        job_results = JobResult.objects.filter(
-            date_done__lt=cutoff_date,
-            job_model__name=PLUGIN_SETTINGS["query_job_name"],
-            status=JOB_STATUS_SUCCESS,
+        checkpoint = None
+        if not dry_run:
+            checkpoint = cleanup.CleanupCheckpoint.load(days_to_keep, cutoff_date)
+            cutoff_date = checkpoint.cutoff
+        # Filter by the Job ids instead of joining the Job table by name, so the database
+        # can use the index on (job_model, status, date_done) of migration 0002.
+        query_job_ids = list(
+            JobModel.objects.filter(name=PLUGIN_SETTINGS["query_job_name"]).values_list("pk", flat=True)
         )
+        cleanup_job_ids = list(JobModel.objects.filter(name=JOB_NAME_CLEANUP).values_list("pk", flat=True))
+        job_results = JobResult.objects.filter(job_model_id__in=query_job_ids)
+        finished = [JOB_STATUS_SUCCESS, JOB_STATUS_FAILURE]
+        retention = Q(status=JOB_STATUS_SUCCESS, date_done__lt=cutoff_date)
+        if failure_days_to_keep:
+            failure_cutoff_date = timezone.now() - timezone.timedelta(days=failure_days_to_keep)
+            retention |= Q(status=JOB_STATUS_FAILURE, date_done__lt=failure_cutoff_date)
+        max_bytes = max_size_mb * 1024 * 1024 if max_size_mb else None
+        cap_filter = cleanup.get_cap_filter(job_results.filter(status__in=finished), max_results, max_bytes)
+        if cap_filter is not None:
+            retention |= Q(status__in=finished) & cap_filter
+        job_results = job_results.filter(retention)
+        reason = f"older than {days_to_keep} days"
+        if failure_days_to_keep or max_results or max_size_mb:
+            reason += " or beyond the retention limits"
         cleanup_job_results = JobResult.objects.filter(
             date_done__lt=cutoff_date,
-            job_model__name=JOB_NAME_CLEANUP,
+            job_model_id__in=cleanup_job_ids,
             status=JOB_STATUS_SUCCESS,
+            # Keep the cleanup job results that hold an archive file
+            files__isnull=True,
         )
 
         if dry_run:
-            job_results_feedback = (
-                f"{job_results.count()} job results older than {days_to_keep} days would be deleted. "
-                f"{cleanup_job_results.count()} cleanup job results would also be deleted."
+            reclaimed = cleanup.get_stored_size(job_results) + cleanup.get_stored_size(cleanup_job_results)
+            return (
+                f"{job_results.count()} job results {reason} would be deleted. "
+                f"{cleanup_job_results.count()} cleanup job results would also be deleted. "
+                f"About {filesizeformat(reclaimed)} would be reclaimed."
             )
-        else:
-            deleted_count, _ = job_results.delete()
-            cleaned_count, _ = cleanup_job_results.delete()
-            job_results_feedback = (
-                f"Deleted {deleted_count} job results older than {days_to_keep} days. "
-                f"Deleted {cleaned_count} cleanup job results."
+
+        job_result_archive = self._open_archive() if archive else None
+        try:
+            for kind, queryset in (("query", job_results), ("cleanup", cleanup_job_results)):
+                self._delete_in_batches(
+                    kind, queryset, checkpoint, batch_size or cleanup.BATCH_SIZE, batch_sleep_ms, job_result_archive
+                )
+        except SoftTimeLimitExceeded:
+            self.logger.warning(
+                "Stopped by the soft time limit after deleting %s job results and %s cleanup job results. "
+                "Run the job again with the same 'Days to keep' to resume.",
+                checkpoint.deleted("query"),
+                checkpoint.deleted("cleanup"),
             )
+            feedback = "Stopped by the soft time limit. "
+        else:
+            checkpoint.clear()
+            feedback = ""
+        finally:
+            if job_result_archive is not None:
+                self._close_archive(job_result_archive)
+        feedback += (
+            f"Deleted {checkpoint.deleted('query')} job results {reason}. "
+            f"Deleted {checkpoint.deleted('cleanup')} cleanup job results."
+        )
+        if job_result_archive is not None:
+            feedback += f" Archived {job_result_archive.count} job results to {job_result_archive.name}."
+        return feedback
 
-        return job_results_feedback
+    def _delete_in_batches(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        kind: str,
+        queryset: Any,
+        checkpoint: cleanup.CleanupCheckpoint,
+        batch_size: int,
+        batch_sleep_ms: int,
+        job_result_archive: Optional[cleanup.JobResultArchive] = None,
+    ) -> None:
+        """Delete the job results of a queryset in batches and record the progress in the checkpoint."""
+        before_delete = job_result_archive.write_batch if job_result_archive is not None else None
+        for last_pk, deleted in cleanup.iter_delete_batches(
+            queryset, batch_size, checkpoint.last_pk(kind), before_delete=before_delete
+        ):
+            checkpoint.update(kind, last_pk, deleted)
+            self.logger.info("Deleted %s %s job results so far", checkpoint.deleted(kind), kind)
+            if batch_sleep_ms:
+                time.sleep(batch_sleep_ms / 1000)
+
+    def _open_archive(self) -> cleanup.JobResultArchive:
+        """Create the archive in `cleanup_archive_dir`, or in a temporary file that is attached to the job result."""
+        filename = f"livedata-jobresults-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz"
+        archive_dir = PLUGIN_SETTINGS.get("cleanup_archive_dir")
+        if archive_dir:
+            job_result_archive = cleanup.JobResultArchive(os.path.join(archive_dir, filename))
+        else:
+            fd, path = tempfile.mkstemp(suffix=".jsonl.gz")
+            os.close(fd)
+            job_result_archive = cleanup.JobResultArchive(path, name=filename)
+        self.logger.info("Archiving the job results to %s", job_result_archive.name)
+        return job_result_archive
+
+    def _close_archive(self, job_result_archive: cleanup.JobResultArchive) -> None:
+        """Attach a temporary archive file to the job result and remove it."""
+        if PLUGIN_SETTINGS.get("cleanup_archive_dir"):
+            return
+        try:
+            if job_result_archive.count:
+                with open(job_result_archive.path, "rb") as archive_file:
+                    FileProxy.objects.create(
+                        name=job_result_archive.name,
+                        job_result=self.job_result,
+                        file=File(archive_file, name=job_result_archive.name),
+                    )
+        finally:
+            os.remove(job_result_archive.path)
 
 
-class EnforceDefaultJobQueueJob(Job):
-    """Job to force every Nautobot job onto the default Celery queue."""
+class LivedataRebuildPrimaryDeviceMapJob(Job):
+    """Job to rebuild the materialized primary device map."""
 
     class Meta:  # pylint: disable=too-few-public-methods
-        name = "Align jobs to default queue"
-        description = "Ensure every job uses the default Celery queue for execution."
+        name = "Livedata Rebuild primary device map"
+        description = "Resolve the primary device of every device, interface and virtual chassis and store it."
         has_sensitive_variables = False
         hidden = False
+        task_queues = get_routed_queues((QUEUE_ROLE_MAINTENANCE,))
         enabled = True
 
-    dry_run = DryRunVar(
-        description="If enabled, report the actions without modifying any objects.",
-        default=True,
-    )
-
-    job_queue = ObjectVar(
-        model=JobQueue,
-        required=False,
-        description="JobQueue to treat as the default. Leave blank to use or create the 'default' Celery queue.",
+    batch_size = IntegerVar(
+        description="Number of objects resolved and written per batch",
+        default=primarydevicemap.BATCH_SIZE,
+        min_value=1,
     )
 
-    def run(
-        self,
-        *args: Any,
-        dry_run: bool = True,
-        job_queue: JobQueue | None = None,
-        **kwargs: Any,
-    ) -> str:  # pylint: disable=arguments-differ
-        """Align all jobs with the default queue.
+    def run(self, *args: Any, batch_size: int = primarydevicemap.BATCH_SIZE, **kwargs: Any) -> str:  # pylint: disable=arguments-differ
+        """Rebuild the primary device map.
 
         Args:
-            dry_run: When True emit a report without saving any changes.
-            job_queue: Optional queue instance to enforce; defaults to the system "default" queue.
+            batch_size (int): Number of objects resolved and written per batch.
 
         Returns:
-            str: Summary indicating how many jobs required updates.
+            str: Summary of the written and removed entries.
         """
-
-        default_queue = self._ensure_default_queue(job_queue)
-        total_jobs = JobModel.objects.count()
-        updated_jobs = 0
-        for job_model in JobModel.objects.iterator():
-            if self._align_job(job_model, default_queue, dry_run):
-                updated_jobs += 1
-
-        action = "would update" if dry_run else "updated"
-        summary = f"{action.capitalize()} {updated_jobs} of {total_jobs} jobs to use queue '{default_queue.name}'."
+        if not primarydevicemap.is_enabled():
+            self.logger.warning("The primary device map is not enabled, set 'primary_device_map_enabled' to use it.")
+        counts = primarydevicemap.rebuild(batch_size=batch_size or primarydevicemap.BATCH_SIZE)
+        primary_device_cache.invalidate()
+        summary = (
+            f"Wrote {counts['dcim.device']} device, {counts['dcim.interface']} interface and "
+            f"{counts['dcim.virtualchassis']} virtual chassis entries. Removed {counts['removed']} stale entries."
+        )
         self.logger.info(summary)
         return summary
-
-    def _ensure_default_queue(self, queue: JobQueue | None) -> JobQueue:
-        """Create or normalize the default job queue."""
-
-        if queue is None:
-            queue, created = JobQueue.objects.get_or_create(
-                name="default",
-                defaults={
-                    "queue_type": JobQueueTypeChoices.TYPE_CELERY,
-                    "description": "Default Celery queue automatically managed by Live Data.",
-                },
-            )
-            if created:
-                self.logger.info("Created default JobQueue '%s'.", queue.name)
-        if queue.queue_type != JobQueueTypeChoices.TYPE_CELERY:
-            self.logger.warning(
-                "Updating JobQueue '%s' queue_type from %s to Celery.",
-                queue.name,
-                queue.queue_type,
-            )
-            queue.queue_type = JobQueueTypeChoices.TYPE_CELERY
-            queue.save()
-        return queue
-
-    def _align_job(self, job_model: JobModel, default_queue: JobQueue, dry_run: bool) -> bool:
-        """Align a job's default and allowed queues with the supplied queue."""
-
-        changed = False
-        if job_model.default_job_queue_id != default_queue.pk:
-            changed = True
-            self.logger.debug(
-                "Job '%s' default queue %s differs from '%s'.", job_model, job_model.default_job_queue, default_queue
-            )
-            if not dry_run:
-                job_model.default_job_queue = default_queue
-                job_model.default_job_queue_override = True
-
-        assigned_queue_ids = set(job_model.job_queues.values_list("pk", flat=True))
-        if assigned_queue_ids != {default_queue.pk}:
-            changed = True
-            self.logger.debug(
-                "Job '%s' assigned queues %s differ from default '%s'.", job_model, assigned_queue_ids, default_queue
-            )
-            if not dry_run:
-                job_model.job_queues.clear()
-                job_model.job_queues.add(default_queue)
-                job_model.job_queues_override = True
-
-        if changed and not dry_run:
-            job_model.save()
-        return changed
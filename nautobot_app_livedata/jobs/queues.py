@@ -0,0 +1,351 @@
+"""Jobs that assign the Nautobot jobs to job queues."""
+
+from collections import defaultdict
+from typing import Any, Iterable, Optional
+
+from django.db import transaction
+from django.utils import timezone
+from nautobot.apps.jobs import DryRunVar, IntegerVar, Job, MultiObjectVar, ObjectVar
+from nautobot.extras.choices import JobQueueTypeChoices
+from nautobot.extras.models import Job as JobModel, JobQueue, JobQueueAssignment
+from nautobot.extras.utils import get_celery_queues
+
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities import queuebalancer
+from nautobot_app_livedata.utilities.jobcache import livedata_job_cache
+from nautobot_app_livedata.utilities.queuerouting import get_routed_queues, QUEUE_ROLE_MAINTENANCE
+
+
+class EnforceDefaultJobQueueJob(Job):
+    """Job to force every Nautobot job onto the default Celery queue."""
+
+    class Meta:  # pylint: disable=too-few-public-methods
+        name = "Align jobs to default queue"
+        description = "Ensure every job uses the default Celery queue for execution."
+        has_sensitive_variables = False
+        hidden = False
+        task_queues = get_routed_queues((QUEUE_ROLE_MAINTENANCE,))
+        enabled = True
+
+    dry_run = DryRunVar(
+        description="If enabled, report the actions without modifying any objects.",
+        default=True,
+    )
+
+    job_queue = ObjectVar(
+        model=JobQueue,
+        required=False,
+        description="JobQueue to treat as the default. Leave blank to use or create the 'default' Celery queue.",
+    )
+
+    def run(
+        self,
+        *args: Any,
+        dry_run: bool = True,
+        job_queue: JobQueue | None = None,
+        **kwargs: Any,
+    ) -> str:  # pylint: disable=arguments-differ
+        """Align all jobs with the default queue.
+
+        Args:
+            dry_run: When True emit a report without saving any changes.
+            job_queue: Optional queue instance to enforce; defaults to the system "default" queue.
+
+        Returns:
+            str: Summary indicating how many jobs required updates.
+        """
+
+        default_queue = self._ensure_default_queue(job_queue)
+        job_models = list(
+            JobModel.objects.only("name", "default_job_queue", "default_job_queue_override", "job_queues_override")
+        )
+        assigned_queue_ids = self._get_assigned_queue_ids()
+
+        changed_jobs = []
+        queue_changed_job_ids = []
+        for job_model in job_models:
+            default_changed, queues_changed = self._align_job(
+                job_model, default_queue, assigned_queue_ids[job_model.pk], dry_run
+            )
+            if default_changed or queues_changed:
+                changed_jobs.append(job_model)
+            if queues_changed:
+                queue_changed_job_ids.append(job_model.pk)
+
+        if changed_jobs and not dry_run:
+            self._apply_changes(changed_jobs, queue_changed_job_ids, default_queue, assigned_queue_ids)
+
+        action = "would update" if dry_run else "updated"
+        summary = (
+            f"{action.capitalize()} {len(changed_jobs)} of {len(job_models)} jobs to use queue '{default_queue.name}'."
+        )
+        self.logger.info(summary)
+        return summary
+
+    @staticmethod
+    def _get_assigned_queue_ids() -> defaultdict[Any, set]:
+        """Return the assigned queues of all jobs, loaded in one query instead of one query per job."""
+
+        assigned_queue_ids = defaultdict(set)
+        for job_id, queue_id in JobQueueAssignment.objects.values_list("job_id", "job_queue_id"):
+            assigned_queue_ids[job_id].add(queue_id)
+        return assigned_queue_ids
+
+    def _ensure_default_queue(self, queue: JobQueue | None) -> JobQueue:
+        """Create or normalize the default job queue."""
+
+        if queue is None:
+            queue, created = JobQueue.objects.get_or_create(
+                name="default",
+                defaults={
+                    "queue_type": JobQueueTypeChoices.TYPE_CELERY,
+                    "description": "Default Celery queue automatically managed by Live Data.",
+                },
+            )
+            if created:
+                self.logger.info("Created default JobQueue '%s'.", queue.name)
+        if queue.queue_type != JobQueueTypeChoices.TYPE_CELERY:
+            self.logger.warning(
+                "Updating JobQueue '%s' queue_type from %s to Celery.",
+                queue.name,
+                queue.queue_type,
+            )
+            queue.queue_type = JobQueueTypeChoices.TYPE_CELERY
+            queue.save()
+        return queue
+
+    def _align_job(
+        self, job_model: JobModel, default_queue: JobQueue, assigned_queue_ids: set, dry_run: bool
+    ) -> tuple[bool, bool]:
+        """Compare a job's default and allowed queues with the supplied queue.
+
+        The changes are only applied to the in-memory job_model, see `_apply_changes()`.
+
+        Returns:
+            tuple[bool, bool]: Whether the default queue and whether the assigned queues differ.
+        """
+
+        default_changed = job_model.default_job_queue_id != default_queue.pk
+        if default_changed:
+            self.logger.debug(
+                "Job '%s' default queue %s differs from '%s'.",
+                job_model,
+                job_model.default_job_queue_id,
+                default_queue,
+            )
+            if not dry_run:
+                job_model.default_job_queue = default_queue
+                job_model.default_job_queue_override = True
+
+        queues_changed = assigned_queue_ids != {default_queue.pk}
+        if queues_changed:
+            self.logger.debug(
+                "Job '%s' assigned queues %s differ from default '%s'.", job_model, assigned_queue_ids, default_queue
+            )
+            if not dry_run:
+                job_model.job_queues_override = True
+
+        return default_changed, queues_changed
+
+    @staticmethod
+    def _apply_changes(
+        changed_jobs: list[JobModel],
+        queue_changed_job_ids: list[Any],
+        default_queue: JobQueue,
+        assigned_queue_ids: dict[Any, set],
+    ) -> None:
+        """Save the changed jobs and their queue assignments with a constant number of queries.
+
+        Bulk operations do not send the post_save and m2m_changed signals, so the
+        Livedata job cache is invalidated explicitly.
+        """
+        now = timezone.now()
+        for job_model in changed_jobs:
+            job_model.last_updated = now
+        with transaction.atomic():
+            JobModel.objects.bulk_update(
+                changed_jobs,
+                ["default_job_queue", "default_job_queue_override", "job_queues_override", "last_updated"],
+            )
+            JobQueueAssignment.objects.filter(job_id__in=queue_changed_job_ids).exclude(
+                job_queue=default_queue
+            ).delete()
+            JobQueueAssignment.objects.bulk_create(
+                [
+                    JobQueueAssignment(job_id=job_id, job_queue=default_queue)
+                    for job_id in queue_changed_job_ids
+                    if default_queue.pk not in assigned_queue_ids[job_id]
+                ]
+            )
+        livedata_job_cache.invalidate()
+
+
+class LivedataBalanceJobQueuesJob(Job):
+    """Job to assign jobs to job queues based on their runtime history."""
+
+    class Meta:  # pylint: disable=too-few-public-methods
+        name = "Balance jobs across queues"
+        description = "Keep long-running jobs off the interactive queue and balance the load of the other job queues."
+        has_sensitive_variables = False
+        hidden = False
+        task_queues = get_routed_queues((QUEUE_ROLE_MAINTENANCE,))
+        enabled = True
+
+    dry_run = DryRunVar(
+        description="If enabled, report the proposed queues and the projected wait times without modifying any jobs.",
+        default=True,
+    )
+
+    interactive_queue = ObjectVar(
+        model=JobQueue,
+        description="JobQueue for short jobs and the Livedata query job.",
+    )
+
+    job_queues = MultiObjectVar(
+        model=JobQueue,
+        required=False,
+        description="JobQueues the long-running jobs are balanced over.",
+    )
+
+    history_days = IntegerVar(
+        description="Number of days of job results used to measure the runtime of the jobs",
+        default=queuebalancer.HISTORY_DAYS,
+        min_value=1,
+    )
+
+    long_running_seconds = IntegerVar(
+        description="Jobs with a longer mean runtime are kept off the interactive queue",
+        default=queuebalancer.LONG_RUNNING_SECONDS,
+        min_value=1,
+    )
+
+    def run(  # pylint: disable=arguments-differ,too-many-arguments,too-many-locals
+        self,
+        *args: Any,
+        interactive_queue: JobQueue,
+        job_queues: Optional[list[JobQueue]] = None,
+        dry_run: bool = True,
+        history_days: int = queuebalancer.HISTORY_DAYS,
+        long_running_seconds: int = queuebalancer.LONG_RUNNING_SECONDS,
+        **kwargs: Any,
+    ) -> str:
+        """Propose or apply a default job queue for every job with a runtime history.
+
+        Args:
+            interactive_queue: The queue for short jobs and the Livedata query job.
+            job_queues: The queues the long-running jobs are balanced over.
+            dry_run: When True emit a report without saving any changes.
+            history_days: Number of days of job results used to measure the runtimes.
+            long_running_seconds: Jobs with a longer mean runtime are kept off the interactive queue.
+
+        Returns:
+            str: Summary of the moved jobs and the projected wait time per queue.
+        """
+        now = timezone.now()
+        since = now - timezone.timedelta(days=history_days or queuebalancer.HISTORY_DAYS)
+        window_seconds = (now - since).total_seconds()
+        queue_ids = [interactive_queue.pk] + [
+            queue.pk for queue in job_queues or [] if queue.pk != interactive_queue.pk
+        ]
+
+        job_models = {
+            job.pk: job
+            for job in JobModel.objects.only(
+                "name", "default_job_queue", "default_job_queue_override", "job_queues_override"
+            )
+        }
+        loads = queuebalancer.get_job_loads(since)
+        interactive_job_ids = [
+            job_id for job_id, job in job_models.items() if job.name == PLUGIN_SETTINGS["query_job_name"]
+        ]
+        assignment = queuebalancer.propose_assignment(
+            job_models,
+            loads,
+            queue_ids,
+            interactive_queue.pk,
+            interactive_job_ids,
+            long_running_seconds or queuebalancer.LONG_RUNNING_SECONDS,
+        )
+        current = {job_id: job_models[job_id].default_job_queue_id for job_id in assignment}
+        moved_jobs = [job_models[job_id] for job_id, queue_id in assignment.items() if current[job_id] != queue_id]
+
+        queues = JobQueue.objects.in_bulk(set(queue_ids) | set(current.values()) - {None})
+        workers = self._get_workers(queues.values())
+        for job_model in moved_jobs:
+            load = loads[job_model.pk]
+            self.logger.info(
+                "Job '%s': %s -> %s (%s runs, mean runtime %.1fs)",
+                job_model,
+                queues.get(job_model.default_job_queue_id, "no queue"),
+                queues[assignment[job_model.pk]],
+                load.runs,
+                load.mean_seconds,
+            )
+
+        if moved_jobs and not dry_run:
+            self._apply_assignment(moved_jobs, assignment)
+
+        before = queuebalancer.project_queues(current, loads, window_seconds, workers)
+        after = queuebalancer.project_queues(assignment, loads, window_seconds, workers)
+        report = []
+        for queue_id in sorted(set(before) | set(after), key=lambda queue_id: str(queues.get(queue_id, ""))):
+            old = before.get(queue_id) or {"jobs": 0, "utilization": 0.0, "wait_seconds": 0.0}
+            new = after.get(queue_id) or {"jobs": 0, "utilization": 0.0, "wait_seconds": 0.0}
+            report.append(
+                f"{queues.get(queue_id, queue_id)}: {old['jobs']} -> {new['jobs']} jobs, "
+                f"utilization {old['utilization']:.0%} -> {new['utilization']:.0%}, "
+                f"wait {self._format_wait(old['wait_seconds'])} -> {self._format_wait(new['wait_seconds'])}"
+            )
+            self.logger.info("Projected queue %s", report[-1])
+
+        action = "Would move" if dry_run else "Moved"
+        return (
+            f"{action} {len(moved_jobs)} of {len(assignment)} jobs with a runtime history in the last "
+            f"{history_days or queuebalancer.HISTORY_DAYS} days. " + " ".join(f"[{line}]" for line in report)
+        )
+
+    def _get_workers(self, queues: Iterable[JobQueue]) -> dict[Any, int]:
+        """Return the number of Celery workers per job queue primary key, 1 if it can not be determined."""
+        try:
+            celery_queues = get_celery_queues()
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            self.logger.warning("Could not get the Celery workers, assuming one worker per queue: %s", error)
+            celery_queues = {}
+        workers = {}
+        for queue in queues:
+            workers[queue.pk] = celery_queues.get(queue.name) or 1
+            if not celery_queues.get(queue.name):
+                self.logger.warning("No Celery worker found for queue '%s', assuming one worker.", queue.name)
+        return workers
+
+    @staticmethod
+    def _format_wait(wait_seconds: Optional[float]) -> str:
+        """Format a projected wait time."""
+        return "saturated" if wait_seconds is None else f"{wait_seconds:.1f}s"
+
+    @staticmethod
+    def _apply_assignment(moved_jobs: list[JobModel], assignment: dict[Any, Any]) -> None:
+        """Set the proposed default queues and allow the jobs to run on them, keeping their other queues.
+
+        Bulk operations do not send the post_save and m2m_changed signals, so the
+        Livedata job cache is invalidated explicitly.
+        """
+        now = timezone.now()
+        for job_model in moved_jobs:
+            job_model.default_job_queue_id = assignment[job_model.pk]
+            job_model.default_job_queue_override = True
+            job_model.job_queues_override = True
+            job_model.last_updated = now
+        with transaction.atomic():
+            JobModel.objects.bulk_update(
+                moved_jobs,
+                ["default_job_queue", "default_job_queue_override", "job_queues_override", "last_updated"],
+            )
+            JobQueueAssignment.objects.bulk_create(
+                [
+                    JobQueueAssignment(job_id=job_model.pk, job_queue_id=assignment[job_model.pk])
+                    for job_model in moved_jobs
+                ],
+                ignore_conflicts=True,
+            )
+        livedata_job_cache.invalidate()
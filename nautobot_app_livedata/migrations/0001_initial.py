@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:51
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="PrimaryDeviceMap",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True
+                    ),
+                ),
+                ("object_type", models.CharField(max_length=32)),
+                ("object_id", models.UUIDField()),
+                ("device_id", models.UUIDField(blank=True, null=True)),
+                ("interface_id", models.UUIDField(blank=True, null=True)),
+                ("virtual_chassis_id", models.UUIDField(blank=True, null=True)),
+                ("primary_device_id", models.UUIDField(blank=True, db_index=True, null=True)),
+                ("primary_ip_id", models.UUIDField(blank=True, db_index=True, null=True)),
+                ("primary_ip", models.CharField(blank=True, max_length=64)),
+                ("status", models.CharField(blank=True, max_length=100)),
+                ("error", models.CharField(blank=True, max_length=255)),
+                ("last_updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "primary device map entry",
+                "verbose_name_plural": "primary device map entries",
+                "unique_together": {("object_type", "object_id")},
+            },
+        ),
+    ]
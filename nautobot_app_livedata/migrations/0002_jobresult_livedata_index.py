@@ -0,0 +1,67 @@
+"""Add an index for the Livedata lookups on the JobResult table of Nautobot."""
+
+from django.db import migrations
+
+INDEX_NAME = "livedata_jr_job_stat_done_idx"
+INDEX_COLUMNS = "job_model_id, status, date_done"
+
+
+def get_create_index_sql(vendor, table, concurrently=False):
+    """Return the SQL that creates the index for the given database vendor.
+
+    On PostgreSQL the index is partial, job results that are not finished are
+    never looked up by date_done. MySQL does not support partial indexes.
+    """
+    if vendor == "postgresql":
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {INDEX_NAME} "
+            f"ON {table} ({INDEX_COLUMNS}) WHERE date_done IS NOT NULL"
+        )
+    return f"CREATE INDEX {INDEX_NAME} ON {table} ({INDEX_COLUMNS})"
+
+
+def get_drop_index_sql(vendor, table, concurrently=False):
+    """Return the SQL that drops the index for the given database vendor."""
+    if vendor == "postgresql":
+        return f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {INDEX_NAME}"
+    return f"DROP INDEX {INDEX_NAME} ON {table}"
+
+
+def _index_exists(schema_editor, table):
+    """Return True if the index exists on the table."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        return INDEX_NAME in connection.introspection.get_constraints(cursor, table)
+
+
+def add_index(apps, schema_editor):
+    """Create the index on the JobResult table."""
+    table = apps.get_model("extras", "JobResult")._meta.db_table
+    if _index_exists(schema_editor, table):
+        return
+    vendor = schema_editor.connection.vendor
+    schema_editor.execute(get_create_index_sql(vendor, table, concurrently=vendor == "postgresql"))
+
+
+def remove_index(apps, schema_editor):
+    """Drop the index from the JobResult table."""
+    table = apps.get_model("extras", "JobResult")._meta.db_table
+    if not _index_exists(schema_editor, table):
+        return
+    vendor = schema_editor.connection.vendor
+    schema_editor.execute(get_drop_index_sql(vendor, table, concurrently=vendor == "postgresql"))
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can not run in a transaction. It does not block
+    # the workers that write job results while the index is built on a large table.
+    atomic = False
+
+    dependencies = [
+        ("extras", "0068_jobresult__add_celery_fields"),
+        ("nautobot_app_livedata", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index, elidable=False),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:34
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nautobot_app_livedata", "0002_jobresult_livedata_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProvisioningState",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("fingerprint", models.CharField(max_length=64)),
+                ("last_updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "provisioning state",
+            },
+        ),
+    ]
@@ -0,0 +1,92 @@
+"""Models for the nautobot_app_livedata app."""
+
+# filepath: nautobot_app_livedata/models.py
+
+from typing import Any
+
+from django.db import models
+from nautobot.apps.models import BaseModel
+
+OBJECT_TYPE_CHOICES = (
+    ("dcim.device", "Device"),
+    ("dcim.interface", "Interface"),
+    ("dcim.virtualchassis", "Virtual Chassis"),
+)
+
+
+class PrimaryDeviceMap(BaseModel):
+    """Materialized result of the primary device resolution of one object.
+
+    The table is only used when `primary_device_map_enabled` is set. It is kept
+    up to date by signals and rebuilt by the 'Livedata Rebuild primary device map'
+    job. The ids are stored without foreign keys, so rebuilding the table does not
+    lock the inventory tables.
+    """
+
+    is_metadata_associable_model = False
+
+    object_type = models.CharField(max_length=32, choices=OBJECT_TYPE_CHOICES)
+    object_id = models.UUIDField()
+    device_id = models.UUIDField(null=True, blank=True)
+    interface_id = models.UUIDField(null=True, blank=True)
+    virtual_chassis_id = models.UUIDField(null=True, blank=True)
+    primary_device_id = models.UUIDField(null=True, blank=True, db_index=True)
+    primary_ip_id = models.UUIDField(null=True, blank=True, db_index=True)
+    primary_ip = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=100, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta class for PrimaryDeviceMap."""
+
+        unique_together = [["object_type", "object_id"]]
+        verbose_name = "primary device map entry"
+        verbose_name_plural = "primary device map entries"
+
+    def __str__(self) -> str:
+        """Return the object and its primary device."""
+        return f"{self.object_type} {self.object_id} -> {self.primary_device_id or self.error}"
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the entry in the format of PrimaryDeviceUtils.to_dict().
+
+        Returns:
+            dict: object_type, pk, device, interface, virtual_chassis and primary_device.
+
+        Raises:
+            ValueError: If the primary device could not be resolved for the object.
+        """
+        if self.error:
+            raise ValueError(self.error)
+        return {
+            "object_type": self.object_type,
+            "pk": self.object_id,
+            "device": self.device_id,
+            "interface": self.interface_id,
+            "virtual_chassis": self.virtual_chassis_id,
+            "primary_device": self.primary_device_id,
+        }
+
+
+class ProvisioningState(BaseModel):
+    """Fingerprint of the objects the app provisioned in the database.
+
+    The database ready callback stores the fingerprint of the permissions, custom
+    fields and jobs it provisioned, and skips the provisioning while it matches.
+    """
+
+    is_metadata_associable_model = False
+
+    name = models.CharField(max_length=100, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta class for ProvisioningState."""
+
+        verbose_name = "provisioning state"
+
+    def __str__(self) -> str:
+        """Return the name and the fingerprint."""
+        return f"{self.name}: {self.fingerprint}"
@@ -2,14 +2,30 @@
 
 # filepath: nautobot_app_livedata/signals.py
 
+from functools import partial
+import hashlib
+from importlib import metadata
+import json
+import logging
+
 from django.apps import apps as global_apps
 from django.conf import settings
-from django.db.models.signals import post_migrate
+from django.db import DatabaseError, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from nautobot.apps.choices import CustomFieldTypeChoices
 
+from .utilities import primarydevicemap
+from .utilities.contenttype import clear_memo
 from .utilities.customfield import create_custom_field
-from .utilities.permission import create_permission
+from .utilities.jobcache import livedata_job_cache
+from .utilities.permission import create_permission, query_permission_cache
+from .utilities.primarydevicecache import primary_device_cache
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+APP_NAME = "nautobot_app_livedata"
+PROVISIONING_STATE_NAME = "database_ready"
 
 
 def get_plugin_settings():
@@ -31,16 +47,20 @@ class AppDbReadyState:  # pylint: disable=too-few-public-methods
         self.already_initialized = False
 
     @property
-    def is_ready(self):
-        """Check if the app is ready."""
+    def is_migrated(self):
+        """Check if the apps the provisioning depends on are migrated and the provisioning did not run yet."""
         return (
             not self.already_initialized
             and self.is_dcim_ready
             and self.is_nautobot_app_livedata_ready
             and self.is_extras_ready
-            and self.try_init_objects()
         )
 
+    @property
+    def is_ready(self):
+        """Check if the app is ready."""
+        return self.is_migrated and self.try_init_objects()
+
     def try_init_objects(self):
         """Try to initialize the database objects."""
         if not global_apps:
@@ -88,70 +108,39 @@ class AppDbReadyState:  # pylint: disable=too-few-public-methods
 app_db_ready_state = AppDbReadyState()
 
 
-@receiver(post_migrate)
-def nautobot_database_ready_callback(sender, **kwargs):  # pylint: disable=unused-argument
-    """
-    Callback function triggered by the nautobot_database_ready signal and the post_migrate signal.
-
-    There is a problem, that not all the models are ready when the nautobot_database_ready signal is triggered.
-    So, we need to wait for the post_migrate signal to be triggered for the 'dcim' app.
-
-    An App could use this callback to add any records to the database that it requires for proper operation,
-    such as:
-
-    - Relationship definitions
-    - CustomField definitions
-    - Webhook definitions
-    - etc.
-
-    Args:
-        sender (NautobotAppConfig): The ExampleAppConfig instance that was registered for this callback
-    """
-    if not global_apps:
-        return
-    if "dcim" in repr(sender):
-        app_db_ready_state.is_dcim_ready = True
-    if "extras" in repr(sender):
-        app_db_ready_state.is_extras_ready = True
-    if "nautobot_app_livedata" in repr(sender):
-        app_db_ready_state.is_nautobot_app_livedata_ready = True
-    if not app_db_ready_state.is_ready:
-        return
-    app_db_ready_state.already_initialized = True
+# Permissions the app creates, the content type is looked up by model name
+PERMISSIONS = [
     # To make NAPALM requests via the Nautobot REST API, a Nautobot user
     # must have assigned a permission granting the 'napalm_read' action for
     # the device object type.
-    create_permission(
-        db_objects=app_db_ready_state.db_objects,  # type: ignore
-        name="napalm_read",
-        actions_list=["napalm_read"],
-        description="Permission to make NAPALM requests via the Nautobot REST API.",
-        content_type=app_db_ready_state.content_typs["Device"],  # type: ignore
-    )
-
+    {
+        "name": "napalm_read",
+        "actions_list": ["napalm_read"],
+        "description": "Permission to make NAPALM requests via the Nautobot REST API.",
+        "content_type": "Device",
+    },
     # To allow the user to interact with the devices, like query the interfaces,
     # a Nautobot user must have assigned a permission granting the 'can_interact'
     # action for the device object type.
-    create_permission(
-        db_objects=app_db_ready_state.db_objects,  # type: ignore
-        name="livedata.interact_with_devices",
-        actions_list=["can_interact"],
-        description="Interact with devices without permission to change device configurations.",
-        content_type=app_db_ready_state.content_typs["Device"],  # type: ignore
-    )
-
+    {
+        "name": "livedata.interact_with_devices",
+        "actions_list": ["can_interact"],
+        "description": "Interact with devices without permission to change device configurations.",
+        "content_type": "Device",
+    },
     # Create permission to run jobs
-    create_permission(
-        db_objects=app_db_ready_state.db_objects,  # type: ignore
-        name="extras.run_job",
-        actions_list=["run"],
-        description="Run jobs",
-        content_type=app_db_ready_state.content_typs["Job"],  # type: ignore
-    )
-
-    # Add the custom field to the Platform model, which is used to store the
-    # Commands to display on the Interface page.
-    field_data = {
+    {
+        "name": "extras.run_job",
+        "actions_list": ["run"],
+        "description": "Run jobs",
+        "content_type": "Job",
+    },
+]
+
+# Custom fields on the Platform model, which are used to store the
+# Commands to display on the Interface and Device pages.
+CUSTOM_FIELDS = [
+    {
         "key": "livedata_interface_commands",
         "type": CustomFieldTypeChoices.TYPE_MARKDOWN,
         "label": "Livedata Interface Commands",
@@ -166,17 +155,8 @@ def nautobot_database_ready_callback(sender, **kwargs):  # pylint: disable=unuse
         "filter_logic": "loose",
         "weight": 100,
         "advanced_ui": False,
-    }
-    cto = [app_db_ready_state.content_typs["Platform"]]  # type: ignore
-    try:
-        create_custom_field(db_objects=app_db_ready_state.db_objects, content_type_objects=cto, **field_data)
-    except Exception as e:  # pylint: disable=broad-except
-        print(f"ERROR: Database-Ready awaiting - {e}")
-        return
-
-    # Add the custom field to the Platform model, which is used to store the
-    # Commands to display on the Interface page.
-    field_data = {
+    },
+    {
         "key": "livedata_device_commands",
         "type": CustomFieldTypeChoices.TYPE_MARKDOWN,
         "label": "Livedata Device Commands",
@@ -190,25 +170,120 @@ def nautobot_database_ready_callback(sender, **kwargs):  # pylint: disable=unuse
         "filter_logic": "loose",
         "weight": 110,
         "advanced_ui": False,
+    },
+]
+
+
+def get_enabled_job_names():
+    """Return the names of the jobs the app enables."""
+    return [get_plugin_settings()["query_job_name"], "Livedata Cleanup job results"]
+
+
+def get_provisioning_fingerprint():
+    """Return the fingerprint of the objects the app provisions.
+
+    The fingerprint changes with the app version and with the definitions of
+    the permissions, custom fields and enabled jobs.
+
+    Returns:
+        str: The SHA-256 hex digest.
+    """
+    definitions = {
+        "version": metadata.version(APP_NAME),
+        "permissions": PERMISSIONS,
+        "custom_fields": CUSTOM_FIELDS,
+        "jobs": get_enabled_job_names(),
     }
-    cto = [app_db_ready_state.content_typs["Platform"]]  # type: ignore
+    return hashlib.sha256(json.dumps(definitions, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _is_provisioned(fingerprint):
+    """Return True if the objects of the given fingerprint were provisioned, with a single query."""
+    ProvisioningState = global_apps.get_model(APP_NAME, "ProvisioningState")  # pylint: disable=invalid-name
     try:
-        create_custom_field(db_objects=app_db_ready_state.db_objects, content_type_objects=cto, **field_data)
-    except Exception as e:  # pylint: disable=broad-except
-        print(f"ERROR: Database-Ready awaiting - {e}")
+        # The savepoint keeps the surrounding transaction usable if the table does not exist yet.
+        with transaction.atomic():
+            return ProvisioningState.objects.filter(name=PROVISIONING_STATE_NAME, fingerprint=fingerprint).exists()
+    except DatabaseError:
+        return False
+
+
+def _store_fingerprint(fingerprint):
+    """Store the fingerprint after a successful provisioning."""
+    ProvisioningState = global_apps.get_model(APP_NAME, "ProvisioningState")  # pylint: disable=invalid-name
+    ProvisioningState.objects.update_or_create(name=PROVISIONING_STATE_NAME, defaults={"fingerprint": fingerprint})
+
+
+@receiver(post_migrate)
+def nautobot_database_ready_callback(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Callback function triggered by the nautobot_database_ready signal and the post_migrate signal.
+
+    There is a problem, that not all the models are ready when the nautobot_database_ready signal is triggered.
+    So, we need to wait for the post_migrate signal to be triggered for the 'dcim' app.
+
+    An App could use this callback to add any records to the database that it requires for proper operation,
+    such as:
+
+    - Relationship definitions
+    - CustomField definitions
+    - Webhook definitions
+    - etc.
+
+    The fingerprint of the provisioned objects is stored in the ProvisioningState
+    table. If it matches, the provisioning is skipped after a single query.
+
+    Args:
+        sender (NautobotAppConfig): The ExampleAppConfig instance that was registered for this callback
+    """
+    if not global_apps:
+        return
+    if "dcim" in repr(sender):
+        app_db_ready_state.is_dcim_ready = True
+    if "extras" in repr(sender):
+        app_db_ready_state.is_extras_ready = True
+    if "nautobot_app_livedata" in repr(sender):
+        app_db_ready_state.is_nautobot_app_livedata_ready = True
+    if not app_db_ready_state.is_migrated:
+        return
+    fingerprint = get_provisioning_fingerprint()
+    if _is_provisioned(fingerprint):
+        app_db_ready_state.already_initialized = True
+        logger.debug("Database-Ready     - Livedata objects are up to date")
+        return
+    if not app_db_ready_state.is_ready:
         return
+    app_db_ready_state.already_initialized = True
+    for permission in PERMISSIONS:
+        create_permission(
+            db_objects=app_db_ready_state.db_objects,  # type: ignore
+            **{**permission, "content_type": app_db_ready_state.content_typs[permission["content_type"]]},  # type: ignore
+        )
+
+    cto = [app_db_ready_state.content_typs["Platform"]]  # type: ignore
+    for field_data in CUSTOM_FIELDS:
+        try:
+            create_custom_field(db_objects=app_db_ready_state.db_objects, content_type_objects=cto, **field_data)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Database-Ready awaiting - %s", e)
+            return
 
     # Ensure that the jobs are enabled
-    _enable_job(job_name=get_plugin_settings()["query_job_name"])
-    _enable_job(job_name="Livedata Cleanup job results")
+    jobs_found = [_enable_job(job_name=job_name) for job_name in get_enabled_job_names()]
+    # Provision again on the next run if a job is not registered yet.
+    if all(jobs_found):
+        _store_fingerprint(fingerprint)
+        logger.info("Database-Ready     - Livedata objects provisioned")
 
 
 def _enable_job(job_name):
     """Enable the job with the given name.
 
     Args:
-        apps (django.apps.apps.Apps): Use this to look up model classes as needed.
         job_name (str): The name of the job to enable.
+
+    Returns:
+        bool: False if the job was not found.
     """
     Job = global_apps.get_model("extras", "Job")  # pylint: disable=invalid-name
     try:
@@ -218,6 +293,78 @@ def _enable_job(job_name):
         if not job.enabled:  # type: ignore
             job.enabled = True  # type: ignore
             job.save()
-            print(f"Database-Ready     - Job '{job_name}' enabled")
+            logger.info("Database-Ready     - Job '%s' enabled", job_name)
     except Job.DoesNotExist:
-        print(f"WARNING: Database-Ready     - Job '{job_name}' not found")
+        logger.warning("Database-Ready     - Job '%s' not found", job_name)
+        return False
+    return True
+
+
+@receiver(post_migrate)
+def clear_contenttype_memo(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the memoized model classes and ContentType rows, migrations may have changed them."""
+    clear_memo()
+
+
+@receiver(post_save, sender="extras.Job")
+@receiver(post_delete, sender="extras.Job")
+@receiver(post_save, sender="extras.JobQueue")
+@receiver(post_delete, sender="extras.JobQueue")
+def invalidate_livedata_job_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the cached Livedata query Job when a Job or JobQueue is changed."""
+    livedata_job_cache.invalidate()
+
+
+@receiver(post_save, sender="dcim.Device")
+@receiver(post_delete, sender="dcim.Device")
+@receiver(post_save, sender="dcim.Interface")
+@receiver(post_delete, sender="dcim.Interface")
+@receiver(post_save, sender="dcim.VirtualChassis")
+@receiver(post_delete, sender="dcim.VirtualChassis")
+@receiver(post_save, sender="ipam.IPAddress")
+@receiver(post_delete, sender="ipam.IPAddress")
+@receiver(post_save, sender="ipam.IPAddressToInterface")
+@receiver(post_delete, sender="ipam.IPAddressToInterface")
+@receiver(post_save, sender="extras.Status")
+@receiver(post_delete, sender="extras.Status")
+@receiver(post_save, sender="dcim.Location")
+@receiver(post_delete, sender="dcim.Location")
+@receiver(post_save, sender="tenancy.Tenant")
+@receiver(post_delete, sender="tenancy.Tenant")
+def invalidate_primary_device_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the cached primary device resolutions and device locations when the inventory changes."""
+    primary_device_cache.invalidate()
+
+
+@receiver(post_save, sender="dcim.Device")
+@receiver(post_delete, sender="dcim.Device")
+@receiver(post_save, sender="dcim.Interface")
+@receiver(post_delete, sender="dcim.Interface")
+@receiver(post_save, sender="dcim.VirtualChassis")
+@receiver(post_delete, sender="dcim.VirtualChassis")
+@receiver(post_save, sender="ipam.IPAddress")
+@receiver(post_delete, sender="ipam.IPAddress")
+@receiver(post_save, sender="extras.Status")
+def update_primary_device_map(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Update the primary device map after the transaction that changed the inventory is committed."""
+    if not primarydevicemap.is_enabled():
+        return
+    transaction.on_commit(partial(_refresh_primary_device_map, sender._meta.label_lower, instance.pk))
+
+
+def _refresh_primary_device_map(model_label, pk):
+    """Update the primary device map and drop the resolutions cached from the old map entries."""
+    primarydevicemap.refresh_for_object(model_label, pk)
+    primary_device_cache.invalidate()
+
+
+@receiver(post_save, sender="users.ObjectPermission")
+@receiver(post_delete, sender="users.ObjectPermission")
+@receiver(post_delete, sender="auth.Group")
+@receiver(m2m_changed, sender="users.ObjectPermission_users")
+@receiver(m2m_changed, sender="users.ObjectPermission_groups")
+@receiver(m2m_changed, sender="users.ObjectPermission_object_types")
+@receiver(m2m_changed, sender="users.User_groups")
+def invalidate_query_permission_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the cached query permissions of all users when the permissions or group memberships change."""
+    query_permission_cache.invalidate()
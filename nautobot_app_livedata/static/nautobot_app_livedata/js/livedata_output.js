@@ -0,0 +1,394 @@
+// Output viewer of the Live Data tabs.
+//
+// The output of a query is shown as one collapsed section per command. The
+// output of a command is only fetched from the server when its section is
+// opened, small outputs are opened right away. Outputs with many lines are
+// rendered windowed: only the lines in the visible part of a fixed-height
+// scroll container are in the DOM. The search runs in a Web Worker, so a
+// multi-megabyte output does not block the page.
+(function () {
+    "use strict";
+
+    // Sections up to this many characters are opened when the result is shown
+    const AUTO_OPEN_SIZE = 64 * 1024;
+    // Outputs with more lines are rendered windowed
+    const WINDOWED_MIN_LINES = 2000;
+    // Height of a line in pixels, windowed rendering needs a fixed height
+    const LINE_HEIGHT_PX = 18;
+    // Height of the scroll container of a windowed output in lines
+    const WINDOW_LINES = 40;
+    // Lines rendered above and below the visible lines
+    const OVERSCAN_LINES = 50;
+    // The search stops after this many matches
+    const MAX_MATCHES = 10000;
+    const SEARCH_DELAY_MS = 250;
+
+    // Case-insensitive search of the outputs by line, runs in the worker and in
+    // the page if the browser refuses to start the worker.
+    function findMatches(texts, query, maxMatches) {
+        const matches = [];
+        let total = 0;
+        const needle = query.toLowerCase();
+        if (!needle) {
+            return { matches: matches, total: total };
+        }
+        Object.keys(texts).map(Number).sort((a, b) => a - b).forEach(index => {
+            const text = texts[index].toLowerCase();
+            let line = 0;
+            let lineStart = 0;
+            let newline = text.indexOf("\n");
+            let position = text.indexOf(needle);
+            while (position !== -1) {
+                while (newline !== -1 && newline < position) {
+                    line += 1;
+                    lineStart = newline + 1;
+                    newline = text.indexOf("\n", lineStart);
+                }
+                total += 1;
+                if (matches.length < maxMatches) {
+                    matches.push([index, line, position - lineStart, position - lineStart + needle.length]);
+                }
+                position = text.indexOf(needle, position + needle.length);
+            }
+        });
+        return { matches: matches, total: total };
+    }
+
+    function createSearch() {
+        const texts = {};
+        let worker = null;
+        let pending = null;
+        try {
+            const source = `${findMatches.toString()}
+                const texts = {};
+                onmessage = function (event) {
+                    const message = event.data;
+                    if (message.type === "reset") {
+                        for (const index of Object.keys(texts)) { delete texts[index]; }
+                    } else if (message.type === "load") {
+                        texts[message.index] = message.text;
+                    } else if (message.type === "search") {
+                        const found = findMatches(texts, message.query, message.maxMatches);
+                        postMessage({ id: message.id, matches: found.matches, total: found.total });
+                    }
+                };`;
+            const url = URL.createObjectURL(new Blob([source], { type: "text/javascript" }));
+            worker = new Worker(url);
+            URL.revokeObjectURL(url);
+            worker.onmessage = event => {
+                if (pending && pending.id === event.data.id) {
+                    pending.resolve(event.data);
+                    pending = null;
+                }
+            };
+        } catch (error) {
+            console.warn("Live Data search runs in the page, the Web Worker could not be started:", error);
+            worker = null;
+        }
+        let nextId = 0;
+        return {
+            reset() {
+                for (const index of Object.keys(texts)) {
+                    delete texts[index];
+                }
+                if (worker) {
+                    worker.postMessage({ type: "reset" });
+                }
+            },
+            load(index, text) {
+                if (worker) {
+                    worker.postMessage({ type: "load", index: index, text: text });
+                } else {
+                    texts[index] = text;
+                }
+            },
+            search(query) {
+                if (!worker) {
+                    return Promise.resolve(findMatches(texts, query, MAX_MATCHES));
+                }
+                if (pending) {
+                    pending.resolve(null);  // Superseded by the new query
+                }
+                nextId += 1;
+                const id = nextId;
+                return new Promise(resolve => {
+                    pending = { id: id, resolve: resolve };
+                    worker.postMessage({ type: "search", id: id, query: query, maxMatches: MAX_MATCHES });
+                });
+            },
+        };
+    }
+
+    function formatSize(size) {
+        if (size < 1024) {
+            return `${size} B`;
+        }
+        if (size < 1024 * 1024) {
+            return `${(size / 1024).toFixed(1)} KB`;
+        }
+        return `${(size / 1024 / 1024).toFixed(1)} MB`;
+    }
+
+    // Renders the lines of an output into `element`, windowed if there are many.
+    function createLineView(element, text) {
+        const lines = text.split("\n");
+        const windowed = lines.length >= WINDOWED_MIN_LINES;
+        const pre = document.createElement("pre");
+        pre.style.fontSize = "1.2em";
+        pre.style.margin = "0";
+        let highlight = null;
+        let scroller = null;
+
+        if (windowed) {
+            pre.style.lineHeight = `${LINE_HEIGHT_PX}px`;
+            pre.style.position = "absolute";
+            pre.style.left = "0";
+            pre.style.top = "0";
+            pre.style.overflow = "visible";
+            pre.style.minWidth = "100%";
+            scroller = document.createElement("div");
+            scroller.style.position = "relative";
+            scroller.style.overflow = "auto";
+            scroller.style.height = `${WINDOW_LINES * LINE_HEIGHT_PX}px`;
+            const spacer = document.createElement("div");
+            spacer.style.height = `${lines.length * LINE_HEIGHT_PX}px`;
+            scroller.appendChild(spacer);
+            scroller.appendChild(pre);
+            element.appendChild(scroller);
+            let frame = null;
+            scroller.addEventListener("scroll", () => {
+                if (frame === null) {
+                    frame = requestAnimationFrame(() => {
+                        frame = null;
+                        render();
+                    });
+                }
+            });
+        } else {
+            element.appendChild(pre);
+        }
+
+        function appendLines(first, last) {
+            if (last > first) {
+                pre.appendChild(document.createTextNode(lines.slice(first, last).join("\n") + (last < lines.length ? "\n" : "")));
+            }
+        }
+
+        function render() {
+            let first = 0;
+            let last = lines.length;
+            if (windowed) {
+                first = Math.max(Math.floor(scroller.scrollTop / LINE_HEIGHT_PX) - OVERSCAN_LINES, 0);
+                last = Math.min(first + WINDOW_LINES + 2 * OVERSCAN_LINES, lines.length);
+                pre.style.top = `${first * LINE_HEIGHT_PX}px`;
+            }
+            pre.textContent = "";
+            if (highlight && highlight.line >= first && highlight.line < last) {
+                const line = lines[highlight.line];
+                appendLines(first, highlight.line);
+                pre.appendChild(document.createTextNode(line.slice(0, highlight.start)));
+                const mark = document.createElement("mark");
+                mark.textContent = line.slice(highlight.start, highlight.end);
+                pre.appendChild(mark);
+                pre.appendChild(document.createTextNode(line.slice(highlight.end) + (highlight.line + 1 < lines.length ? "\n" : "")));
+                appendLines(highlight.line + 1, last);
+                return mark;
+            }
+            appendLines(first, last);
+            return null;
+        }
+
+        render();
+        return {
+            showMatch(line, start, end) {
+                highlight = line === null ? null : { line: line, start: start, end: end };
+                if (windowed && highlight) {
+                    scroller.scrollTop = Math.max((line - WINDOW_LINES / 2) * LINE_HEIGHT_PX, 0);
+                }
+                const mark = render();
+                if (mark) {
+                    mark.scrollIntoView({ block: "center" });
+                }
+            },
+        };
+    }
+
+    function create(container, options) {
+        const search = createSearch();
+        let jobresultPk = null;
+        let sections = [];
+        let matches = [];
+        let total = 0;
+        let current = -1;
+        let searchTimer = null;
+
+        const toolbar = document.createElement("div");
+        toolbar.className = "d-flex align-items-center mb-2";
+        toolbar.innerHTML = `
+            <input type="search" class="form-control form-control-sm me-2" style="max-width: 20em;" placeholder="Search the output" aria-label="Search the output">
+            <button type="button" class="btn btn-secondary btn-sm me-1" title="Previous match" aria-label="Previous match">&uarr;</button>
+            <button type="button" class="btn btn-secondary btn-sm me-2" title="Next match" aria-label="Next match">&darr;</button>
+            <span class="text-muted" role="status"></span>`;
+        const input = toolbar.querySelector("input");
+        const [previousButton, nextButton] = toolbar.querySelectorAll("button");
+        const status = toolbar.querySelector("span");
+        const body = document.createElement("div");
+
+        function loadOutput(section) {
+            if (!section.loading) {
+                section.loading = fetch(options.commandUrl(jobresultPk, section.index), {
+                    method: "GET",
+                    headers: { "X-CSRFToken": options.csrftoken },
+                })
+                .then(options.handleHttpError)
+                .then(response => response.json())
+                .then(output => {
+                    section.output = output;
+                    search.load(section.index, output.stdout);
+                    return output;
+                })
+                .catch(error => {
+                    section.loading = null;
+                    throw error;
+                });
+            }
+            return section.loading;
+        }
+
+        function renderSection(section) {
+            if (section.view) {
+                return Promise.resolve(section.view);
+            }
+            return loadOutput(section).then(output => {
+                if (!section.view) {
+                    section.content.textContent = "";
+                    section.view = createLineView(section.content, output.stdout);
+                    if (output.stderr) {
+                        const error = document.createElement("pre");
+                        error.innerHTML = '<strong style="font-size: 1.4em;">Error: </strong><span style="font-size: 1.2em;"></span>';
+                        error.querySelector("span").textContent = output.stderr;
+                        section.content.appendChild(error);
+                    }
+                }
+                return section.view;
+            })
+            .catch(error => {
+                section.content.innerHTML = '<div class="alert alert-danger" role="alert"></div>';
+                section.content.firstChild.textContent = `Could not load the output: ${error.message}`;
+                throw error;
+            });
+        }
+
+        function openSection(section) {
+            renderSection(section).catch(error => console.error("Error fetching the output:", error));
+        }
+
+        function createSection(command) {
+            const details = document.createElement("details");
+            details.className = "mb-2";
+            const summary = document.createElement("summary");
+            summary.innerHTML = '<strong style="font-size: 1.4em;"></strong> <span class="text-muted ms-2"></span>';
+            summary.firstChild.textContent = command.command;
+            summary.lastChild.textContent = `${formatSize(command.size)}, ${command.lines} lines`;
+            const content = document.createElement("div");
+            content.className = "mt-1";
+            content.textContent = "Loading...";
+            details.appendChild(summary);
+            details.appendChild(content);
+            const section = { index: command.index, details: details, content: content, view: null, loading: null };
+            details.addEventListener("toggle", () => {
+                if (details.open) {
+                    openSection(section);
+                }
+            });
+            details.open = command.size <= AUTO_OPEN_SIZE;
+            return section;
+        }
+
+        function showMatch(position) {
+            if (!matches.length) {
+                return;
+            }
+            const previous = matches[current];
+            current = (position + matches.length) % matches.length;
+            const [index, line, start, end] = matches[current];
+            status.textContent = `${current + 1} of ${matches.length}${total > matches.length ? "+" : ""}`;
+            if (previous && previous[0] !== index) {
+                const section = sections.find(item => item.index === previous[0]);
+                if (section && section.view) {
+                    section.view.showMatch(null);
+                }
+            }
+            const section = sections.find(item => item.index === index);
+            section.details.open = true;
+            renderSection(section).then(view => view.showMatch(line, start, end));
+        }
+
+        function runSearch() {
+            const query = input.value;
+            matches = [];
+            current = -1;
+            sections.forEach(section => section.view && section.view.showMatch(null));
+            if (!query) {
+                status.textContent = "";
+                return;
+            }
+            status.textContent = "Searching...";
+            // All outputs are needed for the search, the closed sections are loaded but not rendered
+            Promise.all(sections.map(loadOutput))
+            .then(() => search.search(query))
+            .then(found => {
+                if (found === null || query !== input.value) {
+                    return;  // A newer search is running
+                }
+                matches = found.matches;
+                total = found.total;
+                if (!matches.length) {
+                    status.textContent = "No matches";
+                    return;
+                }
+                showMatch(0);
+            })
+            .catch(error => {
+                status.textContent = `Search failed: ${error.message}`;
+            });
+        }
+
+        input.addEventListener("input", () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(runSearch, SEARCH_DELAY_MS);
+        });
+        input.addEventListener("keydown", event => {
+            if (event.key === "Enter") {
+                event.preventDefault();
+                showMatch(event.shiftKey ? current - 1 : current + 1);
+            }
+        });
+        previousButton.addEventListener("click", () => showMatch(current - 1));
+        nextButton.addEventListener("click", () => showMatch(current + 1));
+
+        return {
+            // Show the commands of a JobResult, as returned by the JobResult output API
+            show(pk, commands) {
+                jobresultPk = pk;
+                search.reset();
+                input.value = "";
+                status.textContent = "";
+                matches = [];
+                current = -1;
+                container.textContent = "";
+                body.textContent = "";
+                if (!commands.length) {
+                    return;
+                }
+                sections = commands.map(createSection);
+                sections.forEach(section => body.appendChild(section.details));
+                container.appendChild(toolbar);
+                container.appendChild(body);
+                sections.filter(section => section.details.open).forEach(openSection);
+            },
+        };
+    }
+
+    window.LivedataOutput = { create: create };
+})();
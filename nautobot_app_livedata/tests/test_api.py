@@ -154,3 +154,30 @@ class LiveDataAPITest(APITransactionTestCase):
         self.assertIn(
             response.status_code, [HTTPStatus.OK, HTTPStatus.BAD_REQUEST], "Should return 200 OK or 400 Bad Request."
         )
+
+    def test_primary_device_bulk(self):
+        """Test that the bulk endpoint resolves many objects and reports errors per object."""
+        url = reverse("plugins-api:nautobot_app_livedata-api:livedata-primary-device-bulk-api")
+        interfaces = [self.device_list[0].interfaces.first(), self.device_list[1].interfaces.first()]
+        missing = "00000000-0000-0000-0000-000000000000"
+        response = self.client.post(
+            url,
+            {"object_type": "dcim.interface", "pks": [str(intf.id) for intf in interfaces] + [missing]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response_data = response.json()
+        self.assertEqual(
+            response_data["primary_devices"][str(interfaces[0].id)]["primary_device"], str(self.device_list[0].id)
+        )
+        self.assertEqual(response_data["errors"][str(interfaces[1].id)], "Device does not have a primary IP address")
+        self.assertEqual(response_data["errors"][missing], "Interface does not exist")
+
+    def test_primary_device_bulk_invalid(self):
+        """Test that an invalid object type or a forbidden user is rejected."""
+        url = reverse("plugins-api:nautobot_app_livedata-api:livedata-primary-device-bulk-api")
+        response = self.client.post(url, {"object_type": "dcim.rack", "pks": []}, format="json")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.client.force_authenticate(user=self.forbidden_user)  # type: ignore
+        response = self.client.post(url, {"object_type": "dcim.device", "pks": []}, format="json")
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
@@ -3,6 +3,8 @@
 from django.conf import settings
 from nautobot.apps.testing import TestCase
 
+from nautobot_app_livedata.utilities import get_app_settings
+
 
 class PluginConfigTests(TestCase):
     """Validate plugin configuration wiring."""
@@ -12,3 +14,9 @@ class PluginConfigTests(TestCase):
         config = settings.PLUGINS_CONFIG.get("nautobot_app_livedata", {})
         self.assertIn("query_job_task_queue", config)
         self.assertTrue(config["query_job_task_queue"])
+
+    def test_get_app_settings(self):
+        """The settings accessor returns the configured settings and follows overrides."""
+        self.assertIs(get_app_settings(), settings.PLUGINS_CONFIG["nautobot_app_livedata"])
+        with self.settings(PLUGINS_CONFIG={}):
+            self.assertEqual(get_app_settings(), {})
@@ -1,9 +1,18 @@
 """Unit tests for contenttype.py."""
 
+from unittest.mock import patch
+
+from django.contrib.contenttypes.models import ContentType
 from django.test import TestCase
+from nautobot.dcim.models import Device
 
 from .conftest import create_db_data, wait_for_debugger_connection
-from nautobot_app_livedata.utilities.contenttype import ContentTypeUtils
+from nautobot_app_livedata.utilities.contenttype import (
+    clear_memo,
+    ContentTypeUtils,
+    get_content_type_for_model,
+    get_model,
+)
 
 
 class ContentTypeUtilsTest(TestCase):
@@ -40,3 +49,30 @@ class ContentTypeUtilsTest(TestCase):
         """Test setting full model name."""
         self.content_type_utils.full_model_name = "dcim.device"
         self.assertEqual(self.content_type_utils.full_model_name, "dcim.device")
+
+
+class ContentTypeMemoTest(TestCase):
+    """Test the memoized model and ContentType lookups."""
+
+    def setUp(self):
+        """Start each test with an empty memo."""
+        clear_memo()
+
+    def test_get_model(self):
+        """Model classes are returned and memoized."""
+        self.assertIs(get_model("dcim.Device"), Device)
+        with patch("nautobot_app_livedata.utilities.contenttype.global_apps.get_model") as mock_get_model:
+            self.assertIs(get_model("dcim.device"), Device)
+        mock_get_model.assert_not_called()
+        with self.assertRaises(ValueError):
+            get_model("device")
+
+    def test_get_content_type_for_model(self):
+        """ContentType rows are memoized, misses are not."""
+        with self.assertNumQueries(1):
+            content_type = get_content_type_for_model("dcim.device")
+            self.assertEqual(get_content_type_for_model("dcim.device"), content_type)
+        self.assertEqual(content_type, ContentType.objects.get_for_model(Device))
+        with self.assertNumQueries(2):
+            self.assertIsNone(get_content_type_for_model("invalid.model"))
+            self.assertIsNone(get_content_type_for_model("invalid.model"))
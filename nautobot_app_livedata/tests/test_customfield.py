@@ -1,5 +1,58 @@
 """Unit tests for customfield.py."""
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from nautobot.apps.choices import CustomFieldTypeChoices
+from nautobot.apps.testing import TestCase
+from nautobot.core.models import ContentType
+from nautobot.dcim.models import Device, Platform
+from nautobot.extras.models import CustomField
+
+from nautobot_app_livedata.utilities.customfield import create_custom_field
+
+
+class CreateCustomFieldTest(TestCase):
+    """Test create_custom_field."""
+
+    def setUp(self):
+        """Set up the custom field definition."""
+        super().setUp()
+        self.db_objects = {"ContentType": ContentType, "CustomField": CustomField}
+        self.content_types = [ContentType.objects.get_for_model(Platform), ContentType.objects.get_for_model(Device)]
+        self.field_data = {
+            "key": "livedata_test_commands",
+            "type": CustomFieldTypeChoices.TYPE_MARKDOWN,
+            "label": "Livedata Test Commands",
+            "description": "Test",
+            "default": "",
+            "required": False,
+            "filter_logic": "loose",
+            "weight": 100,
+            "advanced_ui": False,
+        }
+
+    def test_create_custom_field(self):
+        """The custom field is created and assigned to all content types."""
+        create_custom_field(self.db_objects, self.content_types, **self.field_data)
+        custom_field = CustomField.objects.get(key="livedata_test_commands")
+        self.assertEqual(custom_field.label, "Livedata Test Commands")
+        self.assertEqual(set(custom_field.content_types.all()), set(self.content_types))
+
+    def test_up_to_date_custom_field_is_not_saved(self):
+        """An up to date custom field is checked with two queries and not saved."""
+        create_custom_field(self.db_objects, self.content_types, **self.field_data)
+        with CaptureQueriesContext(connection) as queries:
+            create_custom_field(self.db_objects, self.content_types, **self.field_data)
+        self.assertEqual(len(queries), 2)
+
+    def test_changed_custom_field_is_updated(self):
+        """Changed attributes are saved and missing content types are added."""
+        create_custom_field(self.db_objects, self.content_types[:1], **self.field_data)
+        create_custom_field(self.db_objects, self.content_types, **{**self.field_data, "weight": 200})
+        custom_field = CustomField.objects.get(key="livedata_test_commands")
+        self.assertEqual(custom_field.weight, 200)
+        self.assertEqual(set(custom_field.content_types.all()), set(self.content_types))
+
 
 # class CustomFieldUtilsTest(TestCase):
 #     """Test the CustomFieldUtils class."""
@@ -0,0 +1,60 @@
+"""Tests for the estimated duration of a Livedata query."""
+
+from datetime import timedelta
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import Job, JobResult
+
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities.eta import get_query_eta
+
+
+class QueryEtaTestCase(TestCase):
+    """Test get_query_eta."""
+
+    def setUp(self):
+        """Use the Livedata query job and start with an empty cache."""
+        super().setUp()
+        cache.clear()
+        self.job = Job.objects.get(name=PLUGIN_SETTINGS["query_job_name"])
+        self.device_id = uuid.uuid4()
+
+    def _create_runs(self, seconds_list, device_id=None, status="SUCCESS", days_old=0):
+        now = timezone.now() - timedelta(days=days_old)
+        for seconds in seconds_list:
+            job_result = JobResult.objects.create(
+                name=self.job.name,
+                job_model=self.job,
+                status=status,
+                task_kwargs={"primary_device_id": str(device_id or uuid.uuid4())},
+                date_done=now,
+            )
+            JobResult.objects.filter(pk=job_result.pk).update(date_created=now - timedelta(seconds=seconds))
+
+    def test_median_of_device_runs(self):
+        """The estimate is the median duration of the runs for the device."""
+        self._create_runs([2, 3, 10], device_id=self.device_id)
+        self._create_runs([60, 60, 60])
+        self.assertEqual(get_query_eta(self.job.pk, self.device_id), 3.0)
+
+    def test_fallback_to_all_devices(self):
+        """A device with too few runs gets the median of all devices."""
+        self._create_runs([1], device_id=self.device_id)
+        self._create_runs([4, 5])
+        self.assertEqual(get_query_eta(self.job.pk, self.device_id), 4.0)
+
+    def test_only_recent_successful_runs(self):
+        """Failed and old runs are ignored, without runs there is no estimate."""
+        self._create_runs([5, 5, 5], device_id=self.device_id, status="FAILURE")
+        self._create_runs([5, 5, 5], device_id=self.device_id, days_old=30)
+        self.assertIsNone(get_query_eta(self.job.pk, self.device_id))
+
+    def test_estimate_is_cached(self):
+        """The estimate is cached, also if there is none."""
+        self.assertIsNone(get_query_eta(self.job.pk, self.device_id))
+        self._create_runs([2, 2, 2], device_id=self.device_id)
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_query_eta(self.job.pk, self.device_id))
@@ -0,0 +1,80 @@
+"""Import time budget of the app, measured with `python -X importtime`."""
+
+import os
+import subprocess
+import sys
+
+from nautobot.apps.testing import TestCase
+
+APP_PACKAGE = "nautobot_app_livedata"
+# Cumulative import time of the app modules, including the modules they import first,
+# while Nautobot starts. Override with LIVEDATA_IMPORT_TIME_BUDGET_MS on slow machines.
+IMPORT_TIME_BUDGET_MS = int(os.getenv("LIVEDATA_IMPORT_TIME_BUDGET_MS", "150"))
+# Modules that are only needed to run a query and must not be imported by the app at startup
+LAZY_MODULES = ("napalm", "netmiko", "nornir", "nautobot_plugin_nornir.plugins.inventory.nautobot_orm")
+
+
+def parse_importtime(stderr):
+    """Return the import time of the app and the modules imported beneath the app modules.
+
+    `-X importtime` prints one line per module after the modules it imports, which
+    are indented one level deeper. The cumulative times of the outermost app modules
+    are summed, the app modules they import are not counted twice.
+
+    Args:
+        stderr (str): The stderr of `python -X importtime`.
+
+    Returns:
+        tuple: The import time of the app in microseconds, and per app module the
+            cumulative time and the names of the modules it imported.
+    """
+    stack = []  # (indent, app time, module names of the subtree)
+    app_modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        indent = len(name) - len(name.lstrip())
+        name = name.strip()
+        app_time, names = 0, {name}
+        while stack and stack[-1][0] > indent:
+            _, child_time, child_names = stack.pop()
+            app_time += child_time
+            names |= child_names
+        if name.startswith(APP_PACKAGE) and not name.startswith(f"{APP_PACKAGE}.tests"):
+            app_time = int(cumulative)
+            app_modules[name] = (app_time, names)
+        stack.append((indent, app_time, names))
+    return sum(entry[1] for entry in stack), app_modules
+
+
+class ImportTimeTestCase(TestCase):
+    """Enforce the import time budget of the app."""
+
+    def test_import_time_budget(self):
+        """Starting Nautobot imports the app within the budget and without the modules of the query job."""
+        config_path = sys.modules["nautobot_config"].__file__
+        code = (
+            "import nautobot; nautobot.setup(); "
+            f"import {APP_PACKAGE}.api.views, {APP_PACKAGE}.jobs, {APP_PACKAGE}.views"
+        )
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            check=True,
+            env={**os.environ, "NAUTOBOT_CONFIG": config_path},
+            text=True,
+        )
+        app_time, app_modules = parse_importtime(process.stderr)
+        self.assertTrue(app_modules, "No app module found in the -X importtime output")
+        imported = set().union(*(names for _, names in app_modules.values()))
+        self.assertFalse(
+            [name for name in imported if name.split(".")[0] in LAZY_MODULES or name in LAZY_MODULES],
+            "Modules of the query job are imported at startup",
+        )
+        slowest = sorted(app_modules.items(), key=lambda item: item[1][0], reverse=True)[:5]
+        self.assertLessEqual(
+            app_time / 1000,
+            IMPORT_TIME_BUDGET_MS,
+            "Import time budget exceeded: " + ", ".join(f"{name} {time / 1000:.1f} ms" for name, (time, _) in slowest),
+        )
@@ -0,0 +1,74 @@
+"""Unit tests for the Livedata query Job cache."""
+
+from nautobot.apps.testing import TestCase
+from nautobot.extras.choices import JobQueueTypeChoices
+from nautobot.extras.models import Job as JobModel, JobQueue
+
+from nautobot_app_livedata.utilities.jobcache import livedata_job_cache, LivedataJobCache
+
+
+class LivedataJobCacheTest(TestCase):
+    """Test the LivedataJobCache class."""
+
+    def setUp(self):
+        """Set up data for each test case."""
+        super().setUp()
+        self.job_queue, _ = JobQueue.objects.get_or_create(
+            name="livedata-cache-test",
+            defaults={"queue_type": JobQueueTypeChoices.TYPE_CELERY},
+        )
+        self.job = JobModel.objects.create(
+            module_name="test.module",
+            job_class_name="CachedJob",
+            grouping="Tests",
+            name="Cached Job",
+            description="",
+            default_job_queue=self.job_queue,
+            enabled=True,
+        )
+        self.cache = LivedataJobCache()
+
+    def test_get_caches_job_and_queue(self):
+        """A second lookup is served without database queries."""
+        entry = self.cache.get("Cached Job", "livedata-cache-test")
+        self.assertEqual(entry.job, self.job)
+        self.assertEqual(entry.enqueue_kwargs, {"job_queue": self.job_queue})
+        with self.assertNumQueries(0):
+            self.assertIs(self.cache.get("Cached Job", "livedata-cache-test"), entry)
+
+    def test_get_uses_default_job_queue(self):
+        """Without a configured queue the job's default queue is used."""
+        entry = self.cache.get("Cached Job")
+        self.assertEqual(entry.job_queue, self.job_queue)
+
+    def test_get_unknown_queue_falls_back_to_name(self):
+        """An unknown queue name is passed through to enqueue_job()."""
+        entry = self.cache.get("Cached Job", "does-not-exist")
+        self.assertEqual(entry.enqueue_kwargs, {"task_queue": "does-not-exist"})
+
+    def test_missing_job_is_not_cached(self):
+        """A missing Job is looked up again on the next call."""
+        self.assertIsNone(self.cache.get("Missing Job"))
+        JobModel.objects.create(
+            module_name="test.module",
+            job_class_name="MissingJob",
+            grouping="Tests",
+            name="Missing Job",
+            description="",
+            default_job_queue=self.job_queue,
+            enabled=True,
+        )
+        self.assertIsNotNone(self.cache.get("Missing Job"))
+
+    def test_expired_entry_is_reloaded(self):
+        """Entries older than the ttl are loaded again."""
+        self.cache.ttl = 0
+        entry = self.cache.get("Cached Job")
+        self.assertIsNot(self.cache.get("Cached Job"), entry)
+
+    def test_job_save_invalidates_cache(self):
+        """Saving a Job drops the entries of the shared cache."""
+        entry = livedata_job_cache.get("Cached Job")
+        self.job.description = "changed"
+        self.job.save()
+        self.assertIsNot(livedata_job_cache.get("Cached Job"), entry)
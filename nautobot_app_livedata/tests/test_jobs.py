@@ -1,15 +1,22 @@
 """Comprehensive tests for jobs in nautobot_app_livedata."""
 
-from datetime import datetime
+import gzip
 from importlib import import_module
+import json
+import os
+import tempfile
 from unittest.mock import Mock, patch
 
+from celery.exceptions import SoftTimeLimitExceeded
 from django.contrib.auth import get_user_model
-from django.utils.timezone import make_aware
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
 from nautobot.apps.testing import TestCase as APITransactionTestCase
 
 from .conftest import create_db_data
 from nautobot_app_livedata.jobs.jobs import LivedataCleanupJobResultsJob, LivedataQueryJob
+from nautobot_app_livedata.utilities import cleanup, syncjob
 
 jobs_module = import_module("nautobot_app_livedata.jobs.jobs")
 
@@ -103,6 +110,22 @@ class LivedataQueryJobTest(APITransactionTestCase):
             ],
         )
 
+    def test_command_templates_are_compiled_once(self):
+        """Test that parse_commands reuses compiled command templates."""
+        jobs_module.compile_command_template.cache_clear()
+        self.job.intf_name = "GigabitEthernet1/0/1"
+        self.job.intf_name_only = self.job.intf_number = self.job.intf_abbrev = None
+        self.job.device_name = "test-device"
+        self.job.primary_device = Mock()
+        self.job.primary_device.name = "test-device"
+        for _ in range(2):
+            self.assertEqual(
+                self.job.parse_commands(["show interface {{ intf_name }}"]),
+                ["show interface GigabitEthernet1/0/1"],
+            )
+        cache_info = jobs_module.compile_command_template.cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses), (1, 1))
+
     def test_parse_commands_with_invalid_jinja2(self):
         """Test parse_commands raises ValueError for invalid Jinja2 template."""
         self.job.intf_name = "GigabitEthernet0/1"
@@ -345,7 +368,7 @@ class LivedataQueryJobTest(APITransactionTestCase):
             self.assertIsNotNone(self.job.primary_device)
             self.assertIsNotNone(self.job.commands)
 
-    @patch.object(jobs_module, "InitNornir")
+    @patch("nornir.InitNornir")
     def test_run_success(self, mock_init_nornir):
         """Test run method executes commands successfully."""
         device = self.device_list[0]
@@ -383,7 +406,7 @@ class LivedataQueryJobTest(APITransactionTestCase):
             self.assertEqual(result[0]["stderr"], "")
             mock_connection.disconnect.assert_called_once()
 
-    @patch.object(jobs_module, "InitNornir")
+    @patch("nornir.InitNornir")
     def test_run_with_filter_syntax(self, mock_init_nornir):
         """Test run method handles !! filter syntax correctly."""
         device = self.device_list[0]
@@ -412,7 +435,7 @@ class LivedataQueryJobTest(APITransactionTestCase):
             mock_connection.disconnect.return_value = None
             mock_host.get_connection.return_value = mock_connection
 
-            with patch.object(jobs_module, "apply_output_filter") as mock_filter:
+            with patch("nautobot_app_livedata.utilities.output_filter.apply_output_filter") as mock_filter:
                 mock_filter.return_value = "Filtered output"
                 result = self.job.run()
 
@@ -421,7 +444,7 @@ class LivedataQueryJobTest(APITransactionTestCase):
                 self.assertEqual(len(result), 1)
                 self.assertEqual(result[0]["stdout"], "Filtered output")
 
-    @patch.object(jobs_module, "InitNornir")
+    @patch("nornir.InitNornir")
     def test_run_device_not_in_inventory(self, mock_init_nornir):
         """Test run raises ValueError when device not found in inventory."""
         device = self.device_list[0]
@@ -448,6 +471,28 @@ class LivedataQueryJobTest(APITransactionTestCase):
 
             self.assertIn("not found in Nornir inventory", str(context.exception))
 
+    def test_inline_run_limits_timeouts(self):
+        """An inline run connects and reads within the time left until its deadline."""
+        host = Mock()
+        host.get_connection_parameters.return_value.extras = {"fast_cli": False}
+        connection_mock = host.get_connection.return_value
+        with patch.object(syncjob, "get_remaining_time", return_value=4.0):
+            self.assertIs(self.job._connect(host, "config"), connection_mock)
+            self.job._send_command(connection_mock, "show version")
+        host.open_connection.assert_called_once_with(
+            "netmiko", "config", extras={"fast_cli": False, "conn_timeout": 4.0}
+        )
+        connection_mock.send_command.assert_called_once_with("show version", read_timeout=4.0)
+
+    def test_inline_run_after_deadline(self):
+        """No command is sent once the deadline of an inline run has passed."""
+        connection_mock = Mock()
+        with patch.object(syncjob, "get_remaining_time", return_value=0.0):
+            with self.assertRaises(ValueError) as context:
+                self.job._send_command(connection_mock, "show version")
+        self.assertIn("E3003", str(context.exception))
+        connection_mock.send_command.assert_not_called()
+
 
 class LivedataCleanupJobResultsJobTest(APITransactionTestCase):
     """Test LivedataCleanupJobResultsJob class."""
@@ -464,6 +509,7 @@ class LivedataCleanupJobResultsJobTest(APITransactionTestCase):
         self.job = LivedataCleanupJobResultsJob()
         # Mock logger
         self.job.logger = Mock()
+        cleanup.CleanupCheckpoint.clear()
 
     def test_job_meta_attributes(self):
         """Test that job has correct meta attributes."""
@@ -475,81 +521,179 @@ class LivedataCleanupJobResultsJobTest(APITransactionTestCase):
         self.assertEqual(self.job.Meta.soft_time_limit, 60)
         self.assertTrue(self.job.Meta.enabled)
 
-    @patch.object(jobs_module.JobResult.objects, "filter")
-    def test_run_dry_run(self, mock_filter):
-        """Test run with dry_run=True returns count without deleting."""
-        # Mock QuerySets
-        mock_query_results = Mock()
-        mock_query_results.count.return_value = 5
-        mock_cleanup_results = Mock()
-        mock_cleanup_results.count.return_value = 2
+    def test_jobresult_index(self):
+        """Test the migration added the index for the cleanup queries to the JobResult table."""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, jobs_module.JobResult._meta.db_table)
+        self.assertEqual(
+            constraints["livedata_jr_job_stat_done_idx"]["columns"], ["job_model_id", "status", "date_done"]
+        )
 
-        mock_filter.side_effect = [mock_query_results, mock_cleanup_results]
+    def test_run_dry_run(self):
+        """Test run with dry_run=True returns count and size without deleting."""
+        job_results = self._create_job_results(5, result=[{"command": "show version", "stdout": "x" * 1000}])
 
         result = self.job.run(days_to_keep=30, dry_run=True)
 
         self.assertIn("5 job results", result)
         self.assertIn("would be deleted", result)
-        self.assertIn("2 cleanup job results", result)
-        # Verify delete was not called
-        mock_query_results.delete.assert_not_called()
-        mock_cleanup_results.delete.assert_not_called()
+        self.assertIn("0 cleanup job results", result)
+        self.assertIn("KB would be reclaimed", result)
+        self.assertEqual(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in job_results]).count(), 5)
+
+    def _create_job_results(self, count, days_old=60, status="SUCCESS", result=None):
+        """Create finished job results of the Livedata query job, the first one is the oldest."""
+        job_model = jobs_module.JobModel.objects.get(name=jobs_module.PLUGIN_SETTINGS["query_job_name"])
+        date_done = timezone.now() - timezone.timedelta(days=days_old)
+        job_results = []
+        for _ in range(count):
+            job_result = jobs_module.JobResult.objects.create(
+                name=job_model.name, job_model=job_model, status=status, user=self.user, result=result
+            )
+            job_result.date_done = date_done
+            date_done += timezone.timedelta(minutes=1)
+            job_result.save()
+            job_result.job_log_entries.create(message="output", log_level="info")
+            job_results.append(job_result)
+        return job_results
+
+    def test_run_delete(self):
+        """Test run with dry_run=False deletes the old job results in batches."""
+        old_results = self._create_job_results(5)
+        new_results = self._create_job_results(1, days_old=1)
+
+        result = self.job.run(days_to_keep=30, dry_run=False, batch_size=2, batch_sleep_ms=0)
+
+        self.assertIn("Deleted 5 job results", result)
+        self.assertIn("Deleted 0 cleanup job results", result)
+        self.assertFalse(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in old_results]).exists())
+        self.assertTrue(jobs_module.JobResult.objects.filter(pk=new_results[0].pk).exists())
+        self.assertIsNone(cache.get(cleanup.CHECKPOINT_KEY))
+
+    def test_run_resumes_after_soft_time_limit(self):
+        """Test a run stopped by the soft time limit is resumed by the next run."""
+        job_results = self._create_job_results(5)
+        batches = []
+
+        def sleep(_seconds):
+            batches.append(_seconds)
+            if len(batches) == 2:
+                raise SoftTimeLimitExceeded()
+
+        with patch.object(jobs_module.time, "sleep", side_effect=sleep):
+            result = self.job.run(days_to_keep=30, dry_run=False, batch_size=2, batch_sleep_ms=10)
+        self.assertIn("Stopped by the soft time limit. Deleted 4 job results", result)
+        self.assertEqual(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in job_results]).count(), 1)
+        self.assertEqual(cache.get(cleanup.CHECKPOINT_KEY)["progress"]["query"]["deleted"], 4)
+
+        result = self.job.run(days_to_keep=30, dry_run=False, batch_size=2, batch_sleep_ms=0)
+        self.assertIn("Deleted 5 job results", result)
+        self.assertFalse(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in job_results]).exists())
+        self.assertIsNone(cache.get(cleanup.CHECKPOINT_KEY))
+
+    def test_run_archive_to_directory(self):
+        """Test the job results are archived as gzip JSON lines before they are deleted."""
+        job_results = self._create_job_results(3)
+        job_results[0].task_kwargs = {
+            "device_id": str(self.device_list[0].pk),
+            "primary_device_id": str(self.device_list[0].pk),
+            "remote_addr": "192.0.2.1",
+            "x_forwarded_for": "198.51.100.1",
+            "call_object_type": "dcim.device",
+            "commands_j2": ["show version"],
+        }
+        job_results[0].result = [{"command": "show version", "stdout": "Version 1", "stderr": ""}]
+        job_results[0].save()
+        with tempfile.TemporaryDirectory() as archive_dir:
+            with patch.dict(jobs_module.PLUGIN_SETTINGS, {"cleanup_archive_dir": archive_dir}):
+                result = self.job.run(days_to_keep=30, dry_run=False, batch_size=2, batch_sleep_ms=0, archive=True)
+            self.assertIn("Archived 3 job results", result)
+            (filename,) = os.listdir(archive_dir)
+            with gzip.open(os.path.join(archive_dir, filename), "rt") as archive_file:
+                records = {record["id"]: record for record in map(json.loads, archive_file)}
+        self.assertEqual(set(records), {str(job_result.pk) for job_result in job_results})
+        record = records[str(job_results[0].pk)]
+        self.assertEqual(record["user"], "testuser")
+        self.assertEqual(record["device"], self.device_list[0].name)
+        self.assertEqual(record["remote_addr"], "192.0.2.1")
+        self.assertEqual(record["x_forwarded_for"], "198.51.100.1")
+        self.assertEqual(record["commands"], ["show version"])
+        self.assertEqual(record["outputs"][0]["stdout"], "Version 1")
+        self.assertFalse(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in job_results]).exists())
+
+    def test_run_archive_to_file_proxy(self):
+        """Test the archive is attached to the job result without an archive directory."""
+        self._create_job_results(2)
+        self.job.job_result = jobs_module.JobResult.objects.create(name="cleanup", user=self.user)
+        result = self.job.run(days_to_keep=30, dry_run=False, batch_sleep_ms=0, archive=True)
+        self.assertIn("Archived 2 job results", result)
+        file_proxy = self.job.job_result.files.get()
+        with gzip.open(file_proxy.file, "rt") as archive_file:
+            self.assertEqual(len(archive_file.readlines()), 2)
+
+    def test_run_archive_failure_keeps_batch(self):
+        """Test a batch is not deleted if it could not be archived."""
+        job_results = self._create_job_results(2)
+        with tempfile.TemporaryDirectory() as archive_dir:
+            with patch.dict(jobs_module.PLUGIN_SETTINGS, {"cleanup_archive_dir": archive_dir}):
+                with patch.object(cleanup.JobResultArchive, "write_batch", side_effect=OSError("disk full")):
+                    with self.assertRaises(OSError):
+                        self.job.run(days_to_keep=30, dry_run=False, batch_sleep_ms=0, archive=True)
+        self.assertEqual(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in job_results]).count(), 2)
+
+    def test_run_default_days_to_keep(self):
+        """Test run uses default 30 days when days_to_keep is None."""
+        result = self.job.run(days_to_keep=None, dry_run=True)
 
-    @patch.object(jobs_module.JobResult.objects, "filter")
-    def test_run_delete(self, mock_filter):
-        """Test run with dry_run=False actually deletes records."""
-        # Mock QuerySets
-        mock_query_results = Mock()
-        mock_query_results.delete.return_value = (5, {})
-        mock_cleanup_results = Mock()
-        mock_cleanup_results.delete.return_value = (2, {})
+        # Should use default 30 days
+        self.assertIn("30 days", result)
 
-        mock_filter.side_effect = [mock_query_results, mock_cleanup_results]
+    def test_run_filters_by_cutoff_date(self):
+        """Test run only deletes JobResults finished before the cutoff date."""
+        old_results = self._create_job_results(2, days_old=8)
+        new_results = self._create_job_results(2, days_old=6)
 
-        result = self.job.run(days_to_keep=30, dry_run=False)
+        result = self.job.run(days_to_keep=7, dry_run=False, batch_sleep_ms=0)
 
-        self.assertIn("Deleted 5 job results", result)
-        self.assertIn("Deleted 2 cleanup job results", result)
-        # Verify delete was called
-        mock_query_results.delete.assert_called_once()
-        mock_cleanup_results.delete.assert_called_once()
+        self.assertIn("Deleted 2 job results older than 7 days", result)
+        self.assertFalse(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in old_results]).exists())
+        self.assertEqual(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in new_results]).count(), 2)
 
-    @patch.object(jobs_module.JobResult.objects, "filter")
-    def test_run_default_days_to_keep(self, mock_filter):
-        """Test run uses default 30 days when days_to_keep is None."""
-        mock_query_results = Mock()
-        mock_query_results.count.return_value = 0
-        mock_cleanup_results = Mock()
-        mock_cleanup_results.count.return_value = 0
+    def test_run_failure_retention(self):
+        """Test failed job results are only deleted after failure_days_to_keep."""
+        failed_results = self._create_job_results(2, days_old=60, status="FAILURE")
 
-        mock_filter.side_effect = [mock_query_results, mock_cleanup_results]
+        result = self.job.run(days_to_keep=30, dry_run=False, batch_sleep_ms=0)
+        self.assertIn("Deleted 0 job results", result)
 
-        result = self.job.run(days_to_keep=None, dry_run=True)
+        result = self.job.run(days_to_keep=30, dry_run=False, batch_sleep_ms=0, failure_days_to_keep=90)
+        self.assertIn("Deleted 0 job results", result)
 
-        # Should use default 30 days
-        self.assertIn("30 days", result)
+        result = self.job.run(days_to_keep=30, dry_run=False, batch_sleep_ms=0, failure_days_to_keep=45)
+        self.assertIn("Deleted 2 job results older than 30 days or beyond the retention limits", result)
+        self.assertFalse(jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in failed_results]).exists())
 
-    @patch.object(jobs_module.timezone, "now")
-    @patch.object(jobs_module.JobResult.objects, "filter")
-    def test_run_filters_by_cutoff_date(self, mock_filter, mock_now):
-        """Test run filters JobResults by correct cutoff date."""
-        # Set fixed "now" time
-        fixed_now = make_aware(datetime(2025, 10, 24, 12, 0, 0))
-        mock_now.return_value = fixed_now
+    def test_run_max_results(self):
+        """Test the oldest job results beyond max_results are deleted."""
+        job_results = self._create_job_results(5, days_old=5)
 
-        mock_query_results = Mock()
-        mock_query_results.count.return_value = 0
-        mock_cleanup_results = Mock()
-        mock_cleanup_results.count.return_value = 0
+        result = self.job.run(days_to_keep=30, dry_run=False, batch_sleep_ms=0, max_results=2)
 
-        mock_filter.side_effect = [mock_query_results, mock_cleanup_results]
+        self.assertIn("Deleted 3 job results", result)
+        remaining = jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in job_results])
+        self.assertEqual(set(remaining), set(job_results[3:]))
 
-        self.job.run(days_to_keep=7, dry_run=True)
+    def test_run_max_size_mb(self):
+        """Test the oldest job results are deleted until the stored size is below max_size_mb."""
+        output = [{"command": "show tech-support", "stdout": "x" * 400_000, "stderr": ""}]
+        job_results = self._create_job_results(5, days_old=5, result=output)
 
-        # Verify filter was called with correct parameters
-        calls = mock_filter.call_args_list
+        dry_run_result = self.job.run(days_to_keep=30, dry_run=True, max_size_mb=1)
+        self.assertIn(
+            "3 job results older than 30 days or beyond the retention limits would be deleted", dry_run_result
+        )
+        self.assertIn("MB would be reclaimed", dry_run_result)
 
-        # First call should filter query job results
-        self.assertIn("date_done__lt", str(calls[0]))
-        # Second call should filter cleanup job results
-        self.assertIn("date_done__lt", str(calls[1]))
+        self.job.run(days_to_keep=30, dry_run=False, batch_sleep_ms=0, max_size_mb=1)
+        remaining = jobs_module.JobResult.objects.filter(pk__in=[r.pk for r in job_results])
+        self.assertEqual(set(remaining), set(job_results[3:]))
@@ -0,0 +1,106 @@
+"""Tests for the last Livedata query result shown by the Live Data tabs."""
+
+from unittest.mock import patch
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import Job, JobResult
+
+from nautobot_app_livedata.tests.conftest import create_db_data
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities import lastresult
+from nautobot_app_livedata.utilities.jobcache import livedata_job_cache
+
+User = get_user_model()
+
+OUTPUT = [{"command": "show version", "stdout": "Version <1.0>", "stderr": ""}]
+SUMMARY = [{"index": 0, "command": "show version", "size": 13, "lines": 1, "stderr_size": 0}]
+
+
+class LastResultTestCase(TestCase):
+    """Test store_last_result and get_last_result."""
+
+    def setUp(self):
+        """Start with an empty cache."""
+        super().setUp()
+        cache.clear()
+        self.job = Job.objects.get(name=PLUGIN_SETTINGS["query_job_name"])
+        self.pk = uuid.uuid4()
+
+    def test_stored_result_is_served_from_cache(self):
+        """A stored result is returned without a database query."""
+        lastresult.store_last_result("dcim.interface", self.pk, "jr-1", OUTPUT)
+        with self.assertNumQueries(0):
+            entry = lastresult.get_last_result(self.job.pk, "dcim.interface", self.pk)
+        self.assertEqual(entry["jobresult_id"], "jr-1")
+        self.assertEqual(entry["commands"], SUMMARY)
+        self.assertNotIn("result", entry)
+
+    def test_lookup_of_latest_job_result(self):
+        """On a cache miss the latest successful JobResult of the object is used and cached."""
+        for status in ("SUCCESS", "FAILURE"):
+            JobResult.objects.create(
+                name=self.job.name,
+                job_model=self.job,
+                status=status,
+                task_kwargs={"call_object_type": "dcim.device", "device_id": str(self.pk)},
+                result=OUTPUT if status == "SUCCESS" else None,
+                date_done=timezone.now(),
+            )
+        entry = lastresult.get_last_result(self.job.pk, "dcim.device", self.pk)
+        self.assertEqual(entry["commands"], SUMMARY)
+        with self.assertNumQueries(0):
+            self.assertEqual(lastresult.get_last_result(self.job.pk, "dcim.device", self.pk), entry)
+
+    def test_missing_result_is_cached(self):
+        """Without a result, None is returned and the miss is cached."""
+        self.assertIsNone(lastresult.get_last_result(self.job.pk, "dcim.interface", self.pk))
+        with self.assertNumQueries(0):
+            self.assertIsNone(lastresult.get_last_result(self.job.pk, "dcim.interface", self.pk))
+
+    def test_disabled(self):
+        """With query_last_result_max_age 0 nothing is stored or returned."""
+        with patch.dict(PLUGIN_SETTINGS, {"query_last_result_max_age": 0}):
+            lastresult.store_last_result("dcim.interface", self.pk, "jr-1", OUTPUT)
+            self.assertIsNone(lastresult.get_last_result(self.job.pk, "dcim.interface", self.pk))
+
+
+class LastResultTabTestCase(TestCase):
+    """Test that the Live Data tab renders the last result."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the devices."""
+        cls.device_list = create_db_data()
+
+    def setUp(self):
+        """Log in as superuser."""
+        super().setUp()
+        cache.clear()
+        livedata_job_cache.invalidate()
+        self.superuser = User.objects.create_superuser(username="lastresult_admin", password="password")
+        self.client.force_login(self.superuser)
+
+    def test_tab_renders_last_result(self):
+        """The tab shows the commands of the last query, their output is loaded by the tab."""
+        device = self.device_list[0]
+        lastresult.store_last_result("dcim.device", device.pk, "jr-1", OUTPUT)
+        url = reverse("plugins:nautobot_app_livedata:device_detail_tab", kwargs={"pk": device.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Showing the result from")
+        self.assertContains(response, 'id="id_last_result_commands"')
+        self.assertContains(response, 'data-jobresult-pk="jr-1"')
+        self.assertNotContains(response, "Version &lt;1.0&gt;")
+
+    def test_tab_without_last_result(self):
+        """Without a last result the tab only waits for the query."""
+        interface = self.device_list[0].interfaces.first()
+        url = reverse("plugins:nautobot_app_livedata:interface_detail_tab", kwargs={"pk": interface.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Showing the result from")
@@ -0,0 +1,81 @@
+"""Tests for the Prometheus metrics of the Livedata query pipeline."""
+
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from nautobot.apps.testing import TestCase
+from prometheus_client import REGISTRY
+
+from nautobot_app_livedata.jobs import LivedataQueryJob
+from nautobot_app_livedata.utilities import metrics
+
+User = get_user_model()
+
+
+def get_sample(name, **labels):
+    """Return the current value of a metric sample, 0 if it was not observed yet."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTestCase(TestCase):
+    """Test the metric helpers."""
+
+    def test_get_error_code(self):
+        """The Livedata error code is taken from the message."""
+        self.assertEqual(metrics.get_error_code(ValueError("`E3001:` Timeout")), "E3001")
+        self.assertEqual(metrics.get_error_code("`E3002:` Device does not support"), "E3002")
+        self.assertEqual(metrics.get_error_code(ValueError("Interface_id is required.")), "other")
+
+    def test_device_session(self):
+        """The session gauge counts the open sessions of a device."""
+        with metrics.device_session("metrics-device"):
+            self.assertEqual(get_sample("nautobot_app_livedata_device_sessions", device="metrics-device"), 1)
+        self.assertEqual(get_sample("nautobot_app_livedata_device_sessions", device="metrics-device"), 0)
+
+    def test_observe_output_size(self):
+        """The output size is observed in bytes."""
+        name = "nautobot_app_livedata_command_output_bytes_sum"
+        before = get_sample(name, platform="metrics-os", queue="default")
+        metrics.observe_output_size("ä" * 10, "metrics-os", "default")
+        self.assertEqual(get_sample(name, platform="metrics-os", queue="default") - before, 20)
+
+    def test_job_failure_is_counted(self):
+        """A failed query job is counted by its error code."""
+        name = "nautobot_app_livedata_failures_total"
+        before = get_sample(name, code="E3001", stage="job")
+        LivedataQueryJob().on_failure(ValueError("`E3001:` Timeout"), "task", (), {}, None)
+        self.assertEqual(get_sample(name, code="E3001", stage="job") - before, 1)
+
+
+class QueryApiMetricsTestCase(TestCase):
+    """Test the metrics of the query API."""
+
+    def test_request_is_counted(self):
+        """Rejected requests are counted and their response time is observed."""
+        self.client.force_login(User.objects.create_user(username="metrics_user", password="password"))
+        url = reverse("plugins-api:nautobot_app_livedata-api:livedata-query-device-api", kwargs={"pk": uuid.uuid4()})
+        requests_before = get_sample(
+            "nautobot_app_livedata_query_requests_total", object_type="dcim.device", status="400"
+        )
+        latency_before = get_sample(
+            "nautobot_app_livedata_api_request_duration_seconds_count", platform="unknown", queue="unknown"
+        )
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(
+            get_sample("nautobot_app_livedata_query_requests_total", object_type="dcim.device", status="400")
+            - requests_before,
+            1,
+        )
+        self.assertEqual(
+            get_sample("nautobot_app_livedata_api_request_duration_seconds_count", platform="unknown", queue="unknown")
+            - latency_before,
+            1,
+        )
+
+    def test_cache_requests_are_counted(self):
+        """Lookups in the caches are counted as hits and misses."""
+        name = "nautobot_app_livedata_cache_requests_total"
+        before = get_sample(name, cache="result_output", result="miss")
+        metrics.count_cache_request("result_output", False)
+        self.assertEqual(get_sample(name, cache="result_output", result="miss") - before, 1)
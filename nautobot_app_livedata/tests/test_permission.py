@@ -1,12 +1,18 @@
 """Test cases for the PermissionUtils classes."""
 
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from nautobot.apps.testing import TestCase
 from nautobot.core.models import ContentType
 from nautobot.dcim.models import Device
+from nautobot.extras.models import Job
 from nautobot.users.models import ObjectPermission
 
 from .conftest import wait_for_debugger_connection
-from nautobot_app_livedata.utilities.permission import create_permission
+from nautobot_app_livedata.utilities.permission import create_permission, query_permission_cache
 
 
 class TestPermission(TestCase):
@@ -44,3 +50,62 @@ class TestPermission(TestCase):
         self.assertEqual(pu.actions, ["can_interact"])
         self.assertEqual(pu.description, "Interact with devices without permission to change device configurations.")
         self.assertEqual(str(pu.object_types.first()), "dcim | device")
+
+    def test_permission_up_to_date_is_not_saved(self):
+        """An existing permission with the content type is checked with two queries and not saved."""
+        db_objects = {"ContentType": ContentType, "ObjectPermission": ObjectPermission}
+        ctyp = ContentType.objects.get_for_model(Device)
+        kwargs = {
+            "db_objects": db_objects,
+            "name": "livedata.test_permission",
+            "actions_list": ["view"],
+            "description": "Test permission",
+            "content_type": ctyp,
+        }
+        create_permission(**kwargs)
+        with CaptureQueriesContext(connection) as queries:
+            create_permission(**kwargs)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(list(ObjectPermission.objects.get(name="livedata.test_permission").object_types.all()), [ctyp])
+
+
+class TestQueryPermissionCache(TestCase):
+    """Test the cached evaluation of the Livedata query permissions."""
+
+    def setUp(self):
+        """Create a user and the two permissions, not yet assigned."""
+        super().setUp()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="livedata_query_user")
+        self.interact = ObjectPermission.objects.create(name="test.can_interact", actions=["can_interact"])
+        self.interact.object_types.add(ContentType.objects.get_for_model(Device))
+        self.run_job = ObjectPermission.objects.create(name="test.run_job", actions=["run"])
+        self.run_job.object_types.add(ContentType.objects.get_for_model(Job))
+
+    def test_both_permissions_required(self):
+        """The user needs both permissions, the result is cached until a permission changes."""
+        self.assertFalse(query_permission_cache.is_allowed(self.user))
+        self.interact.users.add(self.user)
+        self.assertFalse(query_permission_cache.is_allowed(self.user))
+        self.run_job.users.add(self.user)
+        self.assertTrue(query_permission_cache.is_allowed(self.user))
+        with self.assertNumQueries(0):
+            self.assertTrue(query_permission_cache.is_allowed(self.user))
+        self.run_job.enabled = False
+        self.run_job.save()
+        self.assertFalse(query_permission_cache.is_allowed(self.user))
+
+    def test_permission_via_group(self):
+        """Permissions of the groups of the user count, adding the user to a group invalidates the cache."""
+        group = Group.objects.create(name="livedata-operators")
+        self.interact.groups.add(group)
+        self.run_job.groups.add(group)
+        self.assertFalse(query_permission_cache.is_allowed(self.user))
+        self.user.groups.add(group)
+        self.assertTrue(query_permission_cache.is_allowed(self.user))
+
+    def test_superuser(self):
+        """Superusers are allowed without a query."""
+        superuser = get_user_model().objects.create_superuser(username="livedata_query_admin")
+        with self.assertNumQueries(0):
+            self.assertTrue(query_permission_cache.is_allowed(superuser))
@@ -1,10 +1,15 @@
 """Unit tests for Get Primary Device."""
 
+from unittest.mock import Mock
+
 from django.contrib.auth import get_user_model
 from nautobot.apps.testing import TestCase
 
 from .conftest import create_db_data, wait_for_debugger_connection
-from nautobot_app_livedata.utilities.primarydevice import PrimaryDeviceUtils
+from nautobot_app_livedata.utilities.primarydevice import (
+    get_livedata_commands_for_device,
+    PrimaryDeviceUtils,
+)
 
 User = get_user_model()
 
@@ -89,3 +94,69 @@ class PrimaryDeviceTest(TestCase):
         comp = self.device_list[3]
         with self.assertRaises(ValueError):
             _ = PrimaryDeviceUtils("dcim.device", comp.pk).primary_device
+
+
+class PrimaryDeviceResolveManyTest(TestCase):
+    """Test PrimaryDeviceUtils.resolve_many."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for the test class, see PrimaryDeviceTest for the devices."""
+        cls.device_list = create_db_data()
+
+    def assert_same_as_single(self, object_type, pks):
+        """Check that resolve_many returns the same as PrimaryDeviceUtils for every object."""
+        results, errors = PrimaryDeviceUtils.resolve_many(object_type, pks)
+        self.assertEqual(len(results) + len(errors), len(pks))
+        for pk in pks:
+            try:
+                expected = PrimaryDeviceUtils(object_type, pk).to_dict()
+            except ValueError as err:
+                self.assertEqual(errors[str(pk)], str(err))
+            else:
+                self.assertEqual(results[str(pk)], {**expected, "pk": str(pk)})
+
+    def test_devices(self):
+        """Devices are resolved like the single resolver does."""
+        self.assert_same_as_single("dcim.device", [device.pk for device in self.device_list])
+
+    def test_interfaces(self):
+        """Interfaces are resolved like the single resolver does."""
+        self.assert_same_as_single(
+            "dcim.interface",
+            [device.interfaces.first().pk for device in self.device_list if device.interfaces.exists()],
+        )
+
+    def test_virtual_chassis(self):
+        """Virtual chassis are resolved like the single resolver does."""
+        pks = {device.virtual_chassis_id for device in self.device_list if device.virtual_chassis_id}
+        self.assert_same_as_single("dcim.virtualchassis", list(pks))
+
+    def test_constant_number_of_queries(self):
+        """The number of queries does not depend on the number of objects."""
+        pks = [device.pk for device in self.device_list]
+        PrimaryDeviceUtils.resolve_many("dcim.device", pks[:1])  # warm up the PREFER_IPV4 config lookup
+        with self.assertNumQueries(2):  # devices and the members of their virtual chassis
+            PrimaryDeviceUtils.resolve_many("dcim.device", pks)
+
+    def test_missing_and_invalid(self):
+        """Unknown objects and an invalid object type are reported."""
+        _, errors = PrimaryDeviceUtils.resolve_many("dcim.device", ["00000000-0000-0000-0000-000000000000", "x"])
+        self.assertEqual(
+            errors, {"00000000-0000-0000-0000-000000000000": "Device does not exist", "x": "Device does not exist"}
+        )
+        with self.assertRaises(ValueError):
+            PrimaryDeviceUtils.resolve_many("dcim.rack", [])
+
+
+class LivedataCommandsTest(TestCase):
+    """Test the parsing of the platform commands."""
+
+    def test_commands_are_parsed(self):
+        """One command per line of the custom field, without trailing whitespace."""
+        device = Mock()
+        device.platform.network_driver = "cisco_ios"
+        device.platform.custom_field_data = {"livedata_device_commands": "show version  \nshow clock\n"}
+        self.assertEqual(get_livedata_commands_for_device(device), ["show version", "show clock"])
+        device.platform.custom_field_data = {"livedata_device_commands": None}
+        self.assertEqual(get_livedata_commands_for_device(device), [])
@@ -0,0 +1,68 @@
+"""Unit tests for the primary device cache."""
+
+from unittest.mock import patch
+
+from django.conf import settings
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import Status
+
+from .conftest import create_db_data
+from nautobot_app_livedata.utilities.primarydevice import PrimaryDeviceUtils
+from nautobot_app_livedata.utilities.primarydevicecache import PrimaryDeviceCache
+
+APP_SETTINGS = settings.PLUGINS_CONFIG["nautobot_app_livedata"]
+
+
+class PrimaryDeviceCacheTest(TestCase):
+    """Test the PrimaryDeviceCache class."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for the test class."""
+        cls.device_list = create_db_data()
+
+    def setUp(self):
+        """Use a fresh cache generation for each test."""
+        super().setUp()
+        self.cache = PrimaryDeviceCache()
+        self.cache.invalidate()
+
+    def test_hit_after_miss(self):
+        """The second resolution is served from the cache."""
+        device = self.device_list[0]
+        with patch(
+            "nautobot_app_livedata.utilities.primarydevicecache.PrimaryDeviceUtils",
+            wraps=PrimaryDeviceUtils,
+        ) as mock_utils:
+            first = self.cache.resolve("dcim.device", device.pk)
+            second = self.cache.resolve("dcim.device", device.pk)
+        self.assertEqual(mock_utils.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second["primary_device"], device.pk)
+        self.assertEqual(self.cache.cache_info(), {"hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_errors_are_cached(self):
+        """A failed resolution raises the same ValueError from the cache."""
+        device = self.device_list[1]  # no primary IP and not a VC member
+        for _ in range(2):
+            with self.assertRaisesRegex(ValueError, "primary IP address"):
+                self.cache.resolve("dcim.device", device.pk)
+        self.assertEqual(self.cache.cache_info()["hits"], 1)
+
+    def test_invalidated_on_device_save(self):
+        """Saving a device starts a new cache generation."""
+        device = self.device_list[0]
+        self.cache.resolve("dcim.device", device.pk)
+        device.status = Status.objects.get(name="Planned")
+        device.save()
+        with self.assertRaisesRegex(ValueError, "not 'Active'"):
+            self.cache.resolve("dcim.device", device.pk)
+        self.assertEqual(self.cache.cache_info()["misses"], 2)
+
+    def test_disabled(self):
+        """With a timeout of 0 nothing is cached."""
+        device = self.device_list[0]
+        with patch.dict(APP_SETTINGS, {"primary_device_cache_timeout": 0}):
+            self.cache.resolve("dcim.device", device.pk)
+            self.cache.resolve("dcim.device", device.pk)
+        self.assertEqual(self.cache.cache_info(), {"hits": 0, "misses": 0, "hit_rate": 0.0})
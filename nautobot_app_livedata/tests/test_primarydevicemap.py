@@ -0,0 +1,111 @@
+"""Unit tests for the materialized primary device map."""
+
+import logging
+from unittest.mock import patch
+
+from django.conf import settings
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import Status
+
+from .conftest import create_db_data
+from nautobot_app_livedata.jobs.jobs import LivedataRebuildPrimaryDeviceMapJob
+from nautobot_app_livedata.models import PrimaryDeviceMap
+from nautobot_app_livedata.utilities import primarydevicemap
+from nautobot_app_livedata.utilities.primarydevice import PrimaryDeviceUtils
+from nautobot_app_livedata.utilities.primarydevicecache import PrimaryDeviceCache
+
+APP_SETTINGS = settings.PLUGINS_CONFIG["nautobot_app_livedata"]
+
+
+class PrimaryDeviceMapTest(TestCase):
+    """Test building, updating and reading the primary device map."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for the test class, see PrimaryDeviceTest for the devices."""
+        cls.device_list = create_db_data()
+
+    def setUp(self):
+        """Enable the map for each test."""
+        super().setUp()
+        patcher = patch.dict(APP_SETTINGS, {"primary_device_map_enabled": True, "primary_device_cache_timeout": 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rebuild_matches_resolver(self):
+        """The rebuilt map contains the same results and errors as PrimaryDeviceUtils."""
+        stale = PrimaryDeviceMap.objects.create(
+            object_type="dcim.device", object_id="00000000-0000-0000-0000-000000000000"
+        )
+        counts = primarydevicemap.rebuild(batch_size=3)
+        self.assertEqual(counts["removed"], 1)
+        self.assertFalse(PrimaryDeviceMap.objects.filter(pk=stale.pk).exists())
+        for device in self.device_list:
+            entry = PrimaryDeviceMap.objects.get(object_type="dcim.device", object_id=device.pk)
+            try:
+                expected = PrimaryDeviceUtils("dcim.device", device.pk).to_dict()
+            except ValueError as err:
+                self.assertEqual(entry.error, str(err))
+            else:
+                self.assertEqual(entry.to_dict(), expected)
+                self.assertEqual(entry.status, "Active")
+                self.assertTrue(entry.primary_ip)
+
+    def test_lookup_uses_map(self):
+        """PrimaryDeviceCache reads the map with a single query."""
+        device = self.device_list[0]
+        primarydevicemap.update_entries("dcim.device", [device.pk])
+        with self.assertNumQueries(1):
+            result = PrimaryDeviceCache().resolve("dcim.device", device.pk)
+        self.assertEqual(result["primary_device"], device.pk)
+
+    def test_primary_device_deleted_during_update(self):
+        """An object whose primary device is deleted after it was resolved is skipped."""
+        device = self.device_list[0]
+        resolve_many = PrimaryDeviceUtils.resolve_many
+
+        def resolve_and_delete(object_type, pks):
+            resolved = resolve_many(object_type, pks)
+            device.delete()
+            return resolved
+
+        with patch.object(PrimaryDeviceUtils, "resolve_many", side_effect=resolve_and_delete):
+            self.assertEqual(primarydevicemap.update_entries("dcim.device", [device.pk]), 0)
+        self.assertFalse(PrimaryDeviceMap.objects.filter(object_type="dcim.device", object_id=device.pk).exists())
+
+    def test_resolve_many_falls_back_for_missing_entries(self):
+        """Objects that are not in the map are resolved live."""
+        primarydevicemap.update_entries("dcim.device", [self.device_list[0].pk])
+        pks = [self.device_list[0].pk, self.device_list[2].pk]
+        results, errors = primarydevicemap.resolve_many("dcim.device", pks)
+        self.assertEqual(set(results), {str(pk) for pk in pks})
+        self.assertEqual(errors, {})
+
+    def test_signals_update_map(self):
+        """Saving a device updates its entry and the entries of its interfaces after commit."""
+        device = self.device_list[0]
+        primarydevicemap.rebuild()
+        device.status = Status.objects.get(name="Planned")
+        with self.captureOnCommitCallbacks(execute=True):
+            device.save()
+        entry = PrimaryDeviceMap.objects.get(object_type="dcim.device", object_id=device.pk)
+        self.assertIn("not 'Active'", entry.error)
+        interface_entry = PrimaryDeviceMap.objects.get(
+            object_type="dcim.interface", object_id=device.interfaces.first().pk
+        )
+        self.assertEqual(interface_entry.error, "Device status is not 'Active'")
+
+    def test_signals_ignored_when_disabled(self):
+        """Without the setting no entries are written."""
+        with patch.dict(APP_SETTINGS, {"primary_device_map_enabled": False}):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.device_list[0].save()
+        self.assertFalse(PrimaryDeviceMap.objects.exists())
+
+    def test_rebuild_job(self):
+        """The job rebuilds the map and reports the counts."""
+        job = LivedataRebuildPrimaryDeviceMapJob()
+        job.logger = logging.getLogger(__name__)
+        summary = job.run(batch_size=100)
+        self.assertIn(f"Wrote {len(self.device_list)} device", summary)
+        self.assertEqual(PrimaryDeviceMap.objects.filter(object_type="dcim.device").count(), len(self.device_list))
@@ -4,11 +4,13 @@ from __future__ import annotations
 
 import logging
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from nautobot.apps.testing import TestCase
 from nautobot.extras.choices import JobQueueTypeChoices
 from nautobot.extras.models import Job as JobModel, JobQueue
 
-from nautobot_app_livedata.jobs.jobs import EnforceDefaultJobQueueJob
+from nautobot_app_livedata.jobs.queues import EnforceDefaultJobQueueJob
 
 
 class EnforceDefaultJobQueueJobTestCase(TestCase):
@@ -74,3 +76,40 @@ class EnforceDefaultJobQueueJobTestCase(TestCase):
         self.job.refresh_from_db()
         self.assertEqual(self.job.default_job_queue, custom_queue)
         self.assertEqual(list(self.job.job_queues.all()), [custom_queue])
+
+    def _create_misaligned_jobs(self, count: int) -> list[JobModel]:
+        """Create jobs that use the alternative queue."""
+        jobs = []
+        for index in range(count):
+            job = JobModel.objects.create(
+                module_name="test.module",
+                job_class_name=f"SampleJob{index}",
+                grouping="Tests",
+                name=f"Sample Job {index}",
+                description="",
+                default_job_queue=self.alt_queue,
+                enabled=True,
+            )
+            job.job_queues.set([self.alt_queue, self.default_queue])
+            jobs.append(job)
+        return jobs
+
+    def _count_queries(self) -> int:
+        """Return the number of queries of a non dry-run alignment."""
+        with CaptureQueriesContext(connection) as queries:
+            self.runner.run(dry_run=False)
+        return len(queries)
+
+    def test_constant_number_of_queries(self) -> None:
+        """The number of queries does not depend on the number of jobs to align."""
+        queries_for_one_job = self._count_queries()
+        self.job.default_job_queue = self.alt_queue
+        self.job.save()
+        self.job.job_queues.set([self.alt_queue])
+        jobs = self._create_misaligned_jobs(10)
+
+        self.assertEqual(self._count_queries(), queries_for_one_job)
+        for job in [self.job, *jobs]:
+            job.refresh_from_db()
+            self.assertEqual(job.default_job_queue, self.default_queue)
+            self.assertEqual(list(job.job_queues.all()), [self.default_queue])
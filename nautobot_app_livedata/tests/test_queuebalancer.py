@@ -0,0 +1,133 @@
+"""Tests for the runtime-aware job queue balancer."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+from unittest.mock import patch
+
+from django.utils import timezone
+from nautobot.apps.testing import TestCase
+from nautobot.extras.choices import JobQueueTypeChoices
+from nautobot.extras.models import Job as JobModel, JobQueue, JobResult
+
+from nautobot_app_livedata.jobs.queues import LivedataBalanceJobQueuesJob
+from nautobot_app_livedata.utilities import queuebalancer
+from nautobot_app_livedata.utilities.queuebalancer import JobLoad
+
+
+class ProposeAssignmentTestCase(TestCase):
+    """Test the assignment heuristic."""
+
+    def test_short_jobs_stay_on_interactive_queue(self):
+        """Jobs below the threshold are assigned to the interactive queue, long jobs to the other queues."""
+        loads = {"short": JobLoad(100, 500), "long": JobLoad(10, 3000)}
+        assignment = queuebalancer.propose_assignment(loads, loads, ["ui", "batch"], "ui")
+        self.assertEqual(assignment, {"short": "ui", "long": "batch"})
+
+    def test_interactive_jobs_are_pinned(self):
+        """The interactive jobs stay on the interactive queue even if they are slow."""
+        loads = {"livedata": JobLoad(10, 3000)}
+        assignment = queuebalancer.propose_assignment(loads, loads, ["ui", "batch"], "ui", ["livedata"])
+        self.assertEqual(assignment, {"livedata": "ui"})
+
+    def test_long_jobs_are_balanced(self):
+        """The largest loads are spread over the queues, the smaller loads fill the least loaded queue."""
+        loads = {"a": JobLoad(1, 900), "b": JobLoad(1, 600), "c": JobLoad(1, 400), "d": JobLoad(1, 200)}
+        assignment = queuebalancer.propose_assignment(loads, loads, ["ui", "q1", "q2"], "ui")
+        self.assertEqual(assignment, {"a": "q1", "b": "q2", "c": "q2", "d": "q1"})
+
+    def test_jobs_without_history_are_skipped(self):
+        """Jobs without a runtime history are not assigned."""
+        assignment = queuebalancer.propose_assignment(["new"], {}, ["ui", "batch"], "ui")
+        self.assertEqual(assignment, {})
+
+    def test_without_other_queue_all_jobs_use_interactive_queue(self):
+        """Long-running jobs stay on the interactive queue if there is no other queue."""
+        loads = {"long": JobLoad(1, 3000)}
+        self.assertEqual(queuebalancer.propose_assignment(loads, loads, ["ui"], "ui"), {"long": "ui"})
+
+    def test_estimate_wait_seconds(self):
+        """The wait grows with the utilization and is None for a saturated queue."""
+        self.assertEqual(queuebalancer.estimate_wait_seconds(0, 0, 3600, 1), 0.0)
+        self.assertIsNone(queuebalancer.estimate_wait_seconds(3600, 10, 3600, 1))
+        low = queuebalancer.estimate_wait_seconds(360, 10, 3600, 1)
+        high = queuebalancer.estimate_wait_seconds(2880, 80, 3600, 1)
+        self.assertLess(low, high)
+        # M/M/1: Wq = rho / (1 - rho) * mean runtime
+        self.assertAlmostEqual(low, 0.1 / 0.9 * 36)
+        self.assertLess(queuebalancer.estimate_wait_seconds(2880, 80, 3600, 2), high)
+
+
+class LivedataBalanceJobQueuesJobTestCase(TestCase):
+    """Test the LivedataBalanceJobQueuesJob."""
+
+    databases = ("default", "job_logs")
+
+    def setUp(self):
+        """Create queues, jobs and their runtime history."""
+        super().setUp()
+        self.ui_queue = JobQueue.objects.create(name="livedata-ui", queue_type=JobQueueTypeChoices.TYPE_CELERY)
+        self.batch_queue = JobQueue.objects.create(name="batch", queue_type=JobQueueTypeChoices.TYPE_CELERY)
+        self.short_job = self._create_job("ShortJob", self.batch_queue)
+        self.long_job = self._create_job("LongJob", self.ui_queue)
+        self._create_runs(self.short_job, 20, seconds=2)
+        self._create_runs(self.long_job, 5, seconds=600)
+        self.runner = LivedataBalanceJobQueuesJob()
+        self.runner.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def _create_job(job_class_name, queue):
+        job = JobModel.objects.create(
+            module_name="test.module",
+            job_class_name=job_class_name,
+            grouping="Tests",
+            name=job_class_name,
+            default_job_queue=queue,
+            enabled=True,
+        )
+        job.job_queues.set([queue])
+        return job
+
+    @staticmethod
+    def _create_runs(job, count, seconds):
+        now = timezone.now()
+        for index in range(count):
+            date_started = now - timedelta(hours=index + 1)
+            JobResult.objects.create(
+                name=job.name,
+                job_model=job,
+                status="SUCCESS",
+                date_started=date_started,
+                date_done=date_started + timedelta(seconds=seconds),
+            )
+
+    def _run(self, dry_run):
+        with patch("nautobot_app_livedata.jobs.queues.get_celery_queues", return_value={"livedata-ui": 2, "batch": 1}):
+            return self.runner.run(
+                interactive_queue=self.ui_queue,
+                job_queues=[self.batch_queue],
+                dry_run=dry_run,
+                history_days=7,
+                long_running_seconds=60,
+            )
+
+    def test_dry_run_reports_without_changes(self):
+        """The dry run reports the moves and the projected waits without changing the jobs."""
+        summary = self._run(dry_run=True)
+        self.assertIn("Would move 2 of 2 jobs", summary)
+        self.assertIn("livedata-ui: 1 -> 1 jobs", summary)
+        self.long_job.refresh_from_db()
+        self.assertEqual(self.long_job.default_job_queue, self.ui_queue)
+
+    def test_apply_moves_jobs(self):
+        """The jobs get the proposed default queue and keep their other queues."""
+        summary = self._run(dry_run=False)
+        self.assertIn("Moved 2 of 2 jobs", summary)
+        self.short_job.refresh_from_db()
+        self.long_job.refresh_from_db()
+        self.assertEqual(self.short_job.default_job_queue, self.ui_queue)
+        self.assertEqual(self.long_job.default_job_queue, self.batch_queue)
+        self.assertTrue(self.long_job.default_job_queue_override)
+        self.assertEqual(set(self.long_job.job_queues.all()), {self.ui_queue, self.batch_queue})
+        self.assertIn("Would move 0 of 2 jobs", self._run(dry_run=True))
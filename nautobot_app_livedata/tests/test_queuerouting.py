@@ -0,0 +1,141 @@
+"""Tests for the routing of Livedata jobs to job queues."""
+
+from unittest.mock import Mock, patch
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.checks import registry
+from nautobot.apps.testing import TestCase
+from nautobot.dcim.models import Device, Location, LocationType
+from nautobot.extras.models import Status
+from nautobot.tenancy.models import Tenant
+
+from .conftest import create_db_data
+from nautobot_app_livedata.utilities.queuerouting import (
+    check_queue_workers,
+    get_device_affinity_queue,
+    get_query_job_queues,
+    get_query_queue_role,
+    get_query_task_queue,
+    get_queue_for_role,
+    get_routed_queues,
+)
+
+APP_SETTINGS = settings.PLUGINS_CONFIG["nautobot_app_livedata"]
+ROUTING = {"interactive": "livedata-ui", "bulk": "livedata-bulk", "maintenance": None}
+
+
+class QueueRoutingTest(TestCase):
+    """Test the queue routing helpers."""
+
+    def test_role_from_authentication(self):
+        """Token authenticated requests are bulk work, session requests are interactive."""
+        self.assertEqual(get_query_queue_role(Mock(auth=None)), "interactive")
+        self.assertEqual(get_query_queue_role(Mock(auth=Mock())), "bulk")
+
+    def test_unconfigured_roles_use_default_queue(self):
+        """Without routing every role uses query_job_task_queue."""
+        for role in ("interactive", "bulk", "maintenance"):
+            self.assertEqual(get_queue_for_role(role), APP_SETTINGS["query_job_task_queue"])
+        self.assertEqual(get_routed_queues(), [APP_SETTINGS["query_job_task_queue"]])
+
+    def test_configured_routing(self):
+        """Configured roles are routed to their own queue."""
+        with patch.dict(APP_SETTINGS, {"query_job_queue_routing": ROUTING}):
+            self.assertEqual(get_query_task_queue(Mock(auth=None)), "livedata-ui")
+            self.assertEqual(get_query_task_queue(Mock(auth=Mock())), "livedata-bulk")
+            self.assertEqual(get_queue_for_role("maintenance"), APP_SETTINGS["query_job_task_queue"])
+            self.assertEqual(
+                get_routed_queues(),
+                ["livedata-ui", "livedata-bulk", APP_SETTINGS["query_job_task_queue"]],
+            )
+
+
+class DeviceAffinityQueueTest(TestCase):
+    """Test the location and tenant affinity of the query job."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Place a device in a location tree and assign a tenant."""
+        device = create_db_data()[0]
+        region_type = LocationType.objects.create(name="Affinity Region")
+        site_type = LocationType.objects.create(name="Affinity Site", parent=region_type)
+        site_type.content_types.add(ContentType.objects.get_for_model(Device))
+        status = Status.objects.get_for_model(Location).first()
+        cls.region = Location.objects.create(name="APAC", location_type=region_type, status=status)
+        cls.site = Location.objects.create(name="Singapore", location_type=site_type, parent=cls.region, status=status)
+        cls.tenant = Tenant.objects.create(name="Affinity Tenant")
+        Device.objects.filter(pk=device.pk).update(location=cls.site, tenant=cls.tenant)
+        cls.device_id = device.pk
+
+    def setUp(self):
+        """Drop the cached device locations of other tests."""
+        super().setUp()
+        cache.clear()
+
+    def _affinity(self, locations=None, tenants=None):
+        """Patch the affinity setting."""
+        return patch.dict(
+            APP_SETTINGS, {"query_job_queue_affinity": {"locations": locations or {}, "tenants": tenants or {}}}
+        )
+
+    def test_no_affinity(self):
+        """Without mappings no queue is returned."""
+        self.assertIsNone(get_device_affinity_queue(self.device_id))
+        with self._affinity(locations={"EMEA": "emea"}):
+            self.assertIsNone(get_device_affinity_queue(self.device_id))
+
+    def test_location_tree(self):
+        """A mapping of a parent location applies, the nearest location wins."""
+        with self._affinity(locations={"APAC": "apac"}, tenants={"Affinity Tenant": "tenant"}):
+            self.assertEqual(get_device_affinity_queue(self.device_id), "apac")
+        with self._affinity(locations={"APAC": "apac", "APAC/Singapore": "sin"}):
+            self.assertEqual(get_device_affinity_queue(self.device_id), "sin")
+        with self._affinity(locations={"APAC": "apac", str(self.site.pk): "sin"}):
+            self.assertEqual(get_device_affinity_queue(self.device_id), "sin")
+
+    def test_location_name_is_not_unique(self):
+        """A location name alone does not match a location below the root, it may exist under several parents."""
+        with self._affinity(locations={"Singapore": "sin"}):
+            self.assertIsNone(get_device_affinity_queue(self.device_id))
+
+    def test_device_location_is_cached(self):
+        """The location tree of the device is looked up once, a location change drops it."""
+        with self._affinity(locations={"APAC": "apac"}):
+            get_device_affinity_queue(self.device_id)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_device_affinity_queue(self.device_id), "apac")
+            self.region.name = "Asia"
+            self.region.save()
+            self.assertIsNone(get_device_affinity_queue(self.device_id))
+
+    def test_tenant(self):
+        """The tenant mapping applies if no location matches."""
+        with self._affinity(locations={"EMEA": "emea"}, tenants={"Affinity Tenant": "tenant"}):
+            self.assertEqual(get_device_affinity_queue(self.device_id), "tenant")
+            self.assertEqual(get_query_job_queues(), [APP_SETTINGS["query_job_task_queue"], "emea", "tenant"])
+
+
+class CheckQueueWorkersTest(TestCase):
+    """Test the system check for routed queues without workers."""
+
+    @patch("nautobot.extras.utils.get_celery_queues")
+    def test_check_skipped_without_routing(self, mock_get_celery_queues):
+        """The Celery workers are not inspected when no routing is configured."""
+        self.assertEqual(check_queue_workers(), [])
+        mock_get_celery_queues.assert_not_called()
+
+    def test_check_is_a_deployment_check(self):
+        """The Celery workers are only inspected by `check --deploy`, not at every startup."""
+        self.assertIn(check_queue_workers, registry.registry.get_checks(include_deployment_checks=True))
+        self.assertNotIn(check_queue_workers, registry.registry.get_checks())
+
+    @patch("nautobot.extras.utils.get_celery_queues", return_value={"default": 1, "livedata-ui": 2})
+    def test_check_warns_for_queue_without_worker(self, _mock_get_celery_queues):
+        """A warning is returned for every routed queue without a worker."""
+        with patch.dict(APP_SETTINGS, {"query_job_queue_routing": ROUTING}):
+            warnings = check_queue_workers()
+        self.assertEqual(len(warnings), 1)
+        self.assertEqual(warnings[0].id, "nautobot_app_livedata.W001")
+        self.assertIn("livedata-bulk", warnings[0].msg)
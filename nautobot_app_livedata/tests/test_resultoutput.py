@@ -0,0 +1,104 @@
+"""Tests for the per-command output of Livedata query JobResults."""
+
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import Job, JobResult
+
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities import resultoutput
+
+User = get_user_model()
+
+OUTPUT = [
+    {"command": "show version", "stdout": "Version 1.0\nUptime 1 day", "stderr": ""},
+    {"command": "show logging", "stdout": "x" * 1000, "stderr": "truncated"},
+]
+
+
+class ResultOutputTestCase(TestCase):
+    """Test summarize_result, get_result_summary and get_command_output."""
+
+    def setUp(self):
+        """Create a finished and a pending JobResult."""
+        super().setUp()
+        cache.clear()
+        job = Job.objects.get(name=PLUGIN_SETTINGS["query_job_name"])
+        self.job_result = JobResult.objects.create(name=job.name, job_model=job, status="SUCCESS", result=OUTPUT)
+        self.pending = JobResult.objects.create(name=job.name, job_model=job, status="PENDING")
+
+    def test_summarize_result(self):
+        """The summary has the size of the outputs but not the outputs."""
+        self.assertEqual(
+            resultoutput.summarize_result(OUTPUT),
+            [
+                {"index": 0, "command": "show version", "size": 24, "lines": 2, "stderr_size": 0},
+                {"index": 1, "command": "show logging", "size": 1000, "lines": 1, "stderr_size": 9},
+            ],
+        )
+        self.assertEqual(resultoutput.summarize_result(None), [])
+
+    def test_summary_of_finished_result_is_cached(self):
+        """The summary of a finished JobResult is served from the cache."""
+        summary = resultoutput.get_result_summary(self.job_result.pk)
+        self.assertEqual(summary["status"], "SUCCESS")
+        self.assertEqual([command["command"] for command in summary["commands"]], ["show version", "show logging"])
+        with self.assertNumQueries(0):
+            self.assertEqual(resultoutput.get_result_summary(self.job_result.pk), summary)
+
+    def test_summary_of_pending_result_is_not_cached(self):
+        """A pending JobResult is read again on the next poll."""
+        self.assertEqual(resultoutput.get_result_summary(self.pending.pk)["commands"], [])
+        self.pending.status = "SUCCESS"
+        self.pending.result = OUTPUT
+        self.pending.save()
+        self.assertEqual(len(resultoutput.get_result_summary(self.pending.pk)["commands"]), 2)
+
+    def test_get_command_output(self):
+        """Only the requested command is returned."""
+        self.assertEqual(
+            resultoutput.get_command_output(self.job_result.pk, 1),
+            {"index": 1, "command": "show logging", "stdout": "x" * 1000, "stderr": "truncated"},
+        )
+        self.assertIsNone(resultoutput.get_command_output(self.job_result.pk, 2))
+        self.assertIsNone(resultoutput.get_command_output(self.pending.pk, 0))
+
+
+class JobResultOutputApiTestCase(TestCase):
+    """Test the JobResult output API."""
+
+    def setUp(self):
+        """Create a JobResult and log in as superuser."""
+        super().setUp()
+        cache.clear()
+        job = Job.objects.get(name=PLUGIN_SETTINGS["query_job_name"])
+        self.job_result = JobResult.objects.create(name=job.name, job_model=job, status="SUCCESS", result=OUTPUT)
+        self.superuser = User.objects.create_superuser(username="output_admin", password="password")
+        self.client.force_login(self.superuser)
+
+    def _get_url(self, **kwargs):
+        name = "livedata-jobresult-command-output-api" if "index" in kwargs else "livedata-jobresult-output-api"
+        return reverse(f"plugins-api:nautobot_app_livedata-api:{name}", kwargs={"pk": self.job_result.pk, **kwargs})
+
+    def test_summary(self):
+        """The summary lists the commands without their output."""
+        response = self.client.get(self._get_url())
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()["status"], "SUCCESS")
+        self.assertEqual(len(response.json()["commands"]), 2)
+        self.assertNotIn("Uptime", response.content.decode())
+
+    def test_command_output(self):
+        """The output of one command is returned, an unknown index is not found."""
+        response = self.client.get(self._get_url(index=0))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()["stdout"], OUTPUT[0]["stdout"])
+        self.assertEqual(self.client.get(self._get_url(index=5)).status_code, HTTPStatus.NOT_FOUND)
+
+    def test_permission_denied(self):
+        """Users without the permission to interact with devices are rejected."""
+        self.client.force_login(User.objects.create_user(username="output_user", password="password"))
+        self.assertEqual(self.client.get(self._get_url()).status_code, HTTPStatus.FORBIDDEN)
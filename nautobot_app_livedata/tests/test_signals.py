@@ -0,0 +1,76 @@
+"""Tests for the database ready callback of the app."""
+
+from unittest.mock import patch
+
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import CustomField
+from nautobot.users.models import ObjectPermission
+
+from nautobot_app_livedata import signals
+from nautobot_app_livedata.models import ProvisioningState
+
+
+class DatabaseReadyCallbackTestCase(TestCase):
+    """Test the provisioning fingerprint of nautobot_database_ready_callback."""
+
+    def setUp(self):
+        """Start every test with a migrated database that was not provisioned in this process."""
+        super().setUp()
+        state = signals.AppDbReadyState()
+        state.is_dcim_ready = state.is_extras_ready = state.is_nautobot_app_livedata_ready = True
+        patcher = patch.object(signals, "app_db_ready_state", state)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sender = apps.get_app_config("nautobot_app_livedata")
+
+    def test_provisions_and_stores_fingerprint(self):
+        """The first run creates the objects and stores the fingerprint."""
+        ProvisioningState.objects.all().delete()
+        with patch.object(signals, "_enable_job", return_value=True):
+            signals.nautobot_database_ready_callback(sender=self.sender)
+        self.assertTrue(ObjectPermission.objects.filter(name="livedata.interact_with_devices").exists())
+        self.assertTrue(CustomField.objects.filter(key="livedata_device_commands").exists())
+        state = ProvisioningState.objects.get(name=signals.PROVISIONING_STATE_NAME)
+        self.assertEqual(state.fingerprint, signals.get_provisioning_fingerprint())
+
+    def test_matching_fingerprint_skips_provisioning(self):
+        """With a matching fingerprint the callback only runs one query."""
+        ProvisioningState.objects.update_or_create(
+            name=signals.PROVISIONING_STATE_NAME, defaults={"fingerprint": signals.get_provisioning_fingerprint()}
+        )
+        with patch.object(signals, "create_permission") as mock_create_permission:
+            with CaptureQueriesContext(connection) as queries:
+                signals.nautobot_database_ready_callback(sender=self.sender)
+        mock_create_permission.assert_not_called()
+        self.assertEqual(len([query for query in queries if "SAVEPOINT" not in query["sql"]]), 1)
+        self.assertTrue(signals.app_db_ready_state.already_initialized)
+
+    def test_changed_fingerprint_provisions_again(self):
+        """A changed definition or app version provisions the objects again."""
+        ProvisioningState.objects.update_or_create(
+            name=signals.PROVISIONING_STATE_NAME, defaults={"fingerprint": "outdated"}
+        )
+        with patch.object(signals, "_enable_job", return_value=True):
+            with patch.object(signals, "create_permission") as mock_create_permission:
+                signals.nautobot_database_ready_callback(sender=self.sender)
+        self.assertEqual(mock_create_permission.call_count, len(signals.PERMISSIONS))
+        self.assertEqual(
+            ProvisioningState.objects.get(name=signals.PROVISIONING_STATE_NAME).fingerprint,
+            signals.get_provisioning_fingerprint(),
+        )
+
+    def test_missing_job_does_not_store_fingerprint(self):
+        """If a job is not registered yet, the next run provisions again."""
+        ProvisioningState.objects.all().delete()
+        with patch.object(signals, "_enable_job", return_value=False):
+            signals.nautobot_database_ready_callback(sender=self.sender)
+        self.assertFalse(ProvisioningState.objects.exists())
+
+    def test_fingerprint_changes_with_definitions(self):
+        """The fingerprint depends on the definitions."""
+        fingerprint = signals.get_provisioning_fingerprint()
+        with patch.object(signals, "CUSTOM_FIELDS", [{**signals.CUSTOM_FIELDS[0], "weight": 1}]):
+            self.assertNotEqual(signals.get_provisioning_fingerprint(), fingerprint)
@@ -0,0 +1,86 @@
+"""Unit tests for the inline job runner."""
+
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from nautobot.apps.testing import TestCase
+
+from nautobot_app_livedata.utilities import syncjob
+from nautobot_app_livedata.utilities.syncjob import SyncJobRunner
+
+
+class SyncJobRunnerTest(TestCase):
+    """Test the SyncJobRunner class."""
+
+    def test_disabled_runner_returns_none(self):
+        """A runner without workers never accepts a job."""
+        runner = SyncJobRunner(0)
+        self.assertIsNone(runner.submit(Mock(), Mock(), "default", {}))
+
+    def test_saturated_runner_returns_none(self):
+        """A second job is rejected while the only slot is busy and accepted again afterwards."""
+        runner = SyncJobRunner(1)
+        release = threading.Event()
+        job_result = Mock(pk="job-result-pk")
+
+        def blocking_run(*args, **kwargs):
+            release.wait(timeout=5)
+            return job_result
+
+        with (
+            patch.object(SyncJobRunner, "_create_job_result", return_value=job_result),
+            patch.object(SyncJobRunner, "_run", side_effect=blocking_run),
+        ):
+            first = runner.submit(Mock(), Mock(), "default", {})
+            self.assertIsNotNone(first)
+            self.assertIsNone(runner.submit(Mock(), Mock(), "default", {}))
+            release.set()
+            self.assertIs(first[1].result(timeout=5), job_result)
+            # The slot is released by a done callback, which may run just after result() returns.
+            second = None
+            for _ in range(50):
+                second = runner.submit(Mock(), Mock(), "default", {})
+                if second is not None:
+                    break
+                threading.Event().wait(0.01)
+            self.assertIsNotNone(second)
+            second[1].result(timeout=5)
+
+    def test_create_job_result_failure_releases_slot(self):
+        """The slot is released when the JobResult cannot be created."""
+        runner = SyncJobRunner(1)
+        with patch.object(SyncJobRunner, "_create_job_result", side_effect=RuntimeError("database down")):
+            with self.assertRaises(RuntimeError):
+                runner.submit(Mock(), Mock(), "default", {})
+        with (
+            patch.object(SyncJobRunner, "_create_job_result", return_value=Mock(pk="job-result-pk")),
+            patch.object(SyncJobRunner, "_run", return_value=None),
+        ):
+            submitted = runner.submit(Mock(), Mock(), "default", {})
+            self.assertIsNotNone(submitted)
+            submitted[1].result(timeout=5)
+
+    def test_timeout_sets_deadline(self):
+        """The deadline of an inline run is the timeout after the submit."""
+        runner = SyncJobRunner(1, 5)
+        with (
+            patch.object(SyncJobRunner, "_create_job_result", return_value=Mock(pk="job-result-pk")),
+            patch.object(SyncJobRunner, "_run", return_value=None) as mock_run,
+        ):
+            start = time.monotonic()
+            runner.submit(Mock(), Mock(), "default", {})[1].result(timeout=5)
+        deadline = mock_run.call_args.args[3]
+        self.assertGreaterEqual(deadline, start + 5)
+        self.assertLessEqual(deadline, time.monotonic() + 5)
+
+    def test_get_remaining_time(self):
+        """The remaining time is only known in the thread of an inline run."""
+        self.assertIsNone(syncjob.get_remaining_time())
+        syncjob._deadline.value = time.monotonic() + 60
+        try:
+            self.assertGreater(syncjob.get_remaining_time(), 50)
+            syncjob._deadline.value = time.monotonic() - 1
+            self.assertEqual(syncjob.get_remaining_time(), 0.0)
+        finally:
+            syncjob._deadline.value = None
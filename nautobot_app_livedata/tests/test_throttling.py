@@ -0,0 +1,175 @@
+"""Unit tests for the admission control of the query API."""
+
+from http import HTTPStatus
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from nautobot.apps.testing import TestCase as APITransactionTestCase
+from nautobot.extras.models import Job, JobResult
+
+from .conftest import create_db_data
+from nautobot_app_livedata.api.throttling import parse_rate, RateWindow
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities.jobcache import livedata_job_cache
+
+User = get_user_model()
+
+
+class ParseRateTest(APITransactionTestCase):
+    """Test the parse_rate function."""
+
+    def test_parse_rate(self):
+        """Rates are converted to capacity and tokens per second."""
+        self.assertEqual(parse_rate("30/min"), (30, 60))
+        self.assertEqual(parse_rate("2/s"), (2, 1))
+        self.assertEqual(parse_rate("24/day"), (24, 86400))
+        self.assertIsNone(parse_rate(None))
+
+    def test_parse_rate_invalid(self):
+        """Invalid rates raise ValueError."""
+        for rate in ("30", "x/min", "30/week", "0/s"):
+            with self.assertRaises(ValueError):
+                parse_rate(rate)
+
+
+class RateWindowTest(APITransactionTestCase):
+    """Test the RateWindow class."""
+
+    def setUp(self):
+        """Set up data for each test case."""
+        super().setUp()
+        cache.delete_many(["test.window.1", "test.window.2"])
+
+    def test_window_limits_and_resets(self):
+        """A window admits `limit` requests, the next window starts at zero."""
+        for _ in range(2):
+            self.assertTrue(RateWindow("test.window", 2, 60, 100.0).hit())
+        window = RateWindow("test.window", 2, 60, 110.0)
+        self.assertFalse(window.hit())
+        self.assertEqual(window.wait(110.0), 10.0)
+        window.undo()
+        self.assertEqual(cache.get("test.window.1"), 2)
+        self.assertTrue(RateWindow("test.window", 2, 60, 120.0).hit())
+
+
+class LivedataAdmissionThrottleTest(APITransactionTestCase):
+    """Test the admission control on the query endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for the test class."""
+        cls.device_list = create_db_data()
+
+    def setUp(self):
+        """Set up data for each test case."""
+        super().setUp()
+        cache.clear()
+        livedata_job_cache.invalidate()
+        self.user = User.objects.create_user(username="testuser", password="password", is_superuser=True)
+        self.client.force_authenticate(user=self.user)
+        # Keep all requests of a test in the same rate window
+        patcher = patch("nautobot_app_livedata.api.throttling.time")
+        patcher.start().time.return_value = 1_000_030.0
+        self.addCleanup(patcher.stop)
+        self.url = reverse(
+            "plugins-api:nautobot_app_livedata-api:livedata-query-device-api",
+            kwargs={"pk": self.device_list[0].id},
+        )
+        mock_job = Mock(spec=Job)
+        mock_job.name = "Livedata Api-Job"
+        mock_job_result = Mock(spec=JobResult)
+        mock_job_result.id = "test-job-result-id"
+        for target, kwargs in (
+            ("nautobot_app_livedata.api.views.Job.objects.filter", {}),
+            ("nautobot_app_livedata.api.views.JobResult.enqueue_job", {"return_value": mock_job_result}),
+            ("nautobot_app_livedata.api.views.get_livedata_commands_for_device", {"return_value": ["show version"]}),
+        ):
+            patcher = patch(target, **kwargs)
+            mock = patcher.start()
+            self.addCleanup(patcher.stop)
+            if target.endswith("filter"):
+                mock.return_value.first.return_value = mock_job
+
+    def test_no_limits_configured(self):
+        """Without rate limits every request is admitted."""
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+
+    def test_user_limit(self):
+        """Requests above the per-user limit are rejected with 429 and Retry-After."""
+        with patch.dict(PLUGIN_SETTINGS, {"query_rate_limits": {"user": "2/min"}}):
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        # The window of the patched time ends 50 seconds later
+        self.assertEqual(response["Retry-After"], "50")
+
+    def test_rejected_request_does_not_consume_other_buckets(self):
+        """A request rejected by one scope does not take tokens from the other scopes."""
+        with patch.dict(PLUGIN_SETTINGS, {"query_rate_limits": {"user": "1/min", "global": "2/min"}}):
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.TOO_MANY_REQUESTS)
+            other_user = User.objects.create_user(username="otheruser", password="password", is_superuser=True)
+            self.client.force_authenticate(user=other_user)
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+
+    def test_device_limit_for_interface(self):
+        """Interface queries count against the bucket of their device."""
+        interface_url = reverse(
+            "plugins-api:nautobot_app_livedata-api:livedata-query-intf-api",
+            kwargs={"pk": self.device_list[0].interfaces.first().id},
+        )
+        with (
+            patch.dict(PLUGIN_SETTINGS, {"query_rate_limits": {"device": "1/min"}}),
+            patch(
+                "nautobot_app_livedata.api.views.get_livedata_commands_for_interface",
+                return_value=["show interface"],
+            ),
+        ):
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+            self.assertEqual(self.client.get(interface_url).status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_queue_depth_sheds_load(self):
+        """Requests are rejected while the job queue backlog is above the threshold."""
+        with (
+            patch.dict(PLUGIN_SETTINGS, {"query_job_max_queue_depth": 5, "query_job_queue_depth_retry_after": 7}),
+            patch("nautobot_app_livedata.api.throttling.get_queue_depth", return_value=5),
+        ):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "7")
+
+    def test_affinity_queue_depth_sheds_load(self):
+        """The backlog of the affinity queue of the device is checked, not the one of the routed queue."""
+        depths = {"livedata-emea": 5}
+        location_pk = str(self.device_list[0].location.pk)
+        with (
+            patch.dict(
+                PLUGIN_SETTINGS,
+                {
+                    "query_job_max_queue_depth": 5,
+                    "query_job_queue_affinity": {"locations": {location_pk: "livedata-emea"}},
+                },
+            ),
+            patch(
+                "nautobot_app_livedata.api.throttling.get_queue_depth",
+                side_effect=lambda queue: depths.get(queue, 0),
+            ),
+        ):
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.TOO_MANY_REQUESTS)
+            depths["livedata-emea"] = 4
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+
+    def test_invalid_query_does_not_consume(self):
+        """A query that is rejected before it is enqueued does not take a token."""
+        with patch.dict(PLUGIN_SETTINGS, {"query_rate_limits": {"user": "1/min"}}):
+            unknown_url = reverse(
+                "plugins-api:nautobot_app_livedata-api:livedata-query-device-api",
+                kwargs={"pk": "00000000-0000-0000-0000-000000000000"},
+            )
+            self.assertNotEqual(self.client.get(unknown_url).status_code, HTTPStatus.OK)
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.TOO_MANY_REQUESTS)
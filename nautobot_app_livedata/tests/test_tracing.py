@@ -0,0 +1,131 @@
+"""Tests for the tracing of Livedata queries."""
+
+import json
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from nautobot.apps.testing import TestCase
+from nautobot.extras.jobs import run_job
+from nautobot.extras.models import Job, JobResult
+
+from .conftest import create_db_data
+from nautobot_app_livedata.jobs.jobs import LivedataQueryJob
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities import tracing
+
+User = get_user_model()
+
+
+class TracingTestCase(TestCase):
+    """Test the tracers and the propagation of the trace context."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the devices."""
+        cls.device_list = create_db_data()
+
+    def setUp(self):
+        """Select the file exporter with a temporary file."""
+        super().setUp()
+        handle, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        patcher = patch.dict(PLUGIN_SETTINGS, {"tracing_exporter": "file", "tracing_file": self.path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tracing.get_tracer.cache_clear()
+        self.addCleanup(tracing.get_tracer.cache_clear)
+
+    def read_spans(self):
+        """Return the spans written to the file by name."""
+        with open(self.path, encoding="utf-8") as file:
+            return {span["name"]: span for span in map(json.loads, file)}
+
+    def test_disabled_by_default(self):
+        """Without tracing_exporter the spans are no-ops and no trace context is added."""
+        with patch.dict(PLUGIN_SETTINGS, {"tracing_exporter": None}):
+            tracing.get_tracer.cache_clear()
+            self.assertIsInstance(tracing.get_tracer(), tracing.NoopTracer)
+            with tracing.span("LivedataQueryApiView.get") as span:
+                span.set_attribute("http.status_code", 200)
+                self.assertEqual(tracing.add_trace_context({"device_id": 1}), {"device_id": 1})
+        self.assertEqual(os.path.getsize(self.path), 0)
+
+    def test_nested_spans_and_errors(self):
+        """Child spans share the trace of their parent, errors are recorded."""
+        with self.assertRaises(ValueError):
+            with tracing.span("parent", device="device-1"):
+                with tracing.span("child"):
+                    raise ValueError("`E3001:` Timeout")
+        spans = self.read_spans()
+        self.assertEqual(spans["child"]["trace_id"], spans["parent"]["trace_id"])
+        self.assertEqual(spans["child"]["parent_span_id"], spans["parent"]["span_id"])
+        self.assertIsNone(spans["parent"]["parent_span_id"])
+        self.assertEqual(spans["parent"]["attributes"]["device"], "device-1")
+        self.assertEqual(spans["child"]["status"], "ERROR")
+        self.assertEqual(spans["child"]["attributes"]["exception.message"], "`E3001:` Timeout")
+
+    def test_trace_context_is_propagated_through_job_kwargs(self):
+        """Spans in a block attached to the job kwargs continue the trace of the request."""
+        with tracing.span("LivedataQueryApiView.enqueue"):
+            job_kwargs = tracing.add_trace_context({"device_id": 1})
+        self.assertIn("traceparent", job_kwargs[tracing.TRACE_CONTEXT_KWARG])
+        with tracing.attach(job_kwargs[tracing.TRACE_CONTEXT_KWARG]):
+            with tracing.span("LivedataQueryJob.run"):
+                pass
+        spans = self.read_spans()
+        self.assertEqual(spans["LivedataQueryJob.run"]["trace_id"], spans["LivedataQueryApiView.enqueue"]["trace_id"])
+        self.assertEqual(
+            spans["LivedataQueryJob.run"]["parent_span_id"], spans["LivedataQueryApiView.enqueue"]["span_id"]
+        )
+
+    def test_before_start_spans(self):
+        """Each initialization step is a child span of before_start in the trace of the request."""
+        device = self.device_list[0]
+        with tracing.span("LivedataQueryApiView.get"):
+            trace_context = tracing.get_tracer().get_trace_context()
+        job = LivedataQueryJob()
+        job.logger = Mock()
+        with patch.object(type(job), "user", Mock(username="testuser")):
+            job.before_start(
+                "task-id",
+                (),
+                {
+                    "call_object_type": "dcim.device",
+                    "device_id": device.id,
+                    "primary_device_id": device.id,
+                    "commands_j2": ["show version"],
+                    tracing.TRACE_CONTEXT_KWARG: trace_context,
+                },
+            )
+        spans = self.read_spans()
+        before_start = spans["LivedataQueryJob.before_start"]
+        self.assertEqual(before_start["parent_span_id"], spans["LivedataQueryApiView.get"]["span_id"])
+        for step in ("variables", "interface", "primary_device", "device", "virtual_chassis", "commands"):
+            self.assertEqual(spans[f"LivedataQueryJob._initialize_{step}"]["parent_span_id"], before_start["span_id"])
+
+    def test_run_continues_the_trace(self):
+        """The spans of run() continue the trace of the request when the job runs through run_job."""
+        device = self.device_list[0]
+        job_model = Job.objects.get(name=PLUGIN_SETTINGS["query_job_name"])
+        user = User.objects.create_user(username="traceuser", password="password")
+        job_result = JobResult.objects.create(name=job_model.name, job_model=job_model, user=user)
+        with tracing.span("LivedataQueryApiView.enqueue"):
+            job_kwargs = tracing.add_trace_context(
+                {
+                    "call_object_type": "dcim.device",
+                    "device_id": str(device.id),
+                    "primary_device_id": str(device.id),
+                    "commands_j2": ["show version"],
+                }
+            )
+        with patch.object(LivedataQueryJob, "_run_commands", return_value=[]) as mock_run_commands:
+            run_job.apply(args=[job_model.class_path], kwargs=job_kwargs, task_id=str(job_result.pk))
+        mock_run_commands.assert_called_once()
+        spans = self.read_spans()
+        enqueue = spans["LivedataQueryApiView.enqueue"]
+        for name in ("LivedataQueryJob.before_start", "LivedataQueryJob.run"):
+            self.assertEqual(spans[name]["trace_id"], enqueue["trace_id"])
+            self.assertEqual(spans[name]["parent_span_id"], enqueue["span_id"])
@@ -1,5 +1,6 @@
 """Comprehensive tests for API views in nautobot_app_livedata."""
 
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from http import HTTPStatus
 from unittest.mock import Mock, patch
 
@@ -18,6 +19,8 @@ from nautobot_app_livedata.api.views import (
     LivedataQueryDeviceApiView,
     LivedataQueryInterfaceApiView,
 )
+from nautobot_app_livedata.urls import PLUGIN_SETTINGS
+from nautobot_app_livedata.utilities.jobcache import livedata_job_cache
 from nautobot_app_livedata.utilities.permission import create_permission
 
 User = get_user_model()
@@ -34,6 +37,7 @@ class LivedataQueryInterfaceApiViewTest(APITransactionTestCase):
     def setUp(self):
         """Set up data for each test case."""
         super().setUp()
+        livedata_job_cache.invalidate()
         self.factory = RequestFactory()
         self.user = User.objects.create_user(username="testuser", password="password")
         self.forbidden_user = User.objects.create_user(username="forbidden_user", password="password")
@@ -161,6 +165,7 @@ class LivedataQueryDeviceApiViewTest(APITransactionTestCase):
     def setUp(self):
         """Set up data for each test case."""
         super().setUp()
+        livedata_job_cache.invalidate()
         self.factory = RequestFactory()
         self.user = User.objects.create_user(username="testuser", password="password")
         self.forbidden_user = User.objects.create_user(username="forbidden_user", password="password")
@@ -258,6 +263,8 @@ class LivedataQueryDeviceApiViewTest(APITransactionTestCase):
         response_data = response.json()
         self.assertIn("jobresult_id", response_data)
         self.assertEqual(response_data["jobresult_id"], "test-job-result-id")
+        # No recent runs of the job, no estimate
+        self.assertIsNone(response_data["eta_seconds"])
 
     @patch("nautobot_app_livedata.api.views.get_livedata_commands_for_device")
     @patch("nautobot_app_livedata.api.views.JobResult.enqueue_job")
@@ -285,6 +292,120 @@ class LivedataQueryDeviceApiViewTest(APITransactionTestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, HTTPStatus.INTERNAL_SERVER_ERROR)
 
+    @patch("nautobot_app_livedata.api.views.sync_job_runner")
+    @patch("nautobot_app_livedata.api.views.get_livedata_commands_for_device")
+    @patch("nautobot_app_livedata.api.views.JobResult.enqueue_job")
+    @patch("nautobot_app_livedata.api.views.Job.objects.filter")
+    def test_device_query_sync(self, mock_job_filter, mock_enqueue, mock_get_commands, mock_runner):
+        """Test that ?sync=true returns the output of the inline run."""
+        device = self.device_list[0]
+        mock_get_commands.return_value = ["show version"]
+        mock_job = Mock(spec=Job)
+        mock_job.name = "Livedata Api-Job"
+        mock_job_filter.return_value.first.return_value = mock_job
+
+        finished = Mock(spec=JobResult)
+        finished.id = "test-job-result-id"
+        finished.status = "SUCCESS"
+        finished.result = [{"command": "show version", "stdout": "output", "stderr": ""}]
+        future = Mock()
+        future.result.return_value = finished
+        mock_runner.submit.return_value = (finished, future)
+
+        url = reverse(
+            "plugins-api:nautobot_app_livedata-api:livedata-query-device-api",
+            kwargs={"pk": device.id},
+        )
+        response = self.client.get(url + "?sync=true")
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response_data = response.json()
+        self.assertEqual(response_data["jobresult_id"], "test-job-result-id")
+        self.assertEqual(response_data["status"], "SUCCESS")
+        self.assertEqual(response_data["result"][0]["stdout"], "output")
+        mock_enqueue.assert_not_called()
+
+    @patch("nautobot_app_livedata.api.views.sync_job_runner")
+    @patch("nautobot_app_livedata.api.views.get_livedata_commands_for_device")
+    @patch("nautobot_app_livedata.api.views.JobResult.enqueue_job")
+    @patch("nautobot_app_livedata.api.views.Job.objects.filter")
+    def test_device_query_sync_timeout(self, mock_job_filter, mock_enqueue, mock_get_commands, mock_runner):
+        """Test that an inline run exceeding the timeout returns only the JobResult id."""
+        device = self.device_list[0]
+        mock_get_commands.return_value = ["show version"]
+        mock_job = Mock(spec=Job)
+        mock_job.name = "Livedata Api-Job"
+        mock_job_filter.return_value.first.return_value = mock_job
+
+        pending = Mock(spec=JobResult)
+        pending.id = "test-job-result-id"
+        future = Mock()
+        future.result.side_effect = FutureTimeoutError()
+        mock_runner.submit.return_value = (pending, future)
+
+        url = reverse(
+            "plugins-api:nautobot_app_livedata-api:livedata-query-device-api",
+            kwargs={"pk": device.id},
+        )
+        response = self.client.get(url + "?sync=true")
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json(), {"jobresult_id": "test-job-result-id", "eta_seconds": None})
+        mock_enqueue.assert_not_called()
+
+    @patch("nautobot_app_livedata.api.views.sync_job_runner")
+    @patch("nautobot_app_livedata.api.views.get_livedata_commands_for_device")
+    @patch("nautobot_app_livedata.api.views.JobResult.enqueue_job")
+    @patch("nautobot_app_livedata.api.views.Job.objects.filter")
+    def test_device_query_sync_saturated(self, mock_job_filter, mock_enqueue, mock_get_commands, mock_runner):
+        """Test that a saturated thread pool falls back to enqueueing the job."""
+        device = self.device_list[0]
+        mock_get_commands.return_value = ["show version"]
+        mock_job = Mock(spec=Job)
+        mock_job.name = "Livedata Api-Job"
+        mock_job_filter.return_value.first.return_value = mock_job
+        mock_runner.submit.return_value = None
+
+        mock_job_result = Mock(spec=JobResult)
+        mock_job_result.id = "test-job-result-id"
+        mock_enqueue.return_value = mock_job_result
+
+        url = reverse(
+            "plugins-api:nautobot_app_livedata-api:livedata-query-device-api",
+            kwargs={"pk": device.id},
+        )
+        response = self.client.get(url + "?sync=true")
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json(), {"jobresult_id": "test-job-result-id", "eta_seconds": None})
+        mock_enqueue.assert_called_once()
+
+    @patch("nautobot_app_livedata.api.views.get_livedata_commands_for_device")
+    @patch("nautobot_app_livedata.api.views.JobResult.enqueue_job")
+    @patch("nautobot_app_livedata.api.views.Job.objects.filter")
+    def test_device_query_queue_routing(self, mock_job_filter, mock_enqueue, mock_get_commands):
+        """Test that UI and API token requests are enqueued on their routed queues."""
+        device = self.device_list[0]
+        mock_get_commands.return_value = ["show version"]
+        mock_job = Mock(spec=Job)
+        mock_job.name = "Livedata Api-Job"
+        mock_job_filter.return_value.first.return_value = mock_job
+        mock_job_result = Mock(spec=JobResult)
+        mock_job_result.id = "test-job-result-id"
+        mock_enqueue.return_value = mock_job_result
+
+        url = reverse(
+            "plugins-api:nautobot_app_livedata-api:livedata-query-device-api",
+            kwargs={"pk": device.id},
+        )
+        routing = {"interactive": "livedata-ui", "bulk": "livedata-bulk", "maintenance": None}
+        with patch.dict(PLUGIN_SETTINGS, {"query_job_queue_routing": routing}):
+            self.client.get(url)
+            self.assertEqual(mock_enqueue.call_args.kwargs["task_queue"], "livedata-ui")
+            self.client.force_authenticate(user=self.user, token=Mock())
+            self.client.get(url)
+            self.assertEqual(mock_enqueue.call_args.kwargs["task_queue"], "livedata-bulk")
+
     def test_device_query_invalid_pk(self):
         """Test device query with invalid primary key."""
         # Use a UUID that doesn't exist
@@ -309,6 +430,7 @@ class LivedataPrimaryDeviceApiViewTest(APITransactionTestCase):
     def setUp(self):
         """Set up data for each test case."""
         super().setUp()
+        livedata_job_cache.invalidate()
         self.factory = RequestFactory()
         self.user = User.objects.create_user(username="testuser", password="password")
         self.forbidden_user = User.objects.create_user(username="forbidden_user", password="password")
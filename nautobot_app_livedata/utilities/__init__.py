@@ -2,13 +2,16 @@
 
 # __init__.py
 
+from .appsettings import APP_NAME, get_app_settings
 from .contenttype import ContentTypeUtils
 from .permission import create_permission
 from .primarydevice import get_livedata_commands_for_interface, PrimaryDeviceUtils
 
 __all__ = [
+    "APP_NAME",
     "ContentTypeUtils",
     "PrimaryDeviceUtils",
     "create_permission",
+    "get_app_settings",
     "get_livedata_commands_for_interface",
 ]
@@ -0,0 +1,20 @@
+"""Access to the settings of the Livedata app."""
+
+from typing import Any
+
+from django.conf import settings
+
+APP_NAME = "nautobot_app_livedata"
+
+
+def get_app_settings() -> dict[str, Any]:
+    """Return the settings of this app, `PLUGINS_CONFIG["nautobot_app_livedata"]`.
+
+    The settings are looked up on each call. Unlike `urls.PLUGIN_SETTINGS`, this
+    is safe to use in modules that are imported while the app is loaded, and it
+    follows `override_settings()` in tests.
+
+    Returns:
+        dict: The app settings, empty if the app is not configured.
+    """
+    return settings.PLUGINS_CONFIG.get(APP_NAME, {})
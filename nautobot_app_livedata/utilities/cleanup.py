@@ -0,0 +1,289 @@
+"""Retention, archiving and batched, resumable deletion of Livedata job results."""
+
+from datetime import datetime
+import gzip
+import json
+import logging
+import os
+from typing import Any, Callable, Iterator, Optional
+
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q, Sum, TextField, Window
+from django.db.models.functions import Cast, Coalesce, Length
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+CHECKPOINT_KEY = "nautobot_app_livedata.cleanup.checkpoint"
+# A checkpoint older than this is ignored and the cleanup starts over.
+CHECKPOINT_TIMEOUT = 7 * 24 * 3600
+# Number of JobResults deleted per transaction
+BATCH_SIZE = 1000
+# Milliseconds to sleep between two batches, gives other transactions a chance to get the locks
+BATCH_SLEEP_MS = 100
+# Number of JobResults fetched per query while a batch is archived
+ARCHIVE_CHUNK_SIZE = 100
+
+
+class CleanupCheckpoint:
+    """Progress of a cleanup run, stored in the Django cache.
+
+    The checkpoint keeps the cutoff date of the interrupted run, so the resumed
+    run deletes the same set of job results, and per queryset the primary key
+    of the last deleted job result and the number of deleted job results.
+    """
+
+    def __init__(self, days_to_keep: int, cutoff: datetime, progress: Optional[dict[str, Any]] = None) -> None:
+        """Initialize the checkpoint.
+
+        Args:
+            days_to_keep (int): The days_to_keep of the run.
+            cutoff (datetime): Job results finished before this date are deleted.
+            progress (dict): Per queryset name a dict with 'last_pk' and 'deleted'.
+        """
+        self.days_to_keep = days_to_keep
+        self.cutoff = cutoff
+        self.progress = progress or {}
+
+    @classmethod
+    def load(cls, days_to_keep: int, cutoff: datetime) -> "CleanupCheckpoint":
+        """Return the checkpoint of an interrupted run, or a new checkpoint.
+
+        A stored checkpoint is only resumed if it was written by a run with the
+        same days_to_keep.
+
+        Args:
+            days_to_keep (int): The days_to_keep of the current run.
+            cutoff (datetime): The cutoff date used if there is nothing to resume.
+
+        Returns:
+            CleanupCheckpoint: The checkpoint.
+        """
+        state = cache.get(CHECKPOINT_KEY)
+        if state and state.get("days_to_keep") == days_to_keep:
+            logger.info("Resuming the Livedata cleanup that was interrupted at %s", state["progress"])
+            return cls(days_to_keep, state["cutoff"], state["progress"])
+        return cls(days_to_keep, cutoff)
+
+    @property
+    def resumed(self) -> bool:
+        """Return True if the checkpoint continues an interrupted run."""
+        return bool(self.progress)
+
+    def last_pk(self, name: str) -> Optional[Any]:
+        """Return the primary key of the last deleted job result of the queryset."""
+        return self.progress.get(name, {}).get("last_pk")
+
+    def deleted(self, name: str) -> int:
+        """Return the number of job results deleted from the queryset so far."""
+        return self.progress.get(name, {}).get("deleted", 0)
+
+    def update(self, name: str, last_pk: Any, deleted: int) -> None:
+        """Record a deleted batch and store the checkpoint.
+
+        Args:
+            name (str): The name of the queryset.
+            last_pk (uuid): The primary key of the last job result of the batch.
+            deleted (int): The number of job results deleted in the batch.
+        """
+        self.progress[name] = {"last_pk": last_pk, "deleted": self.deleted(name) + deleted}
+        cache.set(
+            CHECKPOINT_KEY,
+            {"days_to_keep": self.days_to_keep, "cutoff": self.cutoff, "progress": self.progress},
+            timeout=CHECKPOINT_TIMEOUT,
+        )
+
+    @staticmethod
+    def clear() -> None:
+        """Remove the stored checkpoint after a completed run."""
+        cache.delete(CHECKPOINT_KEY)
+
+
+class JobResultArchive:
+    """Append Livedata job results as gzip compressed JSON lines to a file.
+
+    Every batch is written as a separate gzip member and synced to disk before
+    `write_batch()` returns, so a batch can be deleted as soon as it is archived.
+    Concatenated gzip members form a valid gzip file, e.g. for `zcat`.
+    """
+
+    def __init__(self, path: str, name: Optional[str] = None) -> None:
+        """Initialize the archive.
+
+        Args:
+            path (str): The path of the archive file, it is created or appended to.
+            name (str): The name reported to the user, defaults to the path.
+        """
+        self.path = path
+        self.name = name or path
+        self.count = 0
+
+    def write_batch(self, queryset: Any, pks: list[Any]) -> int:
+        """Archive the job results of a batch.
+
+        Args:
+            queryset (QuerySet): The JobResults being cleaned up.
+            pks (list): The primary keys of the batch.
+
+        Returns:
+            int: The number of archived job results.
+
+        Raises:
+            OSError: If the batch could not be written, the batch must not be deleted then.
+        """
+        batch = queryset.filter(pk__in=pks)
+        names = self._get_object_names(batch)
+        count = 0
+        with open(self.path, "ab") as archive_file:
+            with gzip.GzipFile(fileobj=archive_file, mode="wb") as gzip_file:
+                for job_result in batch.select_related("user").order_by("pk").iterator(chunk_size=ARCHIVE_CHUNK_SIZE):
+                    record = self.to_record(job_result, names)
+                    gzip_file.write(json.dumps(record, cls=DjangoJSONEncoder).encode("utf-8") + b"\n")
+                    count += 1
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+        self.count += count
+        return count
+
+    @staticmethod
+    def _get_object_names(batch: Any) -> dict[str, str]:
+        """Return the names of the devices and interfaces the job results of a batch refer to."""
+        ids = {"dcim.device": set(), "dcim.interface": set()}
+        for task_kwargs in batch.values_list("task_kwargs", flat=True):
+            task_kwargs = task_kwargs or {}
+            ids["dcim.device"].update(
+                filter(None, (task_kwargs.get("device_id"), task_kwargs.get("primary_device_id")))
+            )
+            if task_kwargs.get("interface_id"):
+                ids["dcim.interface"].add(task_kwargs["interface_id"])
+        names = {}
+        for model_label, pks in ids.items():
+            if pks:
+                model = global_apps.get_model(model_label)
+                names.update({str(pk): name for pk, name in model.objects.filter(pk__in=pks).values_list("pk", "name")})
+        return names
+
+    @staticmethod
+    def to_record(job_result: Any, names: dict[str, str]) -> dict[str, Any]:
+        """Return the archive record of a job result.
+
+        Args:
+            job_result (JobResult): The job result.
+            names (dict): The device and interface names by primary key.
+
+        Returns:
+            dict: Who ran which commands on which device, from where, and the outputs.
+        """
+        task_kwargs = job_result.task_kwargs or {}
+        outputs = job_result.result if isinstance(job_result.result, list) else []
+        commands = [output.get("command") for output in outputs if isinstance(output, dict)]
+        return {
+            "id": job_result.pk,
+            "job": job_result.name,
+            "status": job_result.status,
+            "date_created": job_result.date_created,
+            "date_done": job_result.date_done,
+            "user": job_result.user.username if job_result.user else None,
+            "call_object_type": task_kwargs.get("call_object_type"),
+            "device_id": task_kwargs.get("device_id"),
+            "device": names.get(str(task_kwargs.get("device_id"))),
+            "interface_id": task_kwargs.get("interface_id"),
+            "interface": names.get(str(task_kwargs.get("interface_id"))),
+            "primary_device_id": task_kwargs.get("primary_device_id"),
+            "primary_device": names.get(str(task_kwargs.get("primary_device_id"))),
+            "virtual_chassis_id": task_kwargs.get("virtual_chassis_id"),
+            "remote_addr": task_kwargs.get("remote_addr"),
+            "x_forwarded_for": task_kwargs.get("x_forwarded_for"),
+            "commands": commands or task_kwargs.get("commands_j2") or [],
+            "outputs": job_result.result,
+        }
+
+
+def get_size_expression() -> Any:
+    """Return an expression for the approximate stored size of a JobResult.
+
+    The size is the length of the result and of the task kwargs as JSON text,
+    the job log entries are not included.
+    """
+    return Coalesce(Length(Cast("result", TextField())), 0) + Coalesce(Length(Cast("task_kwargs", TextField())), 0)
+
+
+def get_stored_size(queryset: Any) -> int:
+    """Return the approximate stored size of the JobResults of a queryset in bytes."""
+    return queryset.aggregate(size=Sum(get_size_expression()))["size"] or 0
+
+
+def get_cap_filter(queryset: Any, max_count: Optional[int] = None, max_bytes: Optional[int] = None) -> Optional[Q]:
+    """Return a filter for the JobResults that exceed the count or size cap.
+
+    The JobResults are ranked from the newest to the oldest by date_done. Every
+    JobResult after the first `max_count`, and every JobResult from the one that
+    pushes the running total of the stored size above `max_bytes`, is selected,
+    so the oldest JobResults are evicted first.
+
+    Args:
+        queryset (QuerySet): The JobResults the caps apply to.
+        max_count (int): The maximum number of JobResults to keep, None for no limit.
+        max_bytes (int): The approximate maximum stored size in bytes, None for no limit.
+
+    Returns:
+        Q: The filter, or None if no JobResult exceeds the caps.
+    """
+    ordering = [F("date_done").desc(), F("pk").desc()]
+    ranked = queryset.filter(date_done__isnull=False).order_by(*ordering)
+    boundaries = []
+    if max_count:
+        boundaries += list(ranked.values_list("date_done", "pk")[max_count : max_count + 1])
+    if max_bytes:
+        boundary = (
+            ranked.annotate(running_size=Window(Sum(get_size_expression()), order_by=ordering))
+            .filter(running_size__gt=max_bytes)
+            .values_list("date_done", "pk")
+            .first()
+        )
+        if boundary is not None:
+            boundaries.append(boundary)
+    cap_filter = None
+    for date_done, pk in boundaries:
+        boundary_filter = Q(date_done__lt=date_done) | Q(date_done=date_done, pk__lte=pk)
+        cap_filter = boundary_filter if cap_filter is None else cap_filter | boundary_filter
+    return cap_filter
+
+
+def iter_delete_batches(
+    queryset: Any,
+    batch_size: int = BATCH_SIZE,
+    start_after: Optional[Any] = None,
+    before_delete: Optional[Callable[[Any, list[Any]], Any]] = None,
+) -> Iterator[tuple[Any, int]]:
+    """Delete the objects of a queryset in batches ordered by primary key.
+
+    Every batch is deleted in its own transaction, so the locks on the table and
+    on the cascaded rows, e.g. JobLogEntry, are only held for one batch.
+
+    Args:
+        queryset (QuerySet): The objects to delete.
+        batch_size (int): Number of objects deleted per batch.
+        start_after (uuid): Only delete objects with a greater primary key, used to resume.
+        before_delete (callable): Called with the queryset and the primary keys of a batch
+            before the batch is deleted, e.g. JobResultArchive.write_batch. If it raises,
+            the batch is not deleted.
+
+    Yields:
+        tuple: The primary key of the last object of the batch and the number of
+            objects of the queryset model deleted in the batch, without cascaded rows.
+    """
+    label = queryset.model._meta.label  # pylint: disable=protected-access
+    while True:
+        batch = queryset.order_by("pk")
+        if start_after is not None:
+            batch = batch.filter(pk__gt=start_after)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return
+        if before_delete is not None:
+            before_delete(queryset, pks)
+        _, deleted_per_model = queryset.filter(pk__in=pks).delete()
+        start_after = pks[-1]
+        yield start_after, deleted_per_model.get(label, 0)
@@ -1,10 +1,80 @@
 """Utilities for working with the ContentType model."""
 
+import threading
 from typing import Any, Optional
 
 from django.apps import apps as global_apps
 from django.db import DEFAULT_DB_ALIAS, router
 
+# Process-wide memo of model classes and ContentType rows by 'app_label.model_name'
+_memo_lock = threading.Lock()
+_model_memo: dict[str, Any] = {}
+_content_type_memo: dict[str, Any] = {}
+
+
+def get_model(full_model_name: str) -> Any:
+    """Return the model class for the given model name, memoized per process.
+
+    Model classes are only memoized once the app registry is fully populated, so
+    lookups before that, e.g. while apps are still loading, are never cached.
+
+    Args:
+        full_model_name (str): The model name in the format 'app_label.model_name'.
+
+    Returns:
+        Model: The model class.
+
+    Raises:
+        LookupError: If the model does not exist.
+        ValueError: If the model name is not in the format 'app_label.model_name'.
+    """
+    key = full_model_name.lower()
+    model = _model_memo.get(key)
+    if model is not None:
+        return model
+    try:
+        app_label, model_name = key.split(".")
+    except ValueError:
+        raise ValueError("Model name must be in the format 'app_label.model_name'")  # pylint: disable=raise-missing-from
+    model = global_apps.get_model(app_label, model_name)
+    if global_apps.models_ready:
+        with _memo_lock:
+            _model_memo[key] = model
+    return model
+
+
+def get_content_type_for_model(full_model_name: str) -> Optional[Any]:
+    """Return the ContentType row for the given model name, memoized per process.
+
+    Only existing rows are memoized. During `nautobot_database_ready` the
+    ContentType table may not be populated yet, a miss returns None and is
+    looked up again on the next call.
+
+    Args:
+        full_model_name (str): The model name in the format 'app_label.model_name'.
+
+    Returns:
+        ContentType: The ContentType row, or None if it does not exist (yet).
+    """
+    key = full_model_name.lower()
+    content_type = _content_type_memo.get(key)
+    if content_type is not None:
+        return content_type
+    app_label, _, model_name = key.partition(".")
+    ContentType = global_apps.get_model("contenttypes", "ContentType")  # pylint: disable=invalid-name
+    content_type = ContentType.objects.filter(app_label=app_label, model=model_name).first()
+    if content_type is not None:
+        with _memo_lock:
+            _content_type_memo[key] = content_type
+    return content_type
+
+
+def clear_memo() -> None:
+    """Drop the memoized model classes and ContentType rows, e.g. after migrations."""
+    with _memo_lock:
+        _model_memo.clear()
+        _content_type_memo.clear()
+
 
 class ContentTypeUtils:  # pylint: disable=too-many-instance-attributes
     """Utility functions for working with the ContentType model."""
@@ -164,9 +234,9 @@ class ContentTypeUtils:  # pylint: disable=too-many-instance-attributes
             raise ValueError("full_model_name is required")
         self.get_content_type()
         try:
-            self._content_type_model = self.ContentType.objects.get(  # type: ignore
-                app_label=self.app_name, model=self.model_name
-            )
+            self._content_type_model = get_content_type_for_model(self._full_model_name)
+            if self._content_type_model is None:
+                raise self.ContentType.DoesNotExist("ContentType matching query does not exist.")  # type: ignore
         except Exception as error:  # pylint: disable=broad-except
             self._content_type_model = None
             if self.is_in_database_ready:
@@ -208,4 +278,4 @@ class ContentTypeUtils:  # pylint: disable=too-many-instance-attributes
         Returns:
             Model: The model.
         """
-        return self.apps.get_model(self._app_label, self._model_name)  # type: ignore
+        return get_model(f"{self._app_label}.{self._model_name}")
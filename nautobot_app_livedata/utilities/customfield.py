@@ -1,16 +1,24 @@
 """Utilities for working with custom fields in Nautobot."""
 
+import logging
 from typing import Any, Optional
 
+logger = logging.getLogger("nautobot_app_livedata")
+
 
 def create_custom_field(
     db_objects: dict[str, Any], content_type_objects: Optional[list[Any]] = None, **kwargs: Any
 ) -> None:
     """Create a custom field with the given key name and field type.
 
+    The existing custom field and its content types are compared with the given
+    definition, one query each. The custom field is only validated and saved if
+    it is created or one of its attributes differs, and the missing content types
+    are assigned in a single operation.
+
     Args:
         db_objects (dict): The database objects to use for the creation.
-        content_types (list[str]): The model names to assign the custom field to. "app_label.model_name"
+        content_type_objects (list[ContentType]): The content types to assign the custom field to.
 
     Keyword Args:
         key (str): The key name of the custom field.
@@ -24,42 +32,33 @@ def create_custom_field(
         advanced_ui (bool): The advanced UI status of the custom field. Defaults to True.
 
     Raises:
-        ValueError: If the model_name is not in the format 'app_label.model_name'.
-        ValueError: If the field_type is not in CustomFieldTypeChoices.
+        ValidationError: If the custom field definition is not valid.
     """
-    if content_type_objects is None:
-        content_type_objects = []
     CustomField = db_objects["CustomField"]  # pylint: disable=invalid-name
     custom_field_key = kwargs.pop("key")
-    custom_field_modified = False
-    try:
-        custom_field = CustomField.objects.get(key=custom_field_key)
-        for key, value in kwargs.items():
-            if getattr(custom_field, key) != value:
-                custom_field_modified = True
-                setattr(custom_field, key, value)
-    except CustomField.DoesNotExist:
-        custom_field_modified = True
-        custom_field = CustomField.objects.create(**kwargs)
-    if custom_field_modified:
+    custom_field = CustomField.objects.filter(key=custom_field_key).first()
+    if custom_field is None:
+        custom_field = CustomField(key=custom_field_key, **kwargs)
         custom_field.validated_save()
-        custom_field.refresh_from_db()
+        assigned_ids = set()
+    else:
+        changed = {key: value for key, value in kwargs.items() if getattr(custom_field, key) != value}
+        if changed:
+            for key, value in changed.items():
+                setattr(custom_field, key, value)
+            custom_field.validated_save()
+        assigned_ids = set(custom_field.content_types.values_list("pk", flat=True))
 
-    added_content_types = False
-    if content_type_objects:
-        # Assign the custom field to the given content types.
-        ContentType = db_objects["ContentType"]  # pylint: disable=invalid-name
-        for content_type in content_type_objects:
-            # check if contenttyp is already assigned
-            if custom_field.content_types.filter(id=content_type.id).exists():
-                continue
-            try:
-                custom_field.content_types.add(content_type)
-                added_content_types = True
-            except ContentType.DoesNotExist:
-                print(
-                    "WARNING: Could not assign custom field to content type.",
-                    f"\nYou must assign the custom field {custom_field} to a content type {content_type} manually!",
-                )
-    if added_content_types:
-        custom_field.validated_save()
+    missing = [content_type for content_type in content_type_objects or [] if content_type.pk not in assigned_ids]
+    if not missing:
+        return
+    ContentType = db_objects["ContentType"]  # pylint: disable=invalid-name
+    try:
+        custom_field.content_types.add(*missing)
+    except ContentType.DoesNotExist:
+        logger.warning(
+            "Could not assign custom field to content type. "
+            "You must assign the custom field %s to the content types %s manually!",
+            custom_field,
+            ", ".join(str(content_type) for content_type in missing),
+        )
@@ -0,0 +1,66 @@
+"""Estimated time until a Livedata query job finishes, from the durations of earlier runs."""
+
+import logging
+import statistics
+from typing import Any, Optional
+
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.db.models import DurationField, ExpressionWrapper, F
+from django.utils import timezone
+
+from nautobot_app_livedata.utilities import metrics
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+CACHE_KEY_PREFIX = "nautobot_app_livedata.eta"
+# Seconds an estimate is cached, the durations change slowly
+CACHE_TIMEOUT = 300
+# Only recent runs are representative for the current load of the workers
+HISTORY_DAYS = 7
+# Number of recent runs the median is taken of
+SAMPLE_SIZE = 10
+# Fewer runs of a device are not used, the runs of all devices are used instead
+MIN_SAMPLES = 3
+
+
+def _get_durations(queryset: Any) -> list[float]:
+    """Return the durations in seconds of the latest finished runs of the queryset."""
+    duration = ExpressionWrapper(F("date_done") - F("date_created"), output_field=DurationField())
+    durations = (
+        queryset.order_by("-date_done").annotate(duration=duration).values_list("duration", flat=True)[:SAMPLE_SIZE]
+    )
+    return [value.total_seconds() for value in durations if value is not None]
+
+
+def get_query_eta(job_id: Any, primary_device_id: Any) -> Optional[float]:
+    """Return the expected seconds from enqueueing a query of the device until its result is ready.
+
+    The estimate is the median duration, from creation to completion of the
+    JobResult, of the latest successful runs for the primary device. If the
+    device has too few recent runs, the runs of all devices are used.
+
+    Args:
+        job_id (uuid): The primary key of the Livedata query Job.
+        primary_device_id (uuid): The primary key of the primary device of the query.
+
+    Returns:
+        float: The estimate in seconds, None if there are no recent runs.
+    """
+    key = f"{CACHE_KEY_PREFIX}.{job_id}.{primary_device_id}"
+    entry = cache.get(key)
+    metrics.count_cache_request("eta", entry is not None)
+    if entry is not None:
+        return entry["eta"]
+    JobResult = global_apps.get_model("extras", "JobResult")  # pylint: disable=invalid-name
+    runs = JobResult.objects.filter(
+        job_model_id__in=[job_id],
+        status="SUCCESS",
+        date_done__gte=timezone.now() - timezone.timedelta(days=HISTORY_DAYS),
+    )
+    durations = _get_durations(runs.filter(task_kwargs__primary_device_id=str(primary_device_id)))
+    if len(durations) < MIN_SAMPLES:
+        durations = _get_durations(runs)
+    eta = round(statistics.median(durations), 1) if durations else None
+    cache.set(key, {"eta": eta}, timeout=CACHE_TIMEOUT)
+    return eta
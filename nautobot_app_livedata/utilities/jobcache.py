@@ -0,0 +1,113 @@
+"""Process-level cache for the Livedata query Job lookup."""
+
+import threading
+import time
+from typing import Any, Optional
+
+from django.apps import apps as global_apps
+
+from nautobot_app_livedata.utilities import metrics
+
+# Signals only reach the process that saved the object. Other web workers
+# pick up changes to the Job or JobQueue after this many seconds.
+JOB_CACHE_TTL = 300
+
+
+class LivedataJobCacheEntry:  # pylint: disable=too-few-public-methods
+    """Resolved Job model together with the parameters used to enqueue it."""
+
+    def __init__(self, job: Any, job_queue: Optional[Any], task_queue: Optional[str]) -> None:
+        """Initialize the cache entry.
+
+        Args:
+            job (extras.Job): The resolved Job model.
+            job_queue (extras.JobQueue): The JobQueue the job is sent to, or None if it could not be resolved.
+            task_queue (str): The configured queue name, used as fallback when job_queue is None.
+        """
+        self.job = job
+        self.job_queue = job_queue
+        self.task_queue = task_queue
+        self.created = time.monotonic()
+
+    @property
+    def enqueue_kwargs(self) -> dict[str, Any]:
+        """Return the queue keyword arguments for JobResult.enqueue_job().
+
+        Passing the resolved JobQueue instance avoids the JobQueue lookup that
+        enqueue_job() does for a queue name.
+
+        Returns:
+            dict: Either {"job_queue": JobQueue} or {"task_queue": str}.
+        """
+        if self.job_queue is not None:
+            return {"job_queue": self.job_queue}
+        return {"task_queue": self.task_queue}
+
+
+class LivedataJobCache:
+    """Cache the Livedata query Job, its queue and the enqueue parameters per process.
+
+    Entries are dropped by `invalidate()`, which is connected to the post_save and
+    post_delete signals of Job and JobQueue, and expire after `ttl` seconds.
+    """
+
+    def __init__(self, ttl: int = JOB_CACHE_TTL) -> None:
+        """Initialize the cache.
+
+        Args:
+            ttl (int): Maximum age of an entry in seconds.
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+
+    def get(self, job_name: str, task_queue: Optional[str] = None) -> Optional[LivedataJobCacheEntry]:
+        """Return the cache entry for the given job name and queue.
+
+        Args:
+            job_name (str): The name of the Job model.
+            task_queue (str): The configured JobQueue name. If None, the job's default queue is used.
+
+        Returns:
+            LivedataJobCacheEntry: The cache entry, or None if the Job does not exist.
+        """
+        key = (job_name, task_queue)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.created < self.ttl:
+            metrics.count_cache_request("job", True)
+            return entry
+        metrics.count_cache_request("job", False)
+        generation = self._generation
+        entry = self._load(job_name, task_queue)
+        if entry is None:
+            # Do not cache misses, the Job may be registered at any time.
+            return None
+        with self._lock:
+            # Skip storing a result that was loaded while the cache was invalidated.
+            if generation == self._generation:
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    @staticmethod
+    def _load(job_name: str, task_queue: Optional[str]) -> Optional[LivedataJobCacheEntry]:
+        """Load the Job and its JobQueue from the database."""
+        Job = global_apps.get_model("extras", "Job")  # pylint: disable=invalid-name
+        JobQueue = global_apps.get_model("extras", "JobQueue")  # pylint: disable=invalid-name
+        job = Job.objects.filter(name=job_name).first()
+        if job is None:
+            return None
+        if task_queue:
+            job_queue = JobQueue.objects.filter(name=task_queue).first()
+        else:
+            job_queue = job.default_job_queue
+        return LivedataJobCacheEntry(job=job, job_queue=job_queue, task_queue=task_queue)
+
+
+livedata_job_cache = LivedataJobCache()
@@ -0,0 +1,97 @@
+"""Last successful Livedata query result per device or interface, for the Live Data tabs."""
+
+import logging
+from typing import Any, Optional
+
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.utils import timezone
+
+from nautobot_app_livedata.utilities import metrics, resultoutput
+from nautobot_app_livedata.utilities.appsettings import get_app_settings
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+CACHE_KEY_PREFIX = "nautobot_app_livedata.last_result"
+# The task kwarg that holds the primary key of the queried object, per call_object_type
+OBJECT_ID_KWARGS = {"dcim.device": "device_id", "dcim.interface": "interface_id"}
+
+
+def get_max_age() -> int:
+    """Return the maximum age of a last result in seconds, 0 disables the last results."""
+    return int(get_app_settings().get("query_last_result_max_age") or 0)
+
+
+def _get_key(object_type: str, pk: Any) -> str:
+    return f"{CACHE_KEY_PREFIX}.{object_type}.{pk}"
+
+
+def _get_entry(job_result_id: Any, date_done: Any, result: list[dict[str, Any]]) -> dict[str, Any]:
+    return {
+        "jobresult_id": str(job_result_id),
+        "date_done": date_done,
+        "commands": resultoutput.summarize_result(result),
+    }
+
+
+def store_last_result(object_type: str, pk: Any, job_result_id: Any, result: list[dict[str, Any]]) -> None:
+    """Store a successful query as the last result of the object.
+
+    Called by the query job when it finishes, so the Live Data tab does not have
+    to search the JobResult table. Only the summary of the commands is stored,
+    the tab loads the output of a command from the JobResult when it is opened.
+
+    Args:
+        object_type (str): The call_object_type of the query, 'dcim.device' or 'dcim.interface'.
+        pk (uuid): The primary key of the queried object.
+        job_result_id (uuid): The primary key of the JobResult of the query.
+        result (list): The output of the query job.
+    """
+    max_age = get_max_age()
+    if not max_age:
+        return
+    cache.set(_get_key(object_type, pk), _get_entry(job_result_id, timezone.now(), result), timeout=max_age)
+
+
+def get_last_result(job_id: Any, object_type: str, pk: Any) -> Optional[dict[str, Any]]:
+    """Return the last successful result of a query of the object.
+
+    The result is read from the Django cache. On a miss the latest successful
+    JobResult of the object within `query_last_result_max_age` is looked up, by
+    the Livedata JobResult index on (job_model_id, status, date_done), and
+    cached, also if there is none.
+
+    Args:
+        job_id (uuid): The primary key of the Livedata query Job.
+        object_type (str): 'dcim.device' or 'dcim.interface'.
+        pk (uuid): The primary key of the object.
+
+    Returns:
+        dict: jobresult_id, date_done and commands, see `summarize_result()`.
+            None if there is no recent result.
+    """
+    max_age = get_max_age()
+    if not max_age or object_type not in OBJECT_ID_KWARGS:
+        return None
+    key = _get_key(object_type, pk)
+    entry = cache.get(key)
+    metrics.count_cache_request("last_result", entry is not None)
+    if entry is None:
+        JobResult = global_apps.get_model("extras", "JobResult")  # pylint: disable=invalid-name
+        job_result = (
+            JobResult.objects.filter(
+                job_model_id__in=[job_id],
+                status="SUCCESS",
+                date_done__gte=timezone.now() - timezone.timedelta(seconds=max_age),
+                task_kwargs__call_object_type=object_type,
+                **{f"task_kwargs__{OBJECT_ID_KWARGS[object_type]}": str(pk)},
+            )
+            .order_by("-date_done")
+            .only("pk", "date_done", "result")
+            .first()
+        )
+        entry = {"jobresult_id": None}
+        if job_result is not None and isinstance(job_result.result, list):
+            entry = _get_entry(job_result.pk, job_result.date_done, job_result.result)
+        cache.set(key, entry, timeout=max_age)
+    return entry if entry["jobresult_id"] else None
@@ -0,0 +1,132 @@
+"""Prometheus metrics of the Livedata query pipeline.
+
+The metrics are registered in the default registry of prometheus_client, like
+the metrics of Nautobot itself. They are exported by the `/metrics` endpoint of
+Nautobot, and by the metrics port of the Celery workers, see
+`CELERY_WORKER_PROMETHEUS_PORTS`. In multiprocess mode the endpoint of Nautobot
+also exports the metrics of the workers that share `prometheus_multiproc_dir`.
+"""
+
+from contextlib import contextmanager
+import re
+import time
+from typing import Any, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+UNKNOWN = "unknown"
+# Error codes of the Livedata messages, e.g. "`E3001:` ..."
+ERROR_CODE_PATTERN = re.compile(r"\b(E\d{4})\b")
+
+SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+query_requests_counter = Counter(
+    name="nautobot_app_livedata_query_requests",
+    documentation="Requests to the Livedata query API, by HTTP status code",
+    labelnames=("object_type", "status"),
+)
+enqueued_jobs_counter = Counter(
+    name="nautobot_app_livedata_enqueued_jobs",
+    documentation="Livedata query jobs enqueued or run inline by the query API",
+    labelnames=("queue", "mode"),
+)
+cache_requests_counter = Counter(
+    name="nautobot_app_livedata_cache_requests",
+    documentation="Lookups in the Livedata caches",
+    labelnames=("cache", "result"),
+)
+failures_counter = Counter(
+    name="nautobot_app_livedata_failures",
+    documentation="Failed Livedata queries, by error code",
+    labelnames=("code", "stage"),
+)
+api_latency_histogram = Histogram(
+    name="nautobot_app_livedata_api_request_duration_seconds",
+    documentation="Response time of the Livedata query API",
+    labelnames=("platform", "queue"),
+)
+queue_wait_histogram = Histogram(
+    name="nautobot_app_livedata_queue_wait_seconds",
+    documentation="Time a Livedata query job waited in the job queue before it started",
+    labelnames=("platform", "queue"),
+    buckets=SECONDS_BUCKETS,
+)
+connect_histogram = Histogram(
+    name="nautobot_app_livedata_connect_duration_seconds",
+    documentation="Time to open the connection to the device",
+    labelnames=("platform", "queue"),
+    buckets=SECONDS_BUCKETS,
+)
+command_histogram = Histogram(
+    name="nautobot_app_livedata_command_duration_seconds",
+    documentation="Time to run one command on the device",
+    labelnames=("platform", "queue"),
+    buckets=SECONDS_BUCKETS,
+)
+output_bytes_histogram = Histogram(
+    name="nautobot_app_livedata_command_output_bytes",
+    documentation="Size of the output of one command as returned by the device",
+    labelnames=("platform", "queue"),
+    buckets=BYTES_BUCKETS,
+)
+sessions_gauge = Gauge(
+    name="nautobot_app_livedata_device_sessions",
+    documentation="Open connections of Livedata query jobs, per device",
+    labelnames=("device",),
+    multiprocess_mode="livesum",
+)
+
+
+def get_platform_label(device: Any) -> str:
+    """Return the platform label of a device, 'unknown' without a device or platform."""
+    platform = getattr(device, "platform", None)
+    return getattr(platform, "name", None) or UNKNOWN
+
+
+def get_error_code(error: Any) -> str:
+    """Return the Livedata error code in the message of an error, e.g. 'E3001', or 'other'."""
+    match = ERROR_CODE_PATTERN.search(str(error))
+    return match.group(1) if match else "other"
+
+
+def count_cache_request(cache_name: str, hit: bool) -> None:
+    """Count a lookup in one of the Livedata caches."""
+    cache_requests_counter.labels(cache_name, "hit" if hit else "miss").inc()
+
+
+def count_failure(error: Any, stage: str) -> None:
+    """Count a failed query by the error code in its message.
+
+    Args:
+        error (Exception): The error, or its message.
+        stage (str): Where the query failed, 'api' or 'job'.
+    """
+    failures_counter.labels(get_error_code(error), stage).inc()
+
+
+@contextmanager
+def observe_duration(histogram: Histogram, platform: Optional[str], queue: Optional[str]) -> Iterator[None]:
+    """Observe the duration of the block in a histogram labelled by platform and queue."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        histogram.labels(platform or UNKNOWN, queue or UNKNOWN).observe(time.monotonic() - start)
+
+
+@contextmanager
+def device_session(device_name: Optional[str]) -> Iterator[None]:
+    """Count the block as an open session to the device."""
+    gauge = sessions_gauge.labels(device_name or UNKNOWN)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+def observe_output_size(output: Any, platform: Optional[str], queue: Optional[str]) -> None:
+    """Observe the size in bytes of the output of a command as returned by the device."""
+    size = len(output.encode("utf-8", "replace")) if isinstance(output, str) else len(str(output or ""))
+    output_bytes_histogram.labels(platform or UNKNOWN, queue or UNKNOWN).observe(size)
@@ -1,13 +1,31 @@
 """Utilities for working with permissions in Nautobot."""
 
+import logging
 from typing import Any
 
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.db.models import Q
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+CACHE_KEY_PREFIX = "nautobot_app_livedata.query_permission"
+GENERATION_KEY = f"{CACHE_KEY_PREFIX}.generation"
+# Seconds a user's permission is cached, also bounds the effect of a missed invalidation
+CACHE_TIMEOUT = 300
+# (app_label, model, action) of the permissions needed to run a Livedata query
+QUERY_PERMISSIONS = (("dcim", "device", "can_interact"), ("extras", "job", "run"))
+
 
 def create_permission(
     db_objects: dict[str, Any], name: str, actions_list: list[str], description: str, content_type: Any
 ) -> None:
     """Create a permission in the database.
 
+    The permission is only validated and saved if it is created, and the content
+    type is only assigned if it is missing, so an up to date permission costs
+    two queries.
+
     Args:
         db_objects (dict): The database objects. Must contain the ContentType and ObjectPermission models.
         name (str): The name of the permission.
@@ -21,18 +39,80 @@ def create_permission(
     if not db_objects:
         raise ValueError("Database objects are required")
     ObjectPermission = db_objects["ObjectPermission"]  # pylint: disable=invalid-name
-    try:
-        permission = ObjectPermission.objects.get(name=name)
-    except ObjectPermission.DoesNotExist:
-        permission = ObjectPermission.objects.create(
-            name=name,
-            actions=actions_list,
-            description=description,
-        )
+    permission = ObjectPermission.objects.filter(name=name).first()
+    if permission is None:
+        permission = ObjectPermission(name=name, actions=actions_list, description=description)
         permission.validated_save()
-    if permission.object_types.count() == 0 or not permission.object_types.filter(id=content_type.id).exists():
+        assigned_ids = set()
+    else:
+        assigned_ids = set(permission.object_types.values_list("pk", flat=True))
+    if content_type.pk in assigned_ids:
+        return
+    try:
+        permission.object_types.add(content_type)  # type: ignore
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("Could not assign permission %s to content type: %s", name, e)
+
+
+class QueryPermissionCache:
+    """Cache per user whether the user may run Livedata queries.
+
+    A query needs the 'dcim.can_interact_device' and 'extras.run_job' permissions.
+    Only these two are evaluated, instead of all permissions of the user. The
+    cache keys contain a generation counter, `invalidate()` increments it when
+    an ObjectPermission, its users, groups or object types, or the groups of a
+    user change, see signals.py.
+    """
+
+    def is_allowed(self, user: Any) -> bool:
+        """Return True if the user may run Livedata queries.
+
+        Staff users and superusers are always allowed.
+
+        Args:
+            user (User): The user of the request.
+
+        Returns:
+            bool: True if the user has both permissions.
+        """
+        if not user.is_active or user.is_anonymous:
+            return False
+        if user.is_staff or user.is_superuser:
+            return True
+        key = f"{CACHE_KEY_PREFIX}.{self._get_generation()}.{user.pk}"
+        allowed = cache.get(key)
+        if allowed is None:
+            allowed = all(self._has_permission(user, *permission) for permission in QUERY_PERMISSIONS)
+            cache.set(key, allowed, timeout=CACHE_TIMEOUT)
+        return allowed
+
+    def invalidate(self) -> None:
+        """Drop all cached entries by starting a new generation."""
         try:
-            permission.object_types.add(content_type)  # type: ignore
-            permission.validated_save()
-        except Exception as e:  # pylint: disable=broad-except
-            print(f"ERROR: Could not assign permission to content type: {e}")
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, timeout=None)
+
+    @staticmethod
+    def _has_permission(user: Any, app_label: str, model: str, action: str) -> bool:
+        """Return True if an enabled ObjectPermission of the user or its groups grants the action on the model."""
+        ObjectPermission = global_apps.get_model("users", "ObjectPermission")  # pylint: disable=invalid-name
+        return (
+            ObjectPermission.objects.filter(
+                Q(users=user) | Q(groups__user=user),
+                enabled=True,
+                object_types__app_label=app_label,
+                object_types__model=model,
+                actions__contains=[action],
+            )
+            .distinct()
+            .exists()
+        )
+
+    @staticmethod
+    def _get_generation() -> int:
+        """Return the current generation counter."""
+        return cache.get_or_set(GENERATION_KEY, 0, timeout=None)
+
+
+query_permission_cache = QueryPermissionCache()
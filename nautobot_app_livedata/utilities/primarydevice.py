@@ -1,8 +1,20 @@
 """Utilities for getting the primary device for a given object."""
 
-from typing import Any, List, Optional
+from typing import Any, Iterable, List, Optional
+import uuid
 
-from .contenttype import ContentTypeUtils
+from django.db.models import Prefetch
+
+from .contenttype import get_model
+
+# Related fields needed to check the primary IP and the status without further queries
+DEVICE_RELATED_FIELDS = ("status", "primary_ip4", "primary_ip6")
+
+NOT_FOUND_ERRORS = {
+    "dcim.interface": "Interface does not exist",
+    "dcim.device": "Device does not exist",
+    "dcim.virtualchassis": "VirtualChassis does not exist",
+}
 
 
 class PrimaryDeviceUtils:
@@ -68,8 +80,8 @@ class PrimaryDeviceUtils:
             ValueError: If the interface/device/virtual chassis does not exist.
             ValueError: If the device status is not Active.
         """
-        Interface = ContentTypeUtils("dcim.interface").model  # pylint: disable=invalid-name
-        Device = ContentTypeUtils("dcim.device").model  # pylint: disable=invalid-name
+        Interface = get_model("dcim.interface")  # pylint: disable=invalid-name
+        Device = get_model("dcim.device")  # pylint: disable=invalid-name
         if self._object_type == "dcim.interface":
             try:
                 self._interface = Interface.objects.get(pk=self._pk)
@@ -89,8 +101,7 @@ class PrimaryDeviceUtils:
             except Device.DoesNotExist as err:
                 raise ValueError("Device does not exist") from err
         elif self._object_type == "dcim.virtualchassis":
-            from nautobot.dcim.models import VirtualChassis  # pylint: disable=import-outside-toplevel
-
+            VirtualChassis = get_model("dcim.virtualchassis")  # pylint: disable=invalid-name
             try:
                 self._virtual_chassis = VirtualChassis.objects.get(pk=self._pk)
                 if self._virtual_chassis.master:
@@ -139,6 +150,146 @@ class PrimaryDeviceUtils:
         if str(self._primary_device.status) != "Active":  # type: ignore
             raise ValueError("Device status is not 'Active'")
 
+    @classmethod
+    def resolve_many(cls, object_type: str, pks: Iterable[Any]) -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+        """Resolve the primary devices of many objects of the same type at once.
+
+        The result is the same as creating a PrimaryDeviceUtils instance per object,
+        but the objects, their devices and the virtual chassis members are loaded
+        with a constant number of queries, independent of the number of objects.
+
+        Args:
+            object_type (str): The object type, one of 'dcim.interface', 'dcim.device'
+                or 'dcim.virtualchassis'.
+            pks (Iterable): The primary keys of the objects.
+
+        Returns:
+            tuple: A dictionary of the primary key (as str) to the output of to_dict(),
+                and a dictionary of the primary key (as str) to the error message for
+                the objects that could not be resolved.
+
+        Raises:
+            ValueError: If the object type is not valid.
+        """
+        if object_type not in NOT_FOUND_ERRORS:
+            raise ValueError("Invalid object type")
+        keys = {}
+        errors = {}
+        for pk in pks:
+            try:
+                keys[uuid.UUID(str(pk))] = str(pk)
+            except ValueError:
+                errors[str(pk)] = NOT_FOUND_ERRORS[object_type]
+
+        # key -> (device, interface, virtual chassis id)
+        associated = {}
+        # virtual chassis id -> members
+        vc_members = {}
+        if object_type == "dcim.interface":
+            cls._load_interfaces(keys, associated)
+        elif object_type == "dcim.device":
+            cls._load_devices(keys, associated, errors)
+        else:
+            cls._load_virtual_chassis(keys, associated, vc_members)
+        for key in keys.values():
+            if key not in associated and key not in errors:
+                errors[key] = NOT_FOUND_ERRORS[object_type]
+        cls._load_vc_members(associated.values(), vc_members)
+
+        results = {}
+        for key, (device, interface, vc_id) in associated.items():
+            try:
+                primary_device, vc_id = cls._select_primary_device(device, vc_id, vc_members)
+            except ValueError as error:
+                errors[key] = str(error)
+                continue
+            results[key] = {
+                "object_type": object_type,
+                "pk": key,
+                "device": device.id,
+                "interface": interface.id if interface else None,
+                "virtual_chassis": vc_id,
+                "primary_device": primary_device.id,
+            }
+        return results, errors
+
+    @staticmethod
+    def _load_interfaces(keys: dict[uuid.UUID, str], associated: dict[str, tuple]) -> None:
+        """Load the interfaces of resolve_many() with their devices."""
+        Interface = get_model("dcim.interface")  # pylint: disable=invalid-name
+        queryset = Interface.objects.filter(pk__in=keys).select_related(
+            *(f"device__{field}" for field in DEVICE_RELATED_FIELDS)
+        )
+        for interface in queryset:
+            associated[keys[interface.pk]] = (interface.device, interface, None)
+
+    @staticmethod
+    def _load_devices(keys: dict[uuid.UUID, str], associated: dict[str, tuple], errors: dict[str, str]) -> None:
+        """Load the devices of resolve_many(), devices that are not active are errors."""
+        Device = get_model("dcim.device")  # pylint: disable=invalid-name
+        for device in Device.objects.filter(pk__in=keys).select_related(*DEVICE_RELATED_FIELDS):
+            if str(device.status) != "Active":
+                errors[keys[device.pk]] = f"Device '{device.name}' status is '{device.status}' and not 'Active'"
+                continue
+            associated[keys[device.pk]] = (device, None, None)
+
+    @staticmethod
+    def _load_virtual_chassis(
+        keys: dict[uuid.UUID, str], associated: dict[str, tuple], vc_members: dict[Any, list]
+    ) -> None:
+        """Load the virtual chassis of resolve_many() with their master and members."""
+        Device = get_model("dcim.device")  # pylint: disable=invalid-name
+        VirtualChassis = get_model("dcim.virtualchassis")  # pylint: disable=invalid-name
+        queryset = (
+            VirtualChassis.objects.filter(pk__in=keys)
+            .select_related(*(f"master__{field}" for field in DEVICE_RELATED_FIELDS))
+            .prefetch_related(Prefetch("members", queryset=Device.objects.select_related(*DEVICE_RELATED_FIELDS)))
+        )
+        for virtual_chassis in queryset:
+            members = vc_members[virtual_chassis.pk] = list(virtual_chassis.members.all())
+            device = virtual_chassis.master or (members[0] if members else None)
+            associated[keys[virtual_chassis.pk]] = (device, None, virtual_chassis.pk)
+
+    @staticmethod
+    def _load_vc_members(associated: Iterable[tuple], vc_members: dict[Any, list]) -> None:
+        """Load the members of all virtual chassis needed for the primary IP fallback in one query."""
+        vc_ids = {
+            device.virtual_chassis_id
+            for device, _, _ in associated
+            if device is not None
+            and not device.primary_ip
+            and device.virtual_chassis_id
+            and device.virtual_chassis_id not in vc_members
+        }
+        if vc_ids:
+            Device = get_model("dcim.device")  # pylint: disable=invalid-name
+            for member in Device.objects.filter(virtual_chassis_id__in=vc_ids).select_related(*DEVICE_RELATED_FIELDS):
+                vc_members.setdefault(member.virtual_chassis_id, []).append(member)
+
+    @staticmethod
+    def _select_primary_device(device: Any, vc_id: Any, vc_members: dict[Any, list]) -> tuple[Any, Any]:
+        """Return the primary device and the virtual chassis id for a device of resolve_many().
+
+        Raises:
+            ValueError: With the message of _get_primary_device() if there is no primary device.
+        """
+        if device is None:
+            raise ValueError("Device not found")
+        primary_device = device
+        if not primary_device.primary_ip:
+            if not device.virtual_chassis_id:
+                raise ValueError("Device does not have a primary IP address")
+            vc_id = device.virtual_chassis_id
+            members = vc_members.get(vc_id, [])
+            # Like _get_primary_device(), only the first member is considered.
+            if members and not members[0].primary_ip:
+                raise ValueError("Device does not have a primary IP address")
+            if members:
+                primary_device = members[0]
+        if str(primary_device.status) != "Active":
+            raise ValueError("Device status is not 'Active'")
+        return primary_device, vc_id
+
     @property
     def device(self) -> Optional[Any]:
         """Return the device that was given as input.
@@ -212,11 +363,9 @@ def get_livedata_commands(device: Any, custom_field_key: str) -> List[str]:
             f"`E3002:` Device {device.name} does not support the commands "
             f"required for Livedata because the custom field  {custom_field_key} doesn't exist."
         )
-    commands = device.platform.custom_field_data[custom_field_key].splitlines()
-    # trim trailing whitespace
-    commands = [command.rstrip() for command in commands]
-    # Return the commands to be executed
-    return commands
+    raw_commands = device.platform.custom_field_data[custom_field_key]
+    # Return the commands to be executed, without trailing whitespace
+    return [command.rstrip() for command in (raw_commands or "").splitlines()]
 
 
 def get_livedata_commands_for_device(device: Any) -> List[str]:
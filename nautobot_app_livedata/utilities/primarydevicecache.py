@@ -0,0 +1,158 @@
+"""Cache for the primary device resolution of PrimaryDeviceUtils."""
+
+import logging
+import threading
+from typing import Any, Optional
+
+from django.core.cache import cache
+
+from . import metrics, primarydevicemap
+from .appsettings import get_app_settings
+from .contenttype import get_model
+from .primarydevice import PrimaryDeviceUtils
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+CACHE_KEY_PREFIX = "nautobot_app_livedata.primary_device"
+GENERATION_KEY = f"{CACHE_KEY_PREFIX}.generation"
+
+
+class PrimaryDeviceCache:
+    """Cache the result of PrimaryDeviceUtils per (object_type, pk) in the Django cache.
+
+    The cache keys contain a generation counter that is stored in the Django cache
+    as well. `invalidate()` increments the counter, which is connected to the
+    post_save and post_delete signals of the models the resolution depends on,
+    so all web processes and workers drop their entries at once. Failed
+    resolutions are cached too, because they fail again until the inventory changes.
+
+    Hits and misses are counted per process, see `cache_info()`.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def timeout(self) -> int:
+        """Return the lifetime of an entry in seconds, 0 disables the cache."""
+        return int(get_app_settings().get("primary_device_cache_timeout") or 0)
+
+    def resolve(self, object_type: str, pk: Any) -> dict[str, Any]:
+        """Return the primary device information for the given object.
+
+        Args:
+            object_type (str): The object type, e.g. 'dcim.interface'.
+            pk (uuid): The primary key of the object.
+
+        Returns:
+            dict: The output of PrimaryDeviceUtils.to_dict().
+
+        Raises:
+            ValueError: If the primary device can not be resolved, see PrimaryDeviceUtils.
+        """
+        timeout = self.timeout
+        if not timeout:
+            return self._load(object_type, pk)
+        key = f"{CACHE_KEY_PREFIX}.{self._get_generation()}.{object_type}.{pk}"
+        entry = cache.get(key)
+        self._count(hit=entry is not None)
+        if entry is None:
+            try:
+                entry = {"result": self._load(object_type, pk)}
+            except ValueError as err:
+                entry = {"error": str(err)}
+            cache.set(key, entry, timeout=timeout)
+        if "error" in entry:
+            raise ValueError(entry["error"])
+        # The caller gets a copy and the pk as passed in, not the one of the first caller.
+        return {**entry["result"], "pk": pk}
+
+    def get_device_location(self, device_id: Any) -> Optional[dict[str, Any]]:
+        """Return the location tree and the tenant of a device, for the queue affinity of the query job.
+
+        The entries share the generation and the timeout of the primary device resolutions.
+
+        Args:
+            device_id (uuid): The primary key of the device.
+
+        Returns:
+            dict: `locations`, the pk and the path (e.g. 'APAC/Singapore') of the location of the
+                device and of its parent locations, nearest first, and `tenant`, the tenant name or None.
+                None if the device does not exist.
+        """
+        timeout = self.timeout
+        if not timeout:
+            return self._load_device_location(device_id)
+        key = f"{CACHE_KEY_PREFIX}.{self._get_generation()}.location.{device_id}"
+        entry = cache.get(key)
+        metrics.count_cache_request("device_location", entry is not None)
+        if entry is None:
+            entry = {"result": self._load_device_location(device_id)}
+            cache.set(key, entry, timeout=timeout)
+        return entry["result"]
+
+    def invalidate(self) -> None:
+        """Drop all cached entries by starting a new generation."""
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, timeout=None)
+
+    def cache_info(self) -> dict[str, Any]:
+        """Return the hit and miss counters of this process.
+
+        Returns:
+            dict: hits, misses and hit_rate (0.0 to 1.0).
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    @staticmethod
+    def _load(object_type: str, pk: Any) -> dict[str, Any]:
+        """Resolve the primary device from the primary device map if enabled, otherwise with PrimaryDeviceUtils."""
+        if primarydevicemap.is_enabled():
+            result = primarydevicemap.lookup(object_type, pk)
+            if result is not None:
+                return result
+        return PrimaryDeviceUtils(object_type=object_type, pk=pk).to_dict()
+
+    @staticmethod
+    def _load_device_location(device_id: Any) -> Optional[dict[str, Any]]:
+        """Load the location tree and the tenant of a device, see `get_device_location()`."""
+        Device = get_model("dcim.device")  # pylint: disable=invalid-name
+        device = Device.objects.select_related("location", "tenant").filter(pk=device_id).first()
+        if device is None:
+            return None
+        locations = []
+        if device.location is not None:
+            # ancestors() returns the tree from the root down to the location itself
+            path = []
+            for location in device.location.ancestors(include_self=True):
+                path.append(location.name)
+                locations.insert(0, (str(location.pk), "/".join(path)))
+        return {"locations": locations, "tenant": device.tenant.name if device.tenant is not None else None}
+
+    @staticmethod
+    def _get_generation() -> int:
+        """Return the current generation counter."""
+        return cache.get_or_set(GENERATION_KEY, 0, timeout=None)
+
+    def _count(self, hit: bool) -> None:
+        """Update the hit and miss counters, and the cache metrics."""
+        metrics.count_cache_request("primary_device", hit)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+primary_device_cache = PrimaryDeviceCache()
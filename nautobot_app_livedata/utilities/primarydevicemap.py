@@ -0,0 +1,316 @@
+"""Maintenance of the materialized primary device map (PrimaryDeviceMap)."""
+
+import logging
+from typing import Any, Iterable, Optional
+
+from django.apps import apps as global_apps
+from django.db.models import Q
+from django.utils import timezone
+
+from .appsettings import APP_NAME, get_app_settings
+from .contenttype import get_model
+from .primarydevice import NOT_FOUND_ERRORS, PrimaryDeviceUtils
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+OBJECT_TYPES = ("dcim.device", "dcim.interface", "dcim.virtualchassis")
+# Number of objects resolved and written per batch
+BATCH_SIZE = 2000
+UPDATE_FIELDS = [
+    "device_id",
+    "interface_id",
+    "virtual_chassis_id",
+    "primary_device_id",
+    "primary_ip_id",
+    "primary_ip",
+    "status",
+    "error",
+    "last_updated",
+]
+
+
+def is_enabled() -> bool:
+    """Return True if the primary device map is enabled in the app settings."""
+    return bool(get_app_settings().get("primary_device_map_enabled"))
+
+
+def _get_map_model() -> Any:
+    """Return the PrimaryDeviceMap model."""
+    return global_apps.get_model(APP_NAME, "PrimaryDeviceMap")
+
+
+def lookup(object_type: str, pk: Any) -> Optional[dict[str, Any]]:
+    """Return the primary device information of an object from the map.
+
+    Args:
+        object_type (str): The object type, e.g. 'dcim.interface'.
+        pk (uuid): The primary key of the object.
+
+    Returns:
+        dict: The data of PrimaryDeviceUtils.to_dict(), or None if the object is not in the map.
+
+    Raises:
+        ValueError: If the map records that the primary device can not be resolved.
+    """
+    entry = _get_map_model().objects.filter(object_type=object_type, object_id=pk).first()
+    if entry is None:
+        return None
+    return {**entry.to_dict(), "pk": pk}
+
+
+def lookup_many(object_type: str, pks: Iterable[Any]) -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+    """Return the map entries of many objects with one query.
+
+    Args:
+        object_type (str): The object type.
+        pks (Iterable): The primary keys of the objects.
+
+    Returns:
+        tuple: The results and the errors like PrimaryDeviceUtils.resolve_many(),
+            for the objects that are in the map.
+    """
+    results = {}
+    errors = {}
+    for entry in _get_map_model().objects.filter(object_type=object_type, object_id__in=list(pks)):
+        key = str(entry.object_id)
+        try:
+            results[key] = {**entry.to_dict(), "pk": key}
+        except ValueError as err:
+            errors[key] = str(err)
+    return results, errors
+
+
+def update_entries(object_type: str, pks: Iterable[Any]) -> int:
+    """Resolve the given objects and write their entries to the map.
+
+    Objects that no longer exist are removed from the map. Objects whose primary device
+    is deleted while they are resolved are skipped, the delete updates them again.
+
+    Args:
+        object_type (str): The object type.
+        pks (Iterable): The primary keys of the objects.
+
+    Returns:
+        int: The number of entries written.
+    """
+    PrimaryDeviceMap = _get_map_model()  # pylint: disable=invalid-name
+    Device = get_model("dcim.device")  # pylint: disable=invalid-name
+    pks = [str(pk) for pk in pks]
+    if not pks:
+        return 0
+    results, errors = PrimaryDeviceUtils.resolve_many(object_type, pks)
+    primary_devices = Device.objects.select_related("status", "primary_ip4", "primary_ip6").in_bulk(
+        {result["primary_device"] for result in results.values()}
+    )
+    entries = []
+    for key, result in results.items():
+        primary_device = primary_devices.get(result["primary_device"])
+        if primary_device is None:
+            logger.debug("Primary device of %s %s was deleted, entry not updated", object_type, key)
+            continue
+        primary_ip = primary_device.primary_ip
+        entries.append(
+            PrimaryDeviceMap(
+                object_type=object_type,
+                object_id=key,
+                device_id=result["device"],
+                interface_id=result["interface"],
+                virtual_chassis_id=result["virtual_chassis"],
+                primary_device_id=primary_device.pk,
+                primary_ip_id=primary_ip.pk if primary_ip else None,
+                primary_ip=str(primary_ip.address) if primary_ip else "",
+                status=str(primary_device.status),
+            )
+        )
+    missing = []
+    for key, error in errors.items():
+        if error == NOT_FOUND_ERRORS[object_type]:
+            missing.append(key)
+            continue
+        entries.append(PrimaryDeviceMap(object_type=object_type, object_id=key, error=error[:255]))
+    if missing:
+        PrimaryDeviceMap.objects.filter(object_type=object_type, object_id__in=missing).delete()
+    PrimaryDeviceMap.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["object_type", "object_id"],
+        update_fields=UPDATE_FIELDS,
+    )
+    return len(entries)
+
+
+def update_entries_in_batches(object_type: str, pks: Iterable[Any], batch_size: int = BATCH_SIZE) -> int:
+    """Write the entries of the given objects to the map, `batch_size` objects at a time.
+
+    Args:
+        object_type (str): The object type.
+        pks (Iterable): The primary keys of the objects, e.g. a streamed values_list().
+        batch_size (int): Number of objects resolved and written per batch.
+
+    Returns:
+        int: The number of entries written.
+    """
+    count = 0
+    batch = []
+    for pk in pks:
+        batch.append(pk)
+        if len(batch) >= batch_size:
+            count += update_entries(object_type, batch)
+            batch = []
+    return count + update_entries(object_type, batch)
+
+
+def delete_entries(object_type: str, pks: Iterable[Any]) -> None:
+    """Remove the entries of deleted objects from the map.
+
+    Args:
+        object_type (str): The object type.
+        pks (Iterable): The primary keys of the deleted objects.
+    """
+    _get_map_model().objects.filter(object_type=object_type, object_id__in=list(pks)).delete()
+
+
+def refresh_devices(device_ids: Iterable[Any]) -> None:
+    """Update all entries that depend on the given devices.
+
+    These are the entries of the devices, their interfaces and virtual chassis,
+    and of every object whose primary device is one of the devices, e.g. the
+    other members of a virtual chassis.
+
+    Args:
+        device_ids (Iterable): The primary keys of the changed devices.
+    """
+    PrimaryDeviceMap = _get_map_model()  # pylint: disable=invalid-name
+    Device = get_model("dcim.device")  # pylint: disable=invalid-name
+    Interface = get_model("dcim.interface")  # pylint: disable=invalid-name
+    device_ids = set(device_ids)
+    if not device_ids:
+        return
+    vc_ids = set(
+        Device.objects.filter(pk__in=device_ids, virtual_chassis__isnull=False).values_list(
+            "virtual_chassis_id", flat=True
+        )
+    )
+    vc_ids |= set(
+        PrimaryDeviceMap.objects.filter(device_id__in=device_ids, virtual_chassis_id__isnull=False).values_list(
+            "virtual_chassis_id", flat=True
+        )
+    )
+    # Members of the same virtual chassis may fall back to each other for the primary IP
+    device_ids |= set(Device.objects.filter(virtual_chassis_id__in=vc_ids).values_list("pk", flat=True))
+    device_ids |= set(
+        PrimaryDeviceMap.objects.filter(primary_device_id__in=device_ids).values_list("device_id", flat=True)
+    )
+    device_ids.discard(None)
+    update_entries_in_batches("dcim.device", device_ids)
+    update_entries_in_batches("dcim.virtualchassis", vc_ids)
+    update_entries_in_batches(
+        "dcim.interface", Interface.objects.filter(device_id__in=device_ids).values_list("pk", flat=True)
+    )
+
+
+def get_devices_for_ip_address(ip_address_id: Any) -> set:
+    """Return the devices that use the IP address as primary IP, now or according to the map.
+
+    Args:
+        ip_address_id (uuid): The primary key of the IPAddress.
+
+    Returns:
+        set: The primary keys of the devices.
+    """
+    Device = get_model("dcim.device")  # pylint: disable=invalid-name
+    device_ids = set(
+        Device.objects.filter(Q(primary_ip4_id=ip_address_id) | Q(primary_ip6_id=ip_address_id)).values_list(
+            "pk", flat=True
+        )
+    )
+    device_ids |= set(
+        _get_map_model().objects.filter(primary_ip_id=ip_address_id).values_list("primary_device_id", flat=True)
+    )
+    return device_ids
+
+
+def refresh_virtual_chassis(vc_id: Any) -> None:
+    """Update the entry of a virtual chassis and of the devices that are or were its members.
+
+    Args:
+        vc_id (uuid): The primary key of the changed virtual chassis.
+    """
+    Device = get_model("dcim.device")  # pylint: disable=invalid-name
+    update_entries("dcim.virtualchassis", [vc_id])
+    device_ids = set(Device.objects.filter(virtual_chassis_id=vc_id).values_list("pk", flat=True))
+    device_ids |= set(_get_map_model().objects.filter(virtual_chassis_id=vc_id).values_list("device_id", flat=True))
+    refresh_devices(device_ids)
+
+
+def refresh_for_object(model_label: str, pk: Any) -> None:
+    """Update the map after an object the resolution depends on was saved or deleted.
+
+    Errors are logged and not raised, a failed update must not break saving the
+    object. The scheduled rebuild job corrects the map in that case.
+
+    Args:
+        model_label (str): The model of the changed object, e.g. 'dcim.device'.
+        pk (uuid): The primary key of the changed object.
+    """
+    try:
+        if model_label == "dcim.device":
+            refresh_devices({pk})
+        elif model_label == "dcim.interface":
+            update_entries("dcim.interface", [pk])
+        elif model_label == "dcim.virtualchassis":
+            refresh_virtual_chassis(pk)
+        elif model_label == "ipam.ipaddress":
+            refresh_devices(get_devices_for_ip_address(pk))
+        elif model_label == "extras.status":
+            Device = get_model("dcim.device")  # pylint: disable=invalid-name
+            refresh_devices(Device.objects.filter(status_id=pk).values_list("pk", flat=True))
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Failed to update the primary device map for %s %s", model_label, pk)
+
+
+def resolve_many(object_type: str, pks: Iterable[Any]) -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+    """Resolve the primary devices of many objects, reading the map first if it is enabled.
+
+    Objects that are not in the map are resolved with PrimaryDeviceUtils.resolve_many().
+
+    Args:
+        object_type (str): The object type.
+        pks (Iterable): The primary keys of the objects.
+
+    Returns:
+        tuple: The results and the errors like PrimaryDeviceUtils.resolve_many().
+    """
+    pks = [str(pk) for pk in pks]
+    if not is_enabled():
+        return PrimaryDeviceUtils.resolve_many(object_type, pks)
+    results, errors = lookup_many(object_type, pks)
+    missing = [pk for pk in pks if pk not in results and pk not in errors]
+    if missing:
+        missing_results, missing_errors = PrimaryDeviceUtils.resolve_many(object_type, missing)
+        results.update(missing_results)
+        errors.update(missing_errors)
+    return results, errors
+
+
+def rebuild(batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    """Rebuild the whole map.
+
+    The primary keys of all devices, interfaces and virtual chassis are streamed
+    with iterator() and resolved in batches. Entries that were not written by the
+    rebuild, i.e. of objects that no longer exist, are removed at the end.
+
+    Args:
+        batch_size (int): Number of objects resolved and written per batch.
+
+    Returns:
+        dict: The number of entries written per object type, and the number of removed entries as 'removed'.
+    """
+    started = timezone.now()
+    counts = {}
+    for object_type in OBJECT_TYPES:
+        pks = get_model(object_type).objects.values_list("pk", flat=True).iterator(chunk_size=batch_size)
+        counts[object_type] = update_entries_in_batches(object_type, pks, batch_size)
+    counts["removed"], _ = _get_map_model().objects.filter(last_updated__lt=started).delete()
+    logger.info("Rebuilt the primary device map: %s", counts)
+    return counts
@@ -0,0 +1,168 @@
+"""Assignment of jobs to job queues based on the runtime history of the jobs."""
+
+from datetime import datetime
+import logging
+from typing import Any, Iterable, Optional
+
+from django.apps import apps as global_apps
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+# Jobs whose mean runtime exceeds this number of seconds are kept off the interactive queue
+LONG_RUNNING_SECONDS = 60
+# Number of days of JobResults used to measure the runtimes
+HISTORY_DAYS = 7
+
+
+class JobLoad:  # pylint: disable=too-few-public-methods
+    """Runtime statistics of a job in the history window."""
+
+    def __init__(self, runs: int, busy_seconds: float) -> None:
+        """Initialize the statistics.
+
+        Args:
+            runs (int): Number of finished runs.
+            busy_seconds (float): Total runtime of the runs in seconds.
+        """
+        self.runs = runs
+        self.busy_seconds = busy_seconds
+
+    @property
+    def mean_seconds(self) -> float:
+        """Return the mean runtime of a run in seconds."""
+        return self.busy_seconds / self.runs if self.runs else 0.0
+
+
+def get_job_loads(since: datetime) -> dict[Any, JobLoad]:
+    """Return the runtime statistics of every job that finished runs since the given date.
+
+    Args:
+        since (datetime): Start of the history window.
+
+    Returns:
+        dict: JobLoad by Job primary key.
+    """
+    JobResult = global_apps.get_model("extras", "JobResult")  # pylint: disable=invalid-name
+    duration = ExpressionWrapper(F("date_done") - F("date_started"), output_field=DurationField())
+    rows = (
+        JobResult.objects.filter(
+            job_model__isnull=False,
+            date_started__isnull=False,
+            date_done__isnull=False,
+            date_done__gte=since,
+        )
+        .order_by()
+        .values("job_model_id")
+        .annotate(runs=Count("pk"), busy=Sum(duration))
+    )
+    return {
+        row["job_model_id"]: JobLoad(row["runs"], row["busy"].total_seconds() if row["busy"] else 0.0) for row in rows
+    }
+
+
+def propose_assignment(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    job_ids: Iterable[Any],
+    loads: dict[Any, JobLoad],
+    queue_ids: list[Any],
+    interactive_queue_id: Any,
+    interactive_job_ids: Iterable[Any] = (),
+    long_running_seconds: float = LONG_RUNNING_SECONDS,
+) -> dict[Any, Any]:
+    """Propose a job queue for every job with a runtime history.
+
+    Short jobs and the given interactive jobs, e.g. the Livedata query job, are
+    assigned to the interactive queue. Long-running jobs are spread over the
+    other queues, largest load first onto the least loaded queue, so that no
+    slow job blocks the interactive queue and the load of the other queues is
+    balanced. If there is no other queue, the long-running jobs stay on the
+    interactive queue.
+
+    Args:
+        job_ids (Iterable): The primary keys of the jobs to assign.
+        loads (dict): JobLoad by Job primary key, see `get_job_loads()`. Jobs without
+            a runtime history are not assigned.
+        queue_ids (list): The primary keys of the job queues to balance over.
+        interactive_queue_id (uuid): The primary key of the queue for the short jobs.
+        interactive_job_ids (Iterable): Jobs that are always assigned to the interactive queue.
+        long_running_seconds (float): Jobs with a longer mean runtime are long-running.
+
+    Returns:
+        dict: The proposed job queue primary key by Job primary key.
+    """
+    interactive_job_ids = set(interactive_job_ids)
+    batch_queue_ids = [queue_id for queue_id in queue_ids if queue_id != interactive_queue_id]
+    assignment = {}
+    long_running = []
+    for job_id in job_ids:
+        load = loads.get(job_id)
+        if load is None:
+            continue
+        if job_id in interactive_job_ids or load.mean_seconds <= long_running_seconds or not batch_queue_ids:
+            assignment[job_id] = interactive_queue_id
+        else:
+            long_running.append(job_id)
+    queue_busy = {queue_id: 0.0 for queue_id in batch_queue_ids}
+    for job_id in sorted(long_running, key=lambda job_id: loads[job_id].busy_seconds, reverse=True):
+        queue_id = min(queue_busy, key=lambda queue_id: (queue_busy[queue_id], batch_queue_ids.index(queue_id)))
+        assignment[job_id] = queue_id
+        queue_busy[queue_id] += loads[job_id].busy_seconds
+    return assignment
+
+
+def estimate_wait_seconds(busy_seconds: float, runs: int, window_seconds: float, workers: int) -> Optional[float]:
+    """Estimate the mean time a job waits in a queue before a worker picks it up.
+
+    Uses the Sakasegawa approximation for an M/M/c queue with c workers:
+    Wq = rho ** (sqrt(2 * (c + 1)) - 1) / (c * (1 - rho)) * mean runtime.
+
+    Args:
+        busy_seconds (float): Total runtime of the jobs of the queue in the window.
+        runs (int): Number of runs in the window.
+        window_seconds (float): Length of the history window in seconds.
+        workers (int): Number of workers listening on the queue.
+
+    Returns:
+        float: The estimated wait in seconds, or None if the queue is saturated.
+    """
+    if not runs or not busy_seconds:
+        return 0.0
+    workers = max(workers, 1)
+    utilization = busy_seconds / (window_seconds * workers)
+    if utilization >= 1:
+        return None
+    mean_seconds = busy_seconds / runs
+    return utilization ** (((2 * (workers + 1)) ** 0.5) - 1) / (workers * (1 - utilization)) * mean_seconds
+
+
+def project_queues(
+    assignment: dict[Any, Any], loads: dict[Any, JobLoad], window_seconds: float, workers: dict[Any, int]
+) -> dict[Any, dict[str, Any]]:
+    """Project the load and the wait time of every queue for an assignment.
+
+    Args:
+        assignment (dict): The job queue primary key by Job primary key.
+        loads (dict): JobLoad by Job primary key.
+        window_seconds (float): Length of the history window in seconds.
+        workers (dict): Number of workers by job queue primary key.
+
+    Returns:
+        dict: Per job queue primary key the number of jobs and runs, the busy
+            seconds, the utilization and the estimated wait in seconds (None if saturated).
+    """
+    projection = {queue_id: {"jobs": 0, "runs": 0, "busy_seconds": 0.0} for queue_id in workers}
+    for job_id, queue_id in assignment.items():
+        load = loads.get(job_id)
+        if load is None:
+            continue
+        queue = projection.setdefault(queue_id, {"jobs": 0, "runs": 0, "busy_seconds": 0.0})
+        queue["jobs"] += 1
+        queue["runs"] += load.runs
+        queue["busy_seconds"] += load.busy_seconds
+    for queue_id, queue in projection.items():
+        queue_workers = max(workers.get(queue_id, 1), 1)
+        queue["utilization"] = queue["busy_seconds"] / (window_seconds * queue_workers)
+        queue["wait_seconds"] = estimate_wait_seconds(
+            queue["busy_seconds"], queue["runs"], window_seconds, queue_workers
+        )
+    return projection
@@ -0,0 +1,189 @@
+"""Routing of Livedata jobs to the configured job queues."""
+
+import logging
+from typing import Any, Optional
+
+from django.core.checks import Warning as CheckWarning
+
+from .appsettings import get_app_settings
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+# Interactive: queries from the Nautobot UI (session authenticated), one device per click.
+# Bulk: queries from API clients (token authenticated), typically scripted over many devices.
+# Maintenance: the cleanup and queue alignment jobs of this app.
+QUEUE_ROLE_INTERACTIVE = "interactive"
+QUEUE_ROLE_BULK = "bulk"
+QUEUE_ROLE_MAINTENANCE = "maintenance"
+QUEUE_ROLES = (QUEUE_ROLE_INTERACTIVE, QUEUE_ROLE_BULK, QUEUE_ROLE_MAINTENANCE)
+
+
+def get_queue_for_role(role: str) -> Optional[str]:
+    """Return the job queue name configured for the given role.
+
+    Args:
+        role (str): One of 'interactive', 'bulk' or 'maintenance'.
+
+    Returns:
+        str: The queue name from `query_job_queue_routing`, or `query_job_task_queue`
+            if no queue is configured for the role.
+    """
+    app_settings = get_app_settings()
+    routing = app_settings.get("query_job_queue_routing") or {}
+    return routing.get(role) or app_settings.get("query_job_task_queue")
+
+
+def get_query_queue_role(request: Any) -> str:
+    """Classify a query request as interactive or bulk work.
+
+    Requests authenticated with an API token come from scripts and automation and
+    are treated as bulk work. Everything else, i.e. the session authenticated
+    requests of the Live Data tabs in the UI, is interactive.
+
+    Args:
+        request (Request): The request of the query API.
+
+    Returns:
+        str: 'interactive' or 'bulk'.
+    """
+    if getattr(request, "auth", None) is not None:
+        return QUEUE_ROLE_BULK
+    return QUEUE_ROLE_INTERACTIVE
+
+
+def get_query_task_queue(request: Any) -> Optional[str]:
+    """Return the job queue name a query request is routed to.
+
+    Args:
+        request (Request): The request of the query API.
+
+    Returns:
+        str: The job queue name.
+    """
+    return get_queue_for_role(get_query_queue_role(request))
+
+
+def get_routed_queues(roles: tuple[str, ...] = QUEUE_ROLES) -> list[str]:
+    """Return the distinct queue names the given roles are routed to.
+
+    Args:
+        roles (tuple): The roles to collect the queues for, in order of precedence.
+
+    Returns:
+        list[str]: The queue names, without duplicates.
+    """
+    queues = []
+    for role in roles:
+        queue = get_queue_for_role(role)
+        if queue and queue not in queues:
+            queues.append(queue)
+    return queues
+
+
+def get_affinity_queues() -> list[str]:
+    """Return the distinct queue names configured in `query_job_queue_affinity`.
+
+    Returns:
+        list[str]: The queue names of the location and tenant mappings.
+    """
+    affinity = get_app_settings().get("query_job_queue_affinity") or {}
+    queues = []
+    for mapping in (affinity.get("locations") or {}, affinity.get("tenants") or {}):
+        for queue in mapping.values():
+            if queue and queue not in queues:
+                queues.append(queue)
+    return queues
+
+
+def get_query_job_queues() -> list[str]:
+    """Return all queue names the Livedata query job may be sent to.
+
+    Returns:
+        list[str]: The interactive and bulk queues followed by the affinity queues.
+    """
+    queues = get_routed_queues((QUEUE_ROLE_INTERACTIVE, QUEUE_ROLE_BULK))
+    return queues + [queue for queue in get_affinity_queues() if queue not in queues]
+
+
+def get_device_affinity_queue(device_id: Any) -> Optional[str]:
+    """Return the job queue close to the given device.
+
+    The location of the device and then its parent locations up to the root are
+    looked up in the `locations` mapping of `query_job_queue_affinity`, so the
+    nearest configured location wins. A location is given by its pk or by its path
+    of location names from the root, e.g. 'APAC/Singapore', because the names are
+    only unique among the children of a parent. If no location matches, the tenant
+    of the device is looked up in the `tenants` mapping.
+
+    The location tree and the tenant of the device are cached, see
+    `PrimaryDeviceCache.get_device_location()`.
+
+    Args:
+        device_id (uuid): The primary key of the device the job connects to.
+
+    Returns:
+        str: The queue name, or None if no mapping applies to the device.
+    """
+    affinity = get_app_settings().get("query_job_queue_affinity") or {}
+    locations = affinity.get("locations") or {}
+    tenants = affinity.get("tenants") or {}
+    if not device_id or not (locations or tenants):
+        return None
+    from .primarydevicecache import primary_device_cache  # pylint: disable=import-outside-toplevel
+
+    device_location = primary_device_cache.get_device_location(device_id)
+    if device_location is None:
+        return None
+    for location_pk, path in device_location["locations"]:
+        queue = locations.get(location_pk) or locations.get(path)
+        if queue:
+            return queue
+    return tenants.get(device_location["tenant"])
+
+
+def get_query_job_queue(request: Any, device_id: Any) -> Optional[str]:
+    """Return the job queue a query for the given device is sent to.
+
+    The queue close to the device, see `get_device_affinity_queue()`, takes
+    precedence over the queue the request is routed to, see `get_query_task_queue()`.
+
+    Args:
+        request (Request): The request of the query API.
+        device_id (uuid): The primary key of the device the job connects to.
+
+    Returns:
+        str: The job queue name.
+    """
+    return get_device_affinity_queue(device_id) or get_query_task_queue(request)
+
+
+def check_queue_workers(app_configs: Any = None, **kwargs: Any) -> list[CheckWarning]:  # pylint: disable=unused-argument
+    """Django system check: warn about routed queues without a Celery worker.
+
+    The check only runs when `query_job_queue_routing` or `query_job_queue_affinity`
+    is configured, because it has to ask the Celery workers for the queues they listen on.
+
+    Returns:
+        list[Warning]: One warning per queue without a worker.
+    """
+    routing = get_app_settings().get("query_job_queue_routing") or {}
+    if not any(routing.values()) and not get_affinity_queues():
+        return []
+    from nautobot.extras.utils import get_celery_queues  # pylint: disable=import-outside-toplevel
+
+    try:
+        celery_queues = get_celery_queues()
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not get the Celery queues to check the Livedata queue routing: %s", error)
+        return []
+    queues = get_routed_queues()
+    queues += [queue for queue in get_affinity_queues() if queue not in queues]
+    return [
+        CheckWarning(
+            f"No Celery worker is listening on the Livedata job queue '{queue}'.",
+            hint=f"Start a worker with `nautobot-server celery worker --queues {queue}` or change the routing.",
+            id="nautobot_app_livedata.W001",
+        )
+        for queue in queues
+        if not celery_queues.get(queue)
+    ]
@@ -0,0 +1,123 @@
+"""Per-command access to the output of a Livedata query JobResult.
+
+The Live Data tabs first load a summary of the commands and the size of their
+output, and then the output of one command at a time, so a multi-megabyte
+output is neither transferred nor rendered before it is opened.
+"""
+
+import logging
+from typing import Any, Optional
+
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+
+from nautobot_app_livedata.utilities import metrics
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+CACHE_KEY_PREFIX = "nautobot_app_livedata.result_output"
+# Seconds a summary is cached, a finished JobResult does not change anymore
+CACHE_TIMEOUT = 3600
+# JobResult states after which the result does not change anymore
+FINAL_STATES = ("SUCCESS", "FAILURE", "REVOKED")
+
+
+def _as_text(value: Any) -> str:
+    """Return the output of a command as text, the output filters may return other types."""
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def summarize_result(result: Any) -> list[dict[str, Any]]:
+    """Return the commands of a query result with the size of their output.
+
+    Args:
+        result (list): The result of the Livedata query job, a list of dictionaries
+            with 'command', 'stdout' and 'stderr'.
+
+    Returns:
+        list[dict]: Per command the index, command, and the number of characters
+            and lines of stdout and the number of characters of stderr.
+    """
+    if not isinstance(result, list):
+        return []
+    commands = []
+    for index, output in enumerate(result):
+        if not isinstance(output, dict):
+            continue
+        stdout = _as_text(output.get("stdout"))
+        commands.append(
+            {
+                "index": index,
+                "command": _as_text(output.get("command")),
+                "size": len(stdout),
+                "lines": stdout.count("\n") + 1 if stdout else 0,
+                "stderr_size": len(_as_text(output.get("stderr"))),
+            }
+        )
+    return commands
+
+
+def get_result_summary(job_result_id: Any) -> Optional[dict[str, Any]]:
+    """Return the status of a JobResult and, once it succeeded, the summary of its commands.
+
+    The summary of a finished JobResult is cached, the result is loaded from the
+    database only once, however often the tab is opened.
+
+    Args:
+        job_result_id (uuid): The primary key of the JobResult.
+
+    Returns:
+        dict: jobresult_id, status and commands, see `summarize_result()`. None if the
+            JobResult does not exist.
+    """
+    key = f"{CACHE_KEY_PREFIX}.{job_result_id}"
+    summary = cache.get(key)
+    metrics.count_cache_request("result_output", summary is not None)
+    if summary is not None:
+        return summary
+    JobResult = global_apps.get_model("extras", "JobResult")  # pylint: disable=invalid-name
+    status = JobResult.objects.filter(pk=job_result_id).values_list("status", flat=True).first()
+    if status is None:
+        return None
+    summary = {"jobresult_id": str(job_result_id), "status": status, "commands": []}
+    if status == "SUCCESS":
+        result = JobResult.objects.filter(pk=job_result_id).values_list("result", flat=True).first()
+        summary["commands"] = summarize_result(result)
+    if status in FINAL_STATES:
+        cache.set(key, summary, timeout=CACHE_TIMEOUT)
+    return summary
+
+
+def get_command_output(job_result_id: Any, index: int) -> Optional[dict[str, Any]]:
+    """Return the output of one command of a JobResult.
+
+    Only the element of the command is read from the result in the database,
+    not the output of the other commands.
+
+    Args:
+        job_result_id (uuid): The primary key of the JobResult.
+        index (int): The position of the command in the result.
+
+    Returns:
+        dict: index, command, stdout and stderr. None if the JobResult or the command
+            does not exist.
+    """
+    JobResult = global_apps.get_model("extras", "JobResult")  # pylint: disable=invalid-name
+    element = KeyTransform(str(index), "result")
+    row = (
+        JobResult.objects.filter(pk=job_result_id)
+        .annotate(
+            output_command=KeyTextTransform("command", element),
+            output_stdout=KeyTextTransform("stdout", element),
+            output_stderr=KeyTextTransform("stderr", element),
+        )
+        .values_list("output_command", "output_stdout", "output_stderr")
+        .first()
+    )
+    if row is None or row[0] is None:
+        return None
+    command, stdout, stderr = row
+    return {"index": index, "command": command, "stdout": stdout or "", "stderr": stderr or ""}
@@ -0,0 +1,173 @@
+"""Inline execution of the Livedata query Job for the synchronous fast path of the query API."""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from django.apps import apps as global_apps
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+# Deadline, in time.monotonic() seconds, of the inline run in the current thread
+_deadline = threading.local()
+
+
+def get_remaining_time() -> Optional[float]:
+    """Return the seconds left until the deadline of the inline run in the current thread.
+
+    Returns:
+        float: The seconds left, 0 once the deadline has passed. None if the current
+            thread does not run a job inline or the run has no timeout.
+    """
+    deadline = getattr(_deadline, "value", None)
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+class SyncJobRunner:  # pylint: disable=too-few-public-methods
+    """Run jobs in a bounded thread pool of the web process instead of a Celery worker.
+
+    The JobResult is created before the job is submitted, so every inline run is
+    recorded exactly like an enqueued one. When all slots of the pool are busy,
+    `submit()` returns None and the caller falls back to normal enqueueing.
+
+    The thread of an inline run can not be killed. With a timeout, the job gets a
+    deadline instead, see `get_remaining_time()`, and limits its connection and
+    command timeouts to the time left.
+    """
+
+    def __init__(self, max_workers: int, timeout: Optional[float] = None) -> None:
+        """Initialize the runner.
+
+        Args:
+            max_workers (int): Number of jobs that may run inline at the same time. 0 disables the runner.
+            timeout (float): Seconds from the submit until the deadline of an inline run, None for no deadline.
+        """
+        self.max_workers = max(int(max_workers or 0), 0)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_workers) if self.max_workers else None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._logging_ready = False
+
+    def submit(
+        self, job_model: Any, user: Any, task_queue: Optional[str], job_kwargs: dict[str, Any]
+    ) -> Optional[tuple[Any, Future]]:
+        """Create a JobResult and run the job in the thread pool.
+
+        Args:
+            job_model (extras.Job): The Job to run.
+            user (User): The user that runs the job.
+            task_queue (str): The queue name recorded in the JobResult.
+            job_kwargs (dict): Keyword arguments passed to the job.
+
+        Returns:
+            tuple: The created JobResult and a Future that resolves to the finished JobResult,
+                or None if the runner is disabled or saturated.
+        """
+        if self._slots is None or not self._slots.acquire(blocking=False):  # pylint: disable=consider-using-with
+            return None
+        try:
+            deadline = time.monotonic() + self.timeout if self.timeout else None
+            job_result = self._create_job_result(job_model, user, task_queue)
+            future = self._get_executor().submit(self._run, job_result.pk, job_model.class_path, job_kwargs, deadline)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return job_result, future
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the thread pool on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="livedata-sync")
+        return self._executor
+
+    @staticmethod
+    def _create_job_result(job_model: Any, user: Any, task_queue: Optional[str]) -> Any:
+        """Create the PENDING JobResult with the same celery_kwargs enqueue_job() would store."""
+        JobResult = global_apps.get_model("extras", "JobResult")  # pylint: disable=invalid-name
+        celery_kwargs = {
+            "nautobot_job_job_model_id": job_model.id,
+            "nautobot_job_profile": False,
+            "nautobot_job_user_id": user.id,
+            "nautobot_job_ignore_singleton_lock": False,
+            "queue": task_queue,
+        }
+        if job_model.soft_time_limit > 0:
+            celery_kwargs["soft_time_limit"] = job_model.soft_time_limit
+        if job_model.time_limit > 0:
+            celery_kwargs["time_limit"] = job_model.time_limit
+        return JobResult.objects.create(
+            name=job_model.name,
+            job_model=job_model,
+            user=user,
+            celery_kwargs=celery_kwargs,
+        )
+
+    def _setup_logging(self) -> None:
+        """Send job log messages of inline runs to the JobLogEntry table like a Celery worker does."""
+        if self._logging_ready:
+            return
+        from nautobot.core.celery import app, setup_nautobot_job_logging  # pylint: disable=import-outside-toplevel
+
+        setup_nautobot_job_logging(None, None, app.conf)
+        self._logging_ready = True
+
+    def _run(
+        self, job_result_pk: Any, class_path: str, job_kwargs: dict[str, Any], deadline: Optional[float] = None
+    ) -> Any:
+        """Run the job eagerly and store its outcome in the JobResult.
+
+        This follows the synchronous branch of JobResult.enqueue_job(), which cannot be
+        used here because it installs a SIGALRM handler and that only works in the main thread.
+        """
+        from nautobot.core.utils.logging import sanitize  # pylint: disable=import-outside-toplevel
+        from nautobot.extras.choices import JobResultStatusChoices  # pylint: disable=import-outside-toplevel
+        from nautobot.extras.jobs import run_job  # pylint: disable=import-outside-toplevel
+
+        JobResult = global_apps.get_model("extras", "JobResult")  # pylint: disable=invalid-name
+        _deadline.value = deadline
+        try:
+            self._setup_logging()
+            job_result = JobResult.objects.get(pk=job_result_pk)
+            job_result.date_started = timezone.now()
+            job_result.status = JobResultStatusChoices.STATUS_STARTED
+            job_result.save()
+            eager_result = run_job.apply(
+                args=[class_path],
+                kwargs=job_kwargs,
+                task_id=str(job_result.pk),
+                **job_result.celery_kwargs,
+            )
+            job_result.refresh_from_db()
+            if JobResultStatusChoices.precedence(job_result.status) > JobResultStatusChoices.precedence(
+                eager_result.status
+            ):
+                if eager_result.status in JobResultStatusChoices.EXCEPTION_STATES and isinstance(
+                    eager_result.result, Exception
+                ):
+                    job_result.result = {
+                        "exc_type": type(eager_result.result).__name__,
+                        "exc_message": sanitize(str(eager_result.result)),
+                    }
+                elif eager_result.result is not None:
+                    job_result.result = sanitize(eager_result.result)
+                job_result.status = eager_result.status
+            if not job_result.date_done:
+                job_result.date_done = timezone.now()
+            job_result.save()
+            return job_result
+        except Exception:
+            logger.exception("Inline run of JobResult %s failed", job_result_pk)
+            raise
+        finally:
+            _deadline.value = None
+            # Worker threads open their own database connections, do not leak them.
+            connections.close_all()
@@ -0,0 +1,242 @@
+"""Tracing of Livedata queries, from the API request to the commands on the device.
+
+The API request, the enqueueing of the query job, the steps of the job and the
+device session are recorded as a hierarchy of spans. The trace context is passed
+to the job in its `trace_context` keyword argument, in the W3C `traceparent`
+format, so one trace covers the request and the job on the Celery worker.
+
+The exporter is selected with the `tracing_exporter` setting:
+
+- None (default): Tracing is disabled, the spans are no-ops.
+- "opentelemetry": The spans are recorded with the OpenTelemetry API, and exported
+  by the TracerProvider configured in the deployment, e.g. to a local collector.
+- "file": Each finished span is appended as one JSON line to `tracing_file`, e.g.
+  for tests or to inspect a single query.
+"""
+
+from contextlib import contextmanager
+import contextvars
+from functools import lru_cache
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from .appsettings import APP_NAME, get_app_settings
+
+logger = logging.getLogger("nautobot_app_livedata")
+
+# Keyword argument of the query job that holds the trace context
+TRACE_CONTEXT_KWARG = "trace_context"
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class NoopSpan:  # pylint: disable=too-few-public-methods
+    """Span that records nothing."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Ignore the attribute."""
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class NoopTracer:
+    """Tracer used when tracing is disabled."""
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[dict[str, Any]] = None) -> Iterator[NoopSpan]:  # pylint: disable=unused-argument
+        """Run the block without recording a span."""
+        yield NOOP_SPAN
+
+    def get_trace_context(self) -> dict[str, str]:
+        """Return no trace context."""
+        return {}
+
+    @contextmanager
+    def attach(self, trace_context: Optional[dict[str, str]]) -> Iterator[None]:  # pylint: disable=unused-argument
+        """Run the block without a remote parent."""
+        yield
+
+
+class FileSpan:
+    """Span of the FileTracer."""
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: dict[str, Any]) -> None:
+        """Start a new span."""
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.attributes = dict(attributes)
+        self.status = "OK"
+        self.start_time = time.time()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute of the span."""
+        self.attributes[key] = value
+
+    def to_dict(self, end_time: float) -> dict[str, Any]:
+        """Return the finished span as a JSON serializable dictionary."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time": self.start_time,
+            "end_time": end_time,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class FileTracer:
+    """Tracer that appends each finished span as one JSON line to a file."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize the tracer.
+
+        Args:
+            path (str): The file the spans are appended to.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # (trace_id, span_id) of the current span
+        self._current = contextvars.ContextVar(f"{APP_NAME}.tracing.{id(self)}", default=None)
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[dict[str, Any]] = None) -> Iterator[FileSpan]:
+        """Record the block as a child span of the current span.
+
+        An exception raised by the block sets the status of the span to ERROR.
+        """
+        parent = self._current.get()
+        trace_id, parent_span_id = parent if parent else (secrets.token_hex(16), None)
+        file_span = FileSpan(name, trace_id, parent_span_id, attributes or {})
+        token = self._current.set((trace_id, file_span.span_id))
+        try:
+            yield file_span
+        except BaseException as error:
+            file_span.status = "ERROR"
+            file_span.attributes["exception.type"] = type(error).__name__
+            file_span.attributes["exception.message"] = str(error)
+            raise
+        finally:
+            self._current.reset(token)
+            self._write(file_span.to_dict(time.time()))
+
+    def get_trace_context(self) -> dict[str, str]:
+        """Return the trace context of the current span, empty outside of a span."""
+        current = self._current.get()
+        if current is None:
+            return {}
+        return {"traceparent": f"00-{current[0]}-{current[1]}-01"}
+
+    @contextmanager
+    def attach(self, trace_context: Optional[dict[str, str]]) -> Iterator[None]:
+        """Make the spans of the block children of the span of the trace context."""
+        match = TRACEPARENT_PATTERN.match((trace_context or {}).get("traceparent", ""))
+        if match is None:
+            yield
+            return
+        token = self._current.set((match.group(1), match.group(2)))
+        try:
+            yield
+        finally:
+            self._current.reset(token)
+
+    def _write(self, finished_span: dict[str, Any]) -> None:
+        """Append a finished span to the file, a failure is only logged."""
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(finished_span, default=str) + "\n")
+        except OSError as error:
+            logger.warning("Could not write the span %s to %s: %s", finished_span["name"], self.path, error)
+
+
+class OpenTelemetryTracer:
+    """Tracer that records the spans with the OpenTelemetry API."""
+
+    def __init__(self) -> None:
+        """Initialize the tracer, opentelemetry-api must be installed."""
+        # opentelemetry-api is an optional dependency, see get_tracer()
+        from opentelemetry import context, propagate, trace  # pylint: disable=import-error,import-outside-toplevel
+
+        self._context = context
+        self._propagate = propagate
+        self._tracer = trace.get_tracer(APP_NAME)
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[dict[str, Any]] = None) -> Iterator[Any]:
+        """Record the block as a child span of the current span."""
+        with self._tracer.start_as_current_span(name, attributes=attributes) as otel_span:
+            yield otel_span
+
+    def get_trace_context(self) -> dict[str, str]:
+        """Return the trace context of the current span."""
+        carrier = {}
+        self._propagate.inject(carrier)
+        return carrier
+
+    @contextmanager
+    def attach(self, trace_context: Optional[dict[str, str]]) -> Iterator[None]:
+        """Make the spans of the block children of the span of the trace context."""
+        if not trace_context:
+            yield
+            return
+        token = self._context.attach(self._propagate.extract(trace_context))
+        try:
+            yield
+        finally:
+            self._context.detach(token)
+
+
+@lru_cache(maxsize=1)
+def get_tracer() -> Any:
+    """Return the tracer selected by the `tracing_exporter` setting.
+
+    Returns:
+        NoopTracer, FileTracer or OpenTelemetryTracer: The tracer. A NoopTracer if tracing
+            is disabled or the exporter can not be used.
+    """
+    config = get_app_settings()
+    exporter = config.get("tracing_exporter")
+    if exporter == "file" and config.get("tracing_file"):
+        return FileTracer(config["tracing_file"])
+    if exporter == "opentelemetry":
+        try:
+            return OpenTelemetryTracer()
+        except ImportError:
+            logger.warning("tracing_exporter 'opentelemetry' requires opentelemetry-api, tracing is disabled.")
+    elif exporter:
+        logger.warning("Unknown tracing_exporter %r or tracing_file missing, tracing is disabled.", exporter)
+    return NoopTracer()
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """Return a context manager that records the block as a span, see `get_tracer()`.
+
+    Args:
+        name (str): The name of the span, e.g. 'LivedataQueryJob.run'.
+        **attributes: The attributes of the span. None values are left out.
+    """
+    return get_tracer().span(name, {key: value for key, value in attributes.items() if value is not None})
+
+
+def attach(trace_context: Optional[dict[str, str]]) -> Any:
+    """Return a context manager that continues the trace of `trace_context` in the block."""
+    return get_tracer().attach(trace_context)
+
+
+def add_trace_context(job_kwargs: dict[str, Any]) -> dict[str, Any]:
+    """Return the job keyword arguments with the trace context of the current span.
+
+    Without tracing, or outside of a span, the keyword arguments are returned unchanged.
+    """
+    trace_context = get_tracer().get_trace_context()
+    if not trace_context:
+        return job_kwargs
+    return {**job_kwargs, TRACE_CONTEXT_KWARG: trace_context}
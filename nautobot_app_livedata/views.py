@@ -9,12 +9,19 @@ from nautobot.apps import utils
 from nautobot.apps.views import ObjectView
 from nautobot.dcim.models import Device, Interface
 
+from nautobot_app_livedata.utilities import get_app_settings, lastresult
+from nautobot_app_livedata.utilities.jobcache import livedata_job_cache
+from nautobot_app_livedata.utilities.permission import query_permission_cache
+
 logger = logging.getLogger("nautobot_app_livedata")
 
 
 class LivedataExtraTabView(ObjectView):
     """Abstract Live Data view for results."""
 
+    # The call_object_type of the queries of the tab
+    object_type = None
+
     def get_extra_context(self, request, instance):
         """Get extra context for the view.
 
@@ -33,16 +40,36 @@ class LivedataExtraTabView(ObjectView):
 
         extra_context["instance"] = instance
         extra_context["now"] = now.strftime("%Y-%m-%d %H:%M:%S")
-        permissions = request.user.get_all_permissions()
-        extra_context["permissions"] = permissions
-        if request.user.is_staff or request.user.is_superuser:
-            extra_context["has_permission"] = True
-        else:
-            extra_context["has_permission"] = (
-                "dcim.can_interact_device" in permissions and "extras.run_job" in permissions
-            )
+        # The Live Data tab stops polling the JobResult after this many seconds
+        extra_context["poll_max_wait_seconds"] = get_app_settings()["query_poll_max_wait"]
+        extra_context["has_permission"] = query_permission_cache.is_allowed(request.user)
+        if extra_context["has_permission"]:
+            extra_context["last_result"] = self.get_last_result(instance)
         return extra_context
 
+    def get_last_result(self, instance):
+        """Return the last result of a query of the instance, shown while the tab refreshes it.
+
+        Only the commands and the size of their output are rendered into the page,
+        the tab loads the output of a command when its section is opened.
+
+        Args:
+            instance (Model): The device or interface.
+
+        Returns:
+            dict: jobresult_id, date_done and commands, see `summarize_result()`.
+                None if there is no recent result.
+        """
+        app_settings = get_app_settings()
+        entry = livedata_job_cache.get(app_settings["query_job_name"], app_settings["query_job_task_queue"])
+        if entry is None:
+            return None
+        try:
+            return lastresult.get_last_result(entry.job.pk, self.object_type, instance.pk)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.warning("Could not load the last Livedata result of %s: %s", instance, error)
+            return None
+
 
 class LivedataInterfaceExtraTabView(LivedataExtraTabView):
     """Live Data view for Interface results."""
@@ -50,6 +77,8 @@ class LivedataInterfaceExtraTabView(LivedataExtraTabView):
     queryset = Interface.objects.all()
     template_name = "nautobot_app_livedata/interface_live_data.html"  # Updated template name
 
+    object_type = "dcim.interface"
+
     def get_extra_context(self, request, instance):
         extra_context = super().get_extra_context(request, instance)
 
@@ -65,6 +94,8 @@ class LivedataDeviceExtraTabView(LivedataExtraTabView):
     queryset = Device.objects.all()
     template_name = "nautobot_app_livedata/device_live_data.html"  # Updated template name
 
+    object_type = "dcim.device"
+
     def get_extra_context(self, request, instance):
         extra_context = super().get_extra_context(request, instance)
         extra_context["active_tab"] = "livedata_device_tab"  # tab ID from template_content.py